@@ -0,0 +1,89 @@
+#bench_decode_detect.py
+# Tam çözünürlükte çözme+algılama ile küçültülmüş çözme+algılama yolunu
+# farklı görsel boyutlarında karşılaştırır.
+#
+#   cd skin_analysis_api
+#   python -m benchmarks.bench_decode_detect --image yuz.jpg --iterations 10
+import argparse
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from inference.face_detector import get_face_detector
+from inference.pipeline import extract_face_region
+
+# (etiket, genişlik, yükseklik) - tipik telefon kamerası çözünürlükleri
+SIZES = [
+    ("0.3 MP", 640, 480),
+    ("2 MP", 1600, 1200),
+    ("8 MP", 3264, 2448),
+    ("12 MP", 4032, 3024),
+]
+
+
+def legacy_extract(image_bytes):
+    # Önceki davranış: tam çözünürlükte çöz, eşitle ve algıla
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    gray = cv2.equalizeHist(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+    faces = get_face_detector().detect(gray)
+    if len(faces) == 0:
+        return None
+    x, y, w, h = faces[0]
+    return img[y:y + h, x:x + w]
+
+
+def make_jpeg(source, width, height, quality=92):
+    if source is None:
+        rng = np.random.default_rng(0)
+        # Düzgün gradyan + gürültü; gerçek fotoğraflara yakın sıkıştırma oranı için
+        base = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+        noise = rng.normal(0, 12, size=(height // 8, width // 8, 3)).astype(np.float32)
+        noise = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+        img = np.clip(base + noise, 0, 255).astype(np.uint8)
+    else:
+        img = cv2.resize(source, (width, height), interpolation=cv2.INTER_CUBIC)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise SystemExit("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def time_fn(fn, data, iterations):
+    fn(data)  # ısınma
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downscale-before-detect benchmark")
+    parser.add_argument("--image", help="Yüz içeren kaynak görsel (verilmezse sentetik)")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    source = None
+    if args.image:
+        source = cv2.imread(args.image, cv2.IMREAD_COLOR)
+        if source is None:
+            raise SystemExit(f"Could not read image: {args.image}")
+    get_face_detector().load()
+
+    print(f"{'size':<8} {'bytes':>10} {'legacy ms':>10} {'reduced ms':>11} {'speedup':>8}  crop (legacy -> reduced)")
+    for label, width, height in SIZES:
+        data = make_jpeg(source, width, height)
+        legacy = time_fn(legacy_extract, data, args.iterations)
+        reduced = time_fn(extract_face_region, data, args.iterations)
+        old_crop, new_crop = legacy_extract(data), extract_face_region(data)
+        crops = f"{None if old_crop is None else old_crop.shape[:2]} -> " \
+                f"{None if new_crop is None else new_crop.shape[:2]}"
+        print(f"{label:<8} {len(data):>10} {legacy * 1000:>10.1f} {reduced * 1000:>11.1f} "
+              f"{legacy / reduced:>7.1f}x  {crops}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#bench_face_detector.py
+# Her çağrıda CascadeClassifier kurmak ile havuzlanmış FaceDetector'ı karşılaştırır.
+#
+#   cd skin_analysis_api
+#   python -m benchmarks.bench_face_detector --image yuz.jpg --iterations 50 --threads 4
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from inference.face_detector import FaceDetector, DEFAULT_CASCADE
+
+
+def load_gray(path, size):
+    if path:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            raise SystemExit(f"Could not read image: {path}")
+    else:
+        # Görsel verilmezse sentetik gürültü; cascade maliyeti yüz olmasa da ölçülür
+        rng = np.random.default_rng(0)
+        img = rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.equalizeHist(gray)
+
+
+def per_call(gray):
+    # Eski davranış: her istekte XML diskten okunur
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + DEFAULT_CASCADE)
+    return face_cascade.detectMultiScale(
+        image=gray, scaleFactor=1.1, minNeighbors=4, minSize=(60, 60), flags=cv2.CASCADE_SCALE_IMAGE
+    )
+
+
+def construction_only():
+    return cv2.CascadeClassifier(cv2.data.haarcascades + DEFAULT_CASCADE)
+
+
+def run(label, fn, iterations, threads):
+    timings = []
+
+    def timed(_):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(timed, range(iterations)))
+    wall = time.perf_counter() - wall
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<28} mean {statistics.mean(timings) * 1000:8.2f} ms   "
+          f"p95 {p95 * 1000:8.2f} ms   throughput {iterations / wall:8.1f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Haar cascade per-call vs pooled benchmark")
+    parser.add_argument("--image", help="Test görseli (verilmezse sentetik)")
+    parser.add_argument("--size", type=int, default=640, help="Sentetik görsel kenar uzunluğu")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    gray = load_gray(args.image, args.size)
+    detector = FaceDetector()
+    detector.load()
+
+    print(f"image {gray.shape[1]}x{gray.shape[0]}, {args.iterations} iterations, {args.threads} threads")
+    run("construction only", construction_only, args.iterations, args.threads)
+    run("per-call construction", lambda: per_call(gray), args.iterations, args.threads)
+    run("pooled FaceDetector", lambda: detector.detect(gray), args.iterations, args.threads)
+    print(f"pooled classifier instances: {detector.instances}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#bench_model_memory.py
+# N süreçte modeli kopyalayarak ve mmap ile yükleyip süreç başına belleği karşılaştırır.
+# Süreçler ölçüm anında birlikte canlıdır; paylaşılan sayfalar Pss'te süreçlere
+# bölündüğü için "toplam pss" makinedeki gerçek kullanımdır. Çıktıların iki
+# yüklemede aynı olduğu da doğrulanır.
+#
+#   cd skin_analysis_api
+#   python -m benchmarks.bench_model_memory --model 75epoch-convnextbase-improved.pth --workers 4
+import argparse
+import multiprocessing
+import os
+
+import numpy as np
+
+from inference.memory import process_memory
+
+KINDS = ("rss", "rss_anon", "rss_file", "pss")
+
+
+def _load_and_measure(model_path, num_labels, mmap, barrier, results):
+    import torch
+
+    from inference.model import build_model
+
+    torch.set_num_threads(1)
+    before = process_memory()
+    model = build_model(model_path, torch.device("cpu"), num_labels, mmap=mmap)
+    with torch.inference_mode():
+        probs = torch.sigmoid(model(torch.zeros(1, 3, 224, 224))).numpy()[0]
+    # Herkes yüklesin, sonra ölç: paylaşım ancak süreçler birlikte yaşarken görünür
+    barrier.wait()
+    after = process_memory()
+    barrier.wait()
+    results.put((os.getpid(), before, after, probs))
+
+
+def run(label, model_path, num_labels, workers, mmap):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_load_and_measure, args=(model_path, num_labels, mmap, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    print(f"\n{label}")
+    print(f"{'pid':>8} " + " ".join(f"{kind + ' MB':>12}" for kind in KINDS) + f" {'rss delta MB':>13}")
+    for pid, before, after, _ in rows:
+        print(f"{pid:>8} " + " ".join(f"{after.get(kind, 0) / 2 ** 20:>12.1f}" for kind in KINDS)
+              + f" {(after.get('rss', 0) - before.get('rss', 0)) / 2 ** 20:>13.1f}")
+    total_pss = sum(after.get("pss", 0) for _, _, after, _ in rows)
+    total_rss = sum(after.get("rss", 0) for _, _, after, _ in rows)
+    print(f"{'total':>8}  rss {total_rss / 2 ** 20:.1f} MB   pss {total_pss / 2 ** 20:.1f} MB")
+    return np.stack([probs for *_, probs in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of copied vs mmap-loaded weights")
+    parser.add_argument("--model", default="75epoch-convnextbase-improved.pth")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from data.skin_issues import LABELS
+
+    copied = run("private copy (torch.load)", args.model, len(LABELS), args.workers, mmap=False)
+    mapped = run("shared mmap (torch.load(mmap=True))", args.model, len(LABELS), args.workers, mmap=True)
+    diff = float(np.abs(copied - mapped).max())
+    print(f"\nmax |copy - mmap| probability difference: {diff:.2e}")
+    if diff > 1e-6:
+        raise SystemExit("mmap-loaded model output differs from the copied model")
+
+
+if __name__ == "__main__":
+    main()
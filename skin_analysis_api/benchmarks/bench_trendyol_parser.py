@@ -0,0 +1,126 @@
+#bench_trendyol_parser.py
+# Kayıtlı Trendyol sayfalarında eski BeautifulSoup ayrıştırıcısı ile tek geçişli
+# tarama ve yapısal-veri-öncelikli hızlı yolu karşılaştırır; sonuçların eşdeğer
+# olduğunu da doğrular (uyuşmazlıkta çıkış kodu 1). Akışlı ayrıştırmada sayfanın
+# ne kadarının okunduğunu da gösterir.
+#
+#   cd skin_analysis_api
+#   python -m benchmarks.bench_trendyol_parser --iterations 50
+#   python -m benchmarks.bench_trendyol_parser --fixtures /kayitli/sayfalar
+import argparse
+import glob
+import logging
+import os
+import statistics
+import sys
+import time
+
+from scrapers.parser import parse_product_html, FIELDS, etree, StreamingProductParser
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "trendyol")
+MODES = ("legacy", "tree", "fast")
+# Hızlı yolda ad/marka JSON-LD'den temiz gelir; eski seçici "h1.pr-new-br" içinde
+# marka ile adı birleştirdiği için bu alanlar yalnızca tarama modunda birebir aranır
+FAST_EXACT_FIELDS = ("price", "rating", "image_url")
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _normalize_price(value):
+    # "749,90" ile JSON-LD'den gelen "749.90" aynı tutardır
+    if not value:
+        return value
+    return value.replace(".", "").replace(",", ".") if "," in value else value
+
+
+def compare(path, html):
+    legacy = parse_product_html(html, path, mode="legacy")
+    tree = parse_product_html(html, path, mode="tree")
+    fast = parse_product_html(html, path, mode="fast")
+    problems = []
+    for field in FIELDS:
+        if tree[field] != legacy[field]:
+            problems.append(f"tree.{field}={tree[field]!r} legacy={legacy[field]!r}")
+    for field in FAST_EXACT_FIELDS:
+        want, got = legacy[field], fast[field]
+        if field == "price":
+            want, got = _normalize_price(want), _normalize_price(got)
+            want = float(want) if want else None
+            got = float(got) if got else None
+        if want and got != want:
+            problems.append(f"fast.{field}={fast[field]!r} legacy={legacy[field]!r}")
+    for field in FIELDS:
+        if legacy[field] and not fast[field]:
+            problems.append(f"fast.{field} missing, legacy={legacy[field]!r}")
+    return problems
+
+
+def stream(html, path, mode, chunk_size):
+    data = html.encode("utf-8")
+    parser = StreamingProductParser(path, mode=mode)
+    for start in range(0, len(data), chunk_size):
+        if parser.feed(data[start:start + chunk_size]):
+            break
+    return parser.close(), parser.bytes_fed / len(data)
+
+
+def compare_streaming(path, html, chunk_size):
+    problems = []
+    for mode, fields in (("tree", FIELDS), ("fast", FAST_EXACT_FIELDS)):
+        full = parse_product_html(html, path, mode=mode)
+        streamed, _ = stream(html, path, mode, chunk_size)
+        for field in fields:
+            if streamed[field] != full[field]:
+                problems.append(f"stream-{mode}.{field}={streamed[field]!r} full={full[field]!r}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trendyol page parser benchmark and equivalence check")
+    parser.add_argument("--fixtures", default=FIXTURES, help="Directory of saved product pages (*.html)")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--chunk-size", type=int, default=16384, help="Chunk size for the streaming check")
+    args = parser.parse_args()
+    # Bozuk JSON-LD içeren örnekler her turda hata loglar; ölçümü gölgelemesin
+    logging.disable(logging.ERROR)
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not paths:
+        raise SystemExit(f"No fixtures found in {args.fixtures}")
+
+    print(f"tree backend: {'lxml' if etree is not None else 'html.parser'}")
+    print(f"{'fixture':>22} {'KB':>6} " + " ".join(f"{mode + ' ms':>10}" for mode in MODES) + "  speedup")
+    failures = 0
+    totals = dict.fromkeys(MODES, 0.0)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        medians = {mode: timed(lambda m=mode: parse_product_html(html, path, mode=m), args.iterations)
+                   for mode in MODES}
+        for mode in MODES:
+            totals[mode] += medians[mode]
+        print(f"{os.path.basename(path):>22} {len(html) / 1024:6.1f} "
+              + " ".join(f"{medians[mode]:10.2f}" for mode in MODES)
+              + f"  {medians['legacy'] / medians['fast']:6.1f}x"
+              + f"  stream read {stream(html, path, 'fast', args.chunk_size)[1]:4.0%}")
+        for problem in compare(path, html) + compare_streaming(path, html, args.chunk_size):
+            failures += 1
+            print(f"  MISMATCH {problem}")
+
+    print(f"{'total':>22} {'':>6} " + " ".join(f"{totals[mode]:10.2f}" for mode in MODES)
+          + f"  {totals['legacy'] / totals['fast']:6.1f}x")
+    if failures:
+        print(f"Equivalence check failed ({failures} mismatches)")
+        sys.exit(1)
+    print("Equivalence check passed")
+
+
+if __name__ == "__main__":
+    main()
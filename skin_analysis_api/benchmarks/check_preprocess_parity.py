@@ -0,0 +1,92 @@
+#check_preprocess_parity.py
+# inference.preprocess çıktısını eski torchvision/PIL transform'u ile karşılaştırır
+# ve her iki yolun süresini ölçer. Tolerans aşılırsa sıfırdan farklı kodla çıkar.
+#
+#   cd skin_analysis_api
+#   python -m benchmarks.check_preprocess_parity --image yuz.jpg
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+from torchvision import transforms
+
+from inference.preprocess import preprocess_face, BatchBuffer, MEAN, STD
+
+# Servisin ve eğitimin önceden kullandığı dönüşüm
+reference_transform = transforms.Compose([
+    transforms.Resize(256),
+    transforms.CenterCrop(224),
+    transforms.ToTensor(),
+    transforms.Normalize(list(MEAN), list(STD))
+])
+
+# Normalize edilmiş birimlerde (yaklaşık 1/(255*0.225) = 0.017 bir gri seviye)
+MEAN_ABS_TOLERANCE = 0.02
+MAX_ABS_TOLERANCE = 0.35
+
+# Hem büyütme hem küçültme yollarını kapsayan kırpık boyutları (y, x)
+CROP_SHAPES = [(180, 150), (256, 256), (300, 240), (420, 380), (640, 512), (1100, 900), (2000, 1600)]
+
+
+def reference(face_bgr):
+    face_rgb = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2RGB)
+    return reference_transform(Image.fromarray(face_rgb).convert("RGB"))
+
+
+def make_crops(source):
+    rng = np.random.default_rng(0)
+    for h, w in CROP_SHAPES:
+        if source is not None:
+            yield cv2.resize(source, (w, h), interpolation=cv2.INTER_CUBIC)
+        else:
+            # Yumuşak yapı + ince doku; saf gürültü interpolasyon farklarını abartır
+            coarse = rng.integers(0, 256, size=(max(2, h // 16), max(2, w // 16), 3)).astype(np.float32)
+            img = cv2.resize(coarse, (w, h), interpolation=cv2.INTER_CUBIC)
+            img += rng.normal(0, 4, size=img.shape).astype(np.float32)
+            yield np.clip(img, 0, 255).astype(np.uint8)
+
+
+def timed(fn, iterations=20):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing parity check against the torchvision transform")
+    parser.add_argument("--image", help="Kaynak yüz görseli (verilmezse sentetik)")
+    args = parser.parse_args()
+
+    source = None
+    if args.image:
+        source = cv2.imread(args.image, cv2.IMREAD_COLOR)
+        if source is None:
+            raise SystemExit(f"Could not read image: {args.image}")
+
+    failed = False
+    buffer = BatchBuffer(1)
+    print(f"{'crop':>11} {'mean |d|':>9} {'max |d|':>8} {'PIL ms':>8} {'fused ms':>9}")
+    for face in make_crops(source):
+        expected = reference(face)
+        actual = preprocess_face(face)
+        diff = (expected - actual).abs()
+        mean_abs, max_abs = diff.mean().item(), diff.max().item()
+        ok = mean_abs <= MEAN_ABS_TOLERANCE and max_abs <= MAX_ABS_TOLERANCE
+        failed |= not ok
+        pil_ms = timed(lambda: reference(face))
+        fused_ms = timed(lambda: buffer.fill([face]))
+        print(f"{face.shape[0]:>5}x{face.shape[1]:<5} {mean_abs:>9.4f} {max_abs:>8.4f} "
+              f"{pil_ms:>8.2f} {fused_ms:>9.2f}{'' if ok else '  FAIL'}")
+
+    if failed:
+        print(f"Parity check failed (tolerance mean<={MEAN_ABS_TOLERANCE}, max<={MAX_ABS_TOLERANCE})")
+        sys.exit(1)
+    print("Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#analysis_cache.py
+# Analiz sonuçları için içerik adresli önbellek yardımcıları. Kesin eşleşme
+# yüklenen baytların blake2b karmasıyla AsyncCache üzerinden yapılır; yeniden
+# kodlanmış (ör. mobil uygulamanın tekrar sıkıştırdığı) aynı fotoğraflar için
+# yüz kırpıklarının dHash'i süreç içi bir dizinde Hamming mesafesiyle aranır ve
+# aday, kırpıkların küçük resimleri karşılaştırılarak doğrulanır.
+# Her iki katman da eşikleri değil kırpık olasılıklarını saklar; karar her
+# isabette güncel eşiklerle yeniden verilir.
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from cache.async_cache import LOOKUPS
+
+
+def content_key(image_bytes: bytes, mode: str, max_faces: int, model: str) -> str:
+    digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    return f"analysis:{model}:{mode}:{max_faces}:{digest}"
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8), axis=-1).reshape(*values.shape, 64).sum(axis=-1)
+
+
+class _Bucket:
+    # Aynı kırpık düzenine (mod + kırpık adları) sahip kayıtlar: [n, kırpık] uint64 karmalar
+    __slots__ = ("hashes", "stored_at", "values", "thumbnails", "size", "next")
+
+    def __init__(self, capacity: int, width: int):
+        self.hashes = np.zeros((capacity, width), dtype=np.uint64)
+        self.stored_at = np.zeros(capacity, dtype=np.float64)
+        self.values: list = [None] * capacity
+        self.thumbnails: list = [None] * capacity
+        self.size = 0
+        self.next = 0
+
+
+class PerceptualIndex:
+    """
+    Kırpık dHash'leri -> değer. Bir kayıt, her kırpığın karması en fazla
+    max_distance bit farklıysa aday olur. 64 bitlik karma farklı kişilerin
+    benzer yüzlerinde de çakışabildiği için aday ancak kırpıkların küçük
+    resimleri arasındaki ortalama mutlak fark her kırpıkta max_diff gri düzeyi
+    geçmiyorsa döner; adaylar yakından uzağa en fazla max_candidates kadar
+    denenir. Düzen başına sabit kapasiteli halka tampon (en eskinin üzerine
+    yazılır) ve ttl ile bellek sınırlıdır. Yalnızca event loop'tan kullanılır,
+    kilit gerekmez.
+    """
+
+    def __init__(self, capacity: int = 4096, ttl: float = 3600.0, max_distance: int = 4,
+                 max_diff: float = 1.0, max_candidates: int = 4, max_layouts: int = 16,
+                 name: str = "analysis_perceptual"):
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.max_diff = max_diff
+        self.max_candidates = max(1, max_candidates)
+        self.max_layouts = max(1, max_layouts)
+        self.name = name
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    @staticmethod
+    def parse(signature: str):
+        # "face0=1a2b...,face0:forehead=..." -> (düzen anahtarı, uint64 dizisi)
+        names, hashes = zip(*(part.split("=", 1) for part in signature.split(",")))
+        return ",".join(names), np.array([int(h, 16) for h in hashes], dtype=np.uint64)
+
+    def _matches(self, stored: np.ndarray, thumbnails: np.ndarray) -> bool:
+        # Kırpık başına ortalama mutlak gri düzey farkı; en kötü kırpık belirler
+        diff = np.abs(stored.astype(np.int16) - thumbnails.astype(np.int16))
+        return float(diff.reshape(len(diff), -1).mean(axis=1).max()) <= self.max_diff
+
+    def get(self, layout: str, hashes: np.ndarray, thumbnails: np.ndarray) -> Optional[Any]:
+        bucket = self._buckets.get(layout)
+        if bucket is None or bucket.size == 0:
+            LOOKUPS.inc(cache=self.name, result="miss")
+            return None
+        live = time.time() - bucket.stored_at[:bucket.size] < self.ttl
+        distances = _popcount(bucket.hashes[:bucket.size] ^ hashes).max(axis=1)
+        distances = np.where(live, distances, 65)
+        candidates = np.flatnonzero(distances <= self.max_distance)
+        if not len(candidates):
+            LOOKUPS.inc(cache=self.name, result="miss")
+            return None
+        for slot in candidates[np.argsort(distances[candidates], kind="stable")][:self.max_candidates]:
+            if self._matches(bucket.thumbnails[slot], thumbnails):
+                LOOKUPS.inc(cache=self.name, result="hit")
+                return bucket.values[slot]
+        # Karma eşleşti ama görüntü farklı: başka bir yüz, ıskalama sayılır
+        LOOKUPS.inc(cache=self.name, result="rejected")
+        return None
+
+    def put(self, layout: str, hashes: np.ndarray, thumbnails: np.ndarray, value: Any):
+        bucket = self._buckets.get(layout)
+        if bucket is None:
+            bucket = self._buckets[layout] = _Bucket(self.capacity, len(hashes))
+            while len(self._buckets) > self.max_layouts:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(layout)
+        slot = bucket.next
+        bucket.hashes[slot] = hashes
+        bucket.stored_at[slot] = time.time()
+        bucket.values[slot] = value
+        bucket.thumbnails[slot] = thumbnails
+        bucket.next = (slot + 1) % self.capacity
+        bucket.size = min(bucket.size + 1, self.capacity)
+
+
+def encode_result(names: Sequence[str], crop_probs: np.ndarray) -> Dict[str, Any]:
+    # JSON'a çevrilebilir değer (sqlite/redis arka uçları için)
+    return {"names": list(names), "probs": np.asarray(crop_probs, dtype=np.float32).tolist()}
+
+
+def decode_result(value: Dict[str, Any]):
+    return value["names"], np.asarray(value["probs"], dtype=np.float32)
@@ -0,0 +1,103 @@
+#async_cache.py
+# TTL + stale-while-revalidate + tek uçuş (single-flight) önbellek katmanı.
+# Aynı anahtar için eşzamanlı 50 istek tek bir yükleme tetikler; süresi yeni
+# dolmuş bir kayıt beklemeden döndürülür ve arka planda yenilenir.
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cache.backends import CacheEntry
+from metrics import counter, histogram
+
+LOOKUPS = counter("cache_lookups_total", "Cache lookups by outcome (hit, stale, miss, coalesced)",
+                  labelnames=("cache", "result"))
+LOAD_LATENCY = histogram("cache_load_seconds", "Time spent loading a value on a cache miss or refresh",
+                         labelnames=("cache",), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+class AsyncCache:
+    def __init__(self, backend, ttl: float, stale_ttl: float = 0.0, name: str = "cache",
+                 cache_empty: bool = False):
+        """
+        ttl: kaydın taze sayıldığı süre (sn). stale_ttl: ttl'den sonra bayat kaydın
+        hâlâ döndürülüp arka planda yenilendiği ek süre. cache_empty=False iken boş
+        sonuçlar (ör. başarısız bir kazıma) saklanmaz.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = max(0.0, stale_ttl)
+        self.name = name
+        self.cache_empty = cache_empty
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background = set()
+
+    async def _call(self, fn, *args):
+        # Disk/ağ arka uçları event loop'u bloklamasın
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def _read(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return await self._call(self.backend.get, key)
+        except Exception as e:
+            logging.error(f"[{self.name}] cache read error for {key}: {e}")
+            return None
+
+    async def _write(self, key: str, value: Any):
+        if not value and not self.cache_empty:
+            return
+        try:
+            await self._call(self.backend.set, key, value, self.ttl + self.stale_ttl)
+        except Exception as e:
+            logging.error(f"[{self.name}] cache write error for {key}: {e}")
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        try:
+            value = await loader()
+        finally:
+            LOAD_LATENCY.observe(time.perf_counter() - started, cache=self.name)
+        await self._write(key, value)
+        return value
+
+    def _single_flight(self, key: str, loader: Callable[[], Awaitable[Any]]) -> "asyncio.Future":
+        future = self._inflight.get(key)
+        if future is not None:
+            return future
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = await self._read(key)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < self.ttl:
+                LOOKUPS.inc(cache=self.name, result="hit")
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                # Bayat kaydı hemen döndür, yenilemeyi arka planda tek uçuşla yap
+                LOOKUPS.inc(cache=self.name, result="stale")
+                if key not in self._inflight:
+                    refresh = self._single_flight(key, loader)
+                    self._background.add(refresh)
+                    refresh.add_done_callback(self._background_done)
+                return entry.value
+
+        if key in self._inflight:
+            LOOKUPS.inc(cache=self.name, result="coalesced")
+        else:
+            LOOKUPS.inc(cache=self.name, result="miss")
+        # shield: bekleyen bir istemcinin iptali ortak yüklemeyi iptal etmesin
+        return await asyncio.shield(self._single_flight(key, loader))
+
+    def _background_done(self, task: "asyncio.Future"):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"[{self.name}] background refresh failed: {task.exception()}")
+
+    async def invalidate(self, key: str):
+        await self._call(self.backend.delete, key)
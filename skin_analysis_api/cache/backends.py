@@ -0,0 +1,161 @@
+#backends.py
+# Önbellek depolama arka uçları. Değerler JSON'a çevrilebilir olmalıdır.
+#   memory: süreç içi, boyut sınırlı LRU
+#   sqlite: yerel disk; aynı makinedeki tüm uvicorn worker'ları paylaşır
+#   redis : Redis uyumlu sunucu (redis paketi gerekir)
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, stored_at, expires_at = item
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return CacheEntry(value, stored_at)
+
+    def set(self, key: str, value: Any, retention: float, stored_at: Optional[float] = None):
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            self._data[key] = (value, stored_at, stored_at + retention)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10000, table: str = "cache"):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Dosya ve tablo ilk kullanımda açılır/oluşturulur; modül içe aktarımı diske dokunmaz
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # WAL: birden çok süreç aynı anda okurken yazma yapılabilir
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            f"SELECT value, stored_at, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[2] <= now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return CacheEntry(json.loads(row[0]), row[1])
+
+    def set(self, key: str, value: Any, retention: float, stored_at: Optional[float] = None):
+        stored_at = time.time() if stored_at is None else stored_at
+        conn = self._connect()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), stored_at, stored_at + retention, time.time()),
+        )
+        self._writes += 1
+        if self._writes % 64 == 0:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # Süresi dolanları ve en uzun süredir okunmayan fazlalıkları sil
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+            "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+        )
+
+    def delete(self, key: str):
+        self._connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class RedisBackend:
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "skincare:"):
+        import redis
+
+        # LRU tahliyesi sunucunun maxmemory-policy ayarına bırakılır (allkeys-lru)
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        item = json.loads(raw)
+        return CacheEntry(item["value"], item["stored_at"])
+
+    def set(self, key: str, value: Any, retention: float, stored_at: Optional[float] = None):
+        stored_at = time.time() if stored_at is None else stored_at
+        payload = json.dumps({"value": value, "stored_at": stored_at}, ensure_ascii=False)
+        self.client.set(self.prefix + key, payload, px=max(1, int(retention * 1000)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+def create_backend(kind: str, max_entries: int = 1024, sqlite_path: str = "cache.sqlite3",
+                   redis_url: str = "", table: str = "cache", prefix: str = "skincare:"):
+    if kind == "memory":
+        return MemoryBackend(max_entries)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path, max_entries, table=table)
+    if kind == "redis":
+        return RedisBackend(redis_url, prefix=prefix)
+    raise ValueError(f"Unknown cache backend {kind!r}, expected memory, sqlite or redis")
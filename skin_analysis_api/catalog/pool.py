@@ -0,0 +1,208 @@
+#pool.py
+# Her cilt sorunu için önceden taranıp puanlanmış ürün aday havuzu ve bu havuzu
+# periyodik olarak yenileyen arka plan işi. Uç noktalar product_count/min_rating
+# dilimini canlı arama yapmadan havuzdan keser; havuz istenen sayıda ürün
+# veremezse canlı aramaya düşülür.
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+from catalog.ranking import brand_key, query_keywords, rank_products
+from metrics import counter, gauge, histogram
+
+POOL_AGE = gauge("catalog_pool_age_seconds", "Seconds since the candidate pool was refreshed",
+                 labelnames=("issue",))
+POOL_SIZE = gauge("catalog_pool_products", "Products in the candidate pool", labelnames=("issue",))
+REFRESHES = counter("catalog_refresh_total", "Candidate pool refreshes by result", labelnames=("issue", "result"))
+REFRESH_LATENCY = histogram("catalog_refresh_seconds", "Time to crawl and rank one issue",
+                            labelnames=("issue",), buckets=(1, 2.5, 5, 10, 20, 40, 80, 160))
+SERVED = counter("catalog_served_total", "Recommendation lookups by source (pool or live fallback)",
+                 labelnames=("source",))
+
+
+def rank_candidates(products: List[dict], keywords: Iterable[str] = ()) -> List[dict]:
+    # Puan, yorum sayısı, fiyat bandı, anahtar kelime eşleşmesi ve tazelikle tek geçişte
+    # sıralanır; aynı adlı ürünler bir kez tutulur. Marka sınırı okumada (CatalogPool.slice) uygulanır.
+    return rank_products(products, keywords=keywords, seed=config.RANK_SEED, max_per_brand=0, diversity=0.0)
+
+
+class CatalogPool:
+    """
+    Paylaşılan depoda (memory/sqlite/redis arka ucu) issue başına
+    {"refreshed_at": ..., "products": [...]} tutar. Okumalar süreç içi
+    anlık görüntüden yapılır; görüntü en fazla reload_seconds'ta bir depodan,
+    event loop dışında (to_thread) tazelenir. Metrikler yalnızca görüntüyü okur.
+    """
+
+    def __init__(self, backend, retention: float, reload_seconds: float = 5.0):
+        self.backend = backend
+        self.retention = retention
+        self.reload_seconds = reload_seconds
+        self._snapshot: Dict[str, Tuple[float, float, List[dict]]] = {}  # issue -> (okundu, yenilendi, ürünler)
+
+    @staticmethod
+    def _key(issue: str) -> str:
+        return f"catalog:{issue}"
+
+    def _fresh(self, issue: str) -> bool:
+        cached = self._snapshot.get(issue)
+        return cached is not None and time.time() - cached[0] < self.reload_seconds
+
+    def _cached(self, issue: str) -> Tuple[float, List[dict]]:
+        # Depoya gitmeden son anlık görüntü (event loop'tan güvenle çağrılabilir)
+        cached = self._snapshot.get(issue)
+        return (cached[1], cached[2]) if cached is not None else (0.0, [])
+
+    def _load(self, issue: str) -> Tuple[float, List[dict]]:
+        # Senkron depo okuması; event loop'tan yalnızca to_thread ile çağrılır
+        if self._fresh(issue):
+            return self._cached(issue)
+        now = time.time()
+        refreshed_at, products = 0.0, []
+        try:
+            entry = self.backend.get(self._key(issue))
+            if entry is not None:
+                refreshed_at, products = entry.value["refreshed_at"], entry.value["products"]
+        except Exception as e:
+            logging.error(f"Catalog pool read error for {issue}: {e}")
+        self._snapshot[issue] = (now, refreshed_at, products)
+        return refreshed_at, products
+
+    def age(self, issue: str) -> Optional[float]:
+        refreshed_at, products = self._load(issue)
+        return time.time() - refreshed_at if products else None
+
+    def _cached_age(self, issue: str) -> float:
+        refreshed_at, products = self._cached(issue)
+        return time.time() - refreshed_at if products else 0.0
+
+    def store(self, issue: str, products: List[dict]):
+        now = time.time()
+        self.backend.set(self._key(issue), {"refreshed_at": now, "products": products}, self.retention)
+        self._snapshot[issue] = (now, now, products)
+        POOL_SIZE.set(len(products), issue=issue)
+
+    async def slice(self, issue: str, count: int, min_rating: Optional[float] = None) -> List[dict]:
+        if self._fresh(issue):
+            _, products = self._cached(issue)
+        else:
+            _, products = await asyncio.to_thread(self._load, issue)
+        # Havuz sıralı saklanır; burada yalnızca puan süzgeci ve marka sınırı uygulanır
+        selected, brands = [], {}
+        for product in products:
+            if min_rating is not None and (product.get("rating") is None or product["rating"] < min_rating):
+                continue
+            brand = brand_key(product)
+            if brand and config.RANK_MAX_PER_BRAND and brands.get(brand, 0) >= config.RANK_MAX_PER_BRAND:
+                continue
+            selected.append(product)
+            if brand:
+                brands[brand] = brands.get(brand, 0) + 1
+            if len(selected) >= count:
+                break
+        return selected
+
+    def track(self, issues: Iterable[str]):
+        for issue in issues:
+            POOL_AGE.set_function(lambda i=issue: self._cached_age(i), issue=issue)
+            POOL_SIZE.set_function(lambda i=issue: len(self._cached(i)[1]), issue=issue)
+
+
+class _LeaderLock:
+    # Aynı makinedeki uvicorn worker'larından yalnızca biri tarama yapar
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        try:
+            import fcntl
+        except ImportError:  # Windows: dosya kilidi yok, her süreç lider
+            return True
+        handle = open(self.path, "a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CatalogRefresher:
+    """
+    Lider süreçte sorunları sırayla tarar ve sıralayıp havuza yazar. keywords:
+    sorun -> anahtar kelimeler (canlı aramanın sorgusundakilerle aynı olmalı);
+    verilmeyen sorunlar için sorun adının parçaları kullanılır.
+    """
+
+    def __init__(self, pool: CatalogPool, issues: Iterable[str], crawl: Callable[[str], Awaitable[List[dict]]],
+                 interval: float, lock_path: str, check_every: float = 60.0,
+                 keywords: Optional[Dict[str, Iterable[str]]] = None):
+        self.pool = pool
+        self.issues = list(issues)
+        self.keywords = {issue: list(terms) for issue, terms in (keywords or {}).items()}
+        self.crawl = crawl
+        self.interval = interval
+        self.check_every = min(check_every, interval)
+        self._lock = _LeaderLock(lock_path)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            # Havuz metrikleri yalnızca havuz kullanılırken (arka ucu okuyarak) raporlanır
+            self.pool.track(self.issues)
+            self._task = asyncio.create_task(self._run(), name="catalog-refresher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._lock.release()
+
+    async def refresh(self, issue: str):
+        started = time.perf_counter()
+        try:
+            products = await self.crawl(issue)
+        except Exception as e:
+            REFRESHES.inc(issue=issue, result="error")
+            logging.error(f"Catalog refresh failed for {issue}: {e}")
+            return
+        finally:
+            REFRESH_LATENCY.observe(time.perf_counter() - started, issue=issue)
+        if not products:
+            # Boş tarama eski havuzu silmesin
+            REFRESHES.inc(issue=issue, result="empty")
+            logging.warning(f"Catalog refresh for {issue} returned no products, keeping previous pool")
+            return
+        keywords = self.keywords.get(issue) or query_keywords(issue)
+        await asyncio.to_thread(lambda: self.pool.store(issue, rank_candidates(products, keywords)))
+        REFRESHES.inc(issue=issue, result="ok")
+        logging.info(f"Catalog pool for {issue} refreshed with {len(products)} products")
+
+    async def _run(self):
+        while True:
+            if self._lock.acquire():
+                for issue in self.issues:
+                    age = await asyncio.to_thread(self.pool.age, issue)
+                    if age is None or age >= self.interval:
+                        await self.refresh(issue)
+            await asyncio.sleep(self.check_every)
+
+
+def default_lock_path(store_path: str) -> str:
+    return os.path.splitext(store_path)[0] + ".lock"
@@ -0,0 +1,203 @@
+#ranking.py
+# Aday ürünleri tek vektörel geçişte puanlayıp çeşitlilik kısıtıyla (marka başına
+# üst sınır + MMR) seçen sıralama aşaması. Aynı girdi ve seed için sonuç aynıdır;
+# bu yüzden sıralanmış listeler önbelleğe alınabilir.
+import math
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Özellik ağırlıkları: puan, yorum sayısı, fiyat bandı, anahtar kelime eşleşmesi, tazelik
+DEFAULT_WEIGHTS = {"rating": 0.45, "reviews": 0.15, "price": 0.10, "keywords": 0.20, "freshness": 0.10}
+RATING_PRIOR = 3.5          # puanı olmayan ürünler için varsayılan
+REVIEW_SATURATION = 500.0   # bu kadar yorumdan sonrası fark etmez
+FRESHNESS_HALF_LIFE = 7 * 24 * 3600.0
+MMR_WINDOW = 10             # MMR yalnızca en iyi count * MMR_WINDOW aday üzerinde çalışır
+MMR_MAX_WINDOW = 256        # count büyük ya da None olsa da pencere bundan büyük olmaz
+
+
+def tokenize(text: str) -> List[str]:
+    # Türkçe büyük İ/I için casefold öncesi düzeltme; iki harften kısa parçalar atlanır
+    text = text.replace("İ", "i").replace("I", "ı").casefold()
+    return [token for token in re.findall(r"\w+", text) if len(token) > 1]
+
+
+def parse_price(value) -> Optional[float]:
+    """ "1.299,90" -> 1299.9; "1299.9" ve sayılar da kabul edilir."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r"[^\d,.]", "", str(value))
+    if not text:
+        return None
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(\.\d{3})+", text):
+        text = text.replace(".", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def query_keywords(query: str) -> List[str]:
+    # Arama sorgusundaki "site:" ve OR gibi işleçleri at, kalan parçalar anahtar kelime
+    text = re.sub(r"\bsite:\S+", " ", query)
+    return [token for token in tokenize(text) if token != "or"]
+
+
+def feature_matrix(products: Sequence[dict], keywords: Iterable[str] = (),
+                   now: Optional[float] = None) -> np.ndarray:
+    """(n, 5) özellik matrisi; her sütun [0, 1] aralığında."""
+    n = len(products)
+    now = time.time() if now is None else now
+    keyword_set = set(keywords)
+
+    ratings = np.array([p.get("rating") if p.get("rating") is not None else np.nan for p in products],
+                       dtype=np.float64)
+    reviews = np.array([p.get("review_count") or 0 for p in products], dtype=np.float64)
+    prices = np.array([parse_price(p.get("price")) or np.nan for p in products], dtype=np.float64)
+    fetched = np.array([p.get("fetched_at") or np.nan for p in products], dtype=np.float64)
+    if keyword_set:
+        matches = np.array([len(keyword_set.intersection(tokenize(p.get("name") or ""))) for p in products],
+                           dtype=np.float64)
+    else:
+        matches = np.zeros(n)
+
+    features = np.empty((n, 5), dtype=np.float64)
+    # Puan: yorum sayısıyla ağırlıklı Bayes ortalaması (az yorumlu 5.0 tek başına kazanmasın)
+    known = ~np.isnan(ratings)
+    rated = np.where(known, ratings, RATING_PRIOR)
+    prior_weight = 10.0
+    bayes = np.where(reviews > 0, (prior_weight * RATING_PRIOR + reviews * rated) / (prior_weight + reviews), rated)
+    features[:, 0] = np.clip(bayes / 5.0, 0.0, 1.0)
+    features[:, 1] = np.log1p(reviews) / math.log1p(REVIEW_SATURATION)
+    # Fiyat bandı: adayların log-fiyat medyanına yakın olanlar (aşırı ucuz/pahalı değil)
+    log_prices = np.log(np.where(prices > 0, prices, np.nan))
+    if np.isfinite(log_prices).any():
+        median = np.nanmedian(log_prices)
+        spread = np.nanstd(log_prices) or 1.0
+        band = np.exp(-0.5 * ((log_prices - median) / spread) ** 2)
+        features[:, 2] = np.where(np.isfinite(band), band, 0.5)
+    else:
+        features[:, 2] = 0.5
+    features[:, 3] = matches / max(1.0, min(len(keyword_set), 3.0))
+    age = now - fetched
+    features[:, 4] = np.where(np.isfinite(age), np.exp2(-np.maximum(age, 0.0) / FRESHNESS_HALF_LIFE), 0.5)
+    return np.clip(features, 0.0, 1.0)
+
+
+def score_products(products: Sequence[dict], keywords: Iterable[str] = (), weights: Optional[Dict] = None,
+                   seed: int = 0, now: Optional[float] = None) -> np.ndarray:
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    w = np.array([weights[name] for name in ("rating", "reviews", "price", "keywords", "freshness")])
+    scores = feature_matrix(products, keywords, now) @ w
+    # Eşit puanlılar arasında seed'e bağlı, tekrarlanabilir sıra
+    jitter = np.random.default_rng(seed).random(len(products)) * 1e-6
+    return scores + jitter
+
+
+def _normalize(text: Optional[str]) -> str:
+    # tokenize'dan farklı olarak tek harfli parçaları da korur ("L Oreal" ile "Oreal" ayrı kalsın)
+    text = (text or "").replace("İ", "i").replace("I", "ı").casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def brand_key(product: dict) -> str:
+    return _normalize(product.get("brand"))
+
+
+def _name_key(product: dict) -> str:
+    return _normalize(product.get("name"))
+
+
+def _token_incidence(names: Sequence[str]) -> np.ndarray:
+    # (n, sözlük) 0/1 matris: satır i, i. adın parçaları; kesişim sayısı tek matris-vektör çarpımı
+    vocabulary: Dict[str, int] = {}
+    rows = [[vocabulary.setdefault(token, len(vocabulary)) for token in set(name.split())] for name in names]
+    incidence = np.zeros((len(names), max(1, len(vocabulary))), dtype=np.float32)
+    for i, columns in enumerate(rows):
+        incidence[i, columns] = 1.0
+    return incidence
+
+
+def rank_products(products: Sequence[dict], count: Optional[int] = None, min_rating: Optional[float] = None,
+                  keywords: Iterable[str] = (), seed: int = 0, max_per_brand: int = 2,
+                  diversity: float = 0.3, weights: Optional[Dict] = None,
+                  now: Optional[float] = None) -> List[dict]:
+    """
+    Adayları puanlar ve en fazla count tanesini seçer (None: hepsini sıralar).
+    Kısıtlar: aynı adlı ürün bir kez, marka başına en fazla max_per_brand (0: sınırsız),
+    min_rating altı ve puansızlar (min_rating verilmişse) elenir.
+    diversity (0-1): MMR ceza ağırlığı; seçilmişlere benzeyen (aynı marka, ortak ad
+    parçaları) adaylar geri düşer.
+    """
+    if min_rating is not None:
+        products = [p for p in products if p.get("rating") is not None and p["rating"] >= min_rating]
+    if not products:
+        return []
+    count = len(products) if count is None else max(0, count)
+    scores = score_products(products, keywords, weights, seed, now)
+    order = np.argsort(-scores, kind="stable")
+
+    brand_counts: Dict[str, int] = {}
+    seen_names = set()
+    selected = []
+
+    def admit(product, brand, name) -> bool:
+        if name in seen_names:
+            return False
+        if brand and max_per_brand and brand_counts.get(brand, 0) >= max_per_brand:
+            return False
+        selected.append(product)
+        seen_names.add(name)
+        if brand:
+            brand_counts[brand] = brand_counts.get(brand, 0) + 1
+        return True
+
+    if diversity <= 0:
+        # MMR cezası yok: puan sırasıyla yürüyüp yalnızca kısıtları uygula
+        for i in order:
+            if len(selected) >= count:
+                break
+            admit(products[i], brand_key(products[i]), _name_key(products[i]))
+        return selected
+
+    # MMR yalnızca en iyi adaylardan oluşan sınırlı pencerede; binlerce adayda da
+    # seçim başına maliyet pencere boyutuyla sınırlı kalır
+    window = order[:min(count * MMR_WINDOW, MMR_MAX_WINDOW)]
+    cand = [products[i] for i in window]
+    relevance = scores[window]
+    brands = np.array([brand_key(p) for p in cand], dtype=object)
+    names = [_name_key(p) for p in cand]
+    incidence = _token_incidence(names)
+    sizes = incidence.sum(axis=1)
+
+    available = np.ones(len(cand), dtype=bool)
+    max_sim = np.zeros(len(cand))
+    while len(selected) < count and available.any():
+        mmr = np.where(available, (1.0 - diversity) * relevance - diversity * max_sim, -np.inf)
+        best = int(np.argmax(mmr))
+        available[best] = False
+        brand = brands[best]
+        if not admit(cand[best], brand, names[best]):
+            continue
+        if brand and max_per_brand and brand_counts[brand] >= max_per_brand:
+            available &= brands != brand
+        # Benzerlik: aynı marka 1.0, değilse ad parçalarının Jaccard'ı (pencerenin tümüne tek çarpımda)
+        shared = incidence @ incidence[best]
+        union = sizes + sizes[best] - shared
+        similarity = np.divide(shared, union, out=np.zeros(len(cand)), where=(sizes > 0) & (sizes[best] > 0))
+        if brand:
+            similarity = np.where(brands == brand, 1.0, similarity)
+        max_sim = np.maximum(max_sim, similarity)
+
+    # Kısıtlar pencereyi tükettiyse kalan adaylardan puan sırasıyla tamamla
+    for i in order[len(window):]:
+        if len(selected) >= count:
+            break
+        admit(products[i], brand_key(products[i]), _name_key(products[i]))
+    return selected
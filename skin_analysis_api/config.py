@@ -0,0 +1,202 @@
+#config.py
+import os
+import logging
+
+
+# Ortam değişkenlerinden ayar okuma yardımcıları
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.warning(f"Invalid integer for {name}: {value!r}, using {default}")
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning(f"Invalid float for {name}: {value!r}, using {default}")
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    return value if value else default
+
+
+def env_int_list(name: str, default: list) -> list:
+    # "1,8,16" -> [1, 8, 16]
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        logging.warning(f"Invalid integer list for {name}: {value!r}, using {default}")
+        return default
+
+
+# Inference batching
+BATCH_MAX_SIZE = env_int("BATCH_MAX_SIZE", 8)
+BATCH_MAX_WAIT_MS = env_float("BATCH_MAX_WAIT_MS", 5.0)
+BATCH_MAX_QUEUE = env_int("BATCH_MAX_QUEUE", 64)
+
+# CPU executor: "thread" (OpenCV/torch GIL'i bırakır) veya "process" (süreç başına model)
+EXECUTOR_MODE = env_str("EXECUTOR_MODE", "thread")
+EXECUTOR_WORKERS = env_int("EXECUTOR_WORKERS", 4)
+EXECUTOR_MAX_QUEUE = env_int("EXECUTOR_MAX_QUEUE", 32)
+EXECUTOR_TORCH_THREADS = env_int("EXECUTOR_TORCH_THREADS", 1)
+
+# Yüz bulma (Haar cascade) parametreleri
+FACE_CASCADE_PATH = env_str("FACE_CASCADE_PATH", "")
+FACE_SCALE_FACTOR = env_float("FACE_SCALE_FACTOR", 1.1)
+FACE_MIN_NEIGHBORS = env_int("FACE_MIN_NEIGHBORS", 4)
+FACE_MIN_SIZE = env_int("FACE_MIN_SIZE", 60)
+# Algılama bu uzun kenara küçültülmüş görüntüde yapılır (büyük telefon fotoğrafları için)
+FACE_DETECT_MAX_SIDE = env_int("FACE_DETECT_MAX_SIDE", 640)
+
+# Analiz modu: face (ilk yüz), faces (en fazla ANALYSIS_MAX_FACES yüz) veya regions
+# (her yüz + alın/yanak/göz altı kırpıkları). Tüm kırpıklar tek ileri geçişte çalışır;
+# etiket olasılıkları kırpıklar üzerinden max ya da mean ile birleştirilir.
+ANALYSIS_MODE = env_str("ANALYSIS_MODE", "face")
+ANALYSIS_MAX_FACES = env_int("ANALYSIS_MAX_FACES", 4)
+ANALYSIS_AGGREGATE = env_str("ANALYSIS_AGGREGATE", "max")
+
+# Etiket eşikleri ve kalibrasyon dosyası (JSON, inference/decision.py); değişince
+# DECISION_RELOAD_SECONDS içinde yeniden yüklenir. Yoksa data/skin_issues.THRESHOLDS
+DECISION_CONFIG_PATH = env_str("DECISION_CONFIG_PATH", "decision.json")
+DECISION_RELOAD_SECONDS = env_float("DECISION_RELOAD_SECONDS", 5.0)
+# Yanıtlarda ham/kalibre olasılıklar varsayılan olarak dönsün mü (istek başına ?probabilities=)
+ANALYSIS_RETURN_PROBABILITIES = env_bool("ANALYSIS_RETURN_PROBABILITIES", False)
+# Analizlerin bu oranı için olasılıklar "skincare.probabilities" kanalına DEBUG olarak
+# yazılır (0: kapalı). Kanal kök log seviyesinden bağımsızdır; sıcak yolda maliyet yok.
+PROBABILITY_LOG_SAMPLE_RATE = env_float("PROBABILITY_LOG_SAMPLE_RATE", 0.0)
+
+# Tek görsel yüklemeleri: en fazla bayt (akış sırasında, Content-Length ile gövde
+# okunmadan da) ve başlıktan okunan en fazla piksel sayısı (çözmeden önce)
+UPLOAD_MAX_BYTES = env_int("UPLOAD_MAX_BYTES", 20 * 1024 * 1024)
+UPLOAD_MAX_PIXELS = env_int("UPLOAD_MAX_PIXELS", 50_000_000)
+
+# Toplu analiz (/analyze/batch): aynı anda işlenen görsel sayısı (bellek sınırı bunun
+# katıdır), istek başına en fazla görsel ve görsel başına en fazla bayt
+BATCH_ANALYZE_CONCURRENCY = env_int("BATCH_ANALYZE_CONCURRENCY", 8)
+BATCH_ANALYZE_MAX_IMAGES = env_int("BATCH_ANALYZE_MAX_IMAGES", 1000)
+BATCH_ANALYZE_MAX_IMAGE_BYTES = env_int("BATCH_ANALYZE_MAX_IMAGE_BYTES", 20 * 1024 * 1024)
+# Toplu istek gövdesinin toplam sınırı (multipart ya da ham arşiv); aşılınca 413
+BATCH_ANALYZE_MAX_BYTES = env_int("BATCH_ANALYZE_MAX_BYTES", 512 * 1024 * 1024)
+
+# Model çalışma zamanı: eager, eager_int8, torchscript, torchscript_int8, onnx, onnx_int8
+MODEL_BACKEND = env_str("MODEL_BACKEND", "eager")
+# Boşsa dışa aktarılmış varyant ağırlık dosyasının yanında aranır
+MODEL_VARIANT_PATH = env_str("MODEL_VARIANT_PATH", "")
+# eager/eager_int8 ağırlıklarını dosyadan salt okunur eşle (torch.load(mmap=True)); aynı
+# makinedeki uvicorn worker'ları ve alt süreçler tek fiziksel kopyayı paylaşır (yalnızca CPU)
+MODEL_WEIGHTS_MMAP = env_bool("MODEL_WEIGHTS_MMAP", True)
+# Başlangıçta ağırlıklar arka planda yüklenir; ardından bu batch boyutlarında ısınma
+# geçişleri yapılır (ilk istek soğuk çekirdek/bellek ayırma maliyetini ödemesin)
+MODEL_WARMUP_BATCH_SIZES = env_int_list("MODEL_WARMUP_BATCH_SIZES", sorted({1, BATCH_MAX_SIZE}))
+MODEL_WARMUP_ITERATIONS = env_int("MODEL_WARMUP_ITERATIONS", 1)
+# Model hazır değilken analiz isteği en fazla bu kadar bekler, sonra 503 + Retry-After
+MODEL_READY_WAIT_SECONDS = env_float("MODEL_READY_WAIT_SECONDS", 30.0)
+
+# Ürün sayfası indirme eşzamanlılığı
+SCRAPER_FETCH_WORKERS = env_int("SCRAPER_FETCH_WORKERS", 8)
+SCRAPER_PER_HOST_LIMIT = env_int("SCRAPER_PER_HOST_LIMIT", 4)
+# Ürün sayfası ayrıştırıcısı: fast (JSON-LD önce), tree (tek geçişli tarama) veya legacy
+SCRAPER_PARSER = env_str("SCRAPER_PARSER", "fast")
+# Sayfayı parça parça oku; tüm alanlar bulununca bağlantıyı kapat (legacy ile kullanılmaz)
+SCRAPER_STREAMING = env_bool("SCRAPER_STREAMING", True)
+SCRAPER_STREAM_CHUNK = env_int("SCRAPER_STREAM_CHUNK", 16384)
+# Kalan gövde bundan küçükse sonuna kadar okunur; bağlantı havuza geri dönebilsin
+SCRAPER_STREAM_DRAIN_BYTES = env_int("SCRAPER_STREAM_DRAIN_BYTES", 16384)
+
+# Scraper HTTP bağlantı havuzu, yeniden deneme ve zaman aşımları
+SCRAPER_POOL_CONNECTIONS = env_int("SCRAPER_POOL_CONNECTIONS", 10)
+SCRAPER_POOL_MAXSIZE = env_int("SCRAPER_POOL_MAXSIZE", 8)
+SCRAPER_RETRIES = env_int("SCRAPER_RETRIES", 2)
+SCRAPER_BACKOFF = env_float("SCRAPER_BACKOFF", 0.3)
+SCRAPER_CONNECT_TIMEOUT = env_float("SCRAPER_CONNECT_TIMEOUT", 3.05)
+SCRAPER_READ_TIMEOUT = env_float("SCRAPER_READ_TIMEOUT", 10.0)
+
+# Kanonik ürün URL'si başına kalıcı ürün detay deposu (koşullu GET ile tazelenir)
+PRODUCT_STORE_ENABLED = env_bool("PRODUCT_STORE_ENABLED", True)
+PRODUCT_STORE_BACKEND = env_str("PRODUCT_STORE_BACKEND", "sqlite")
+PRODUCT_STORE_SQLITE_PATH = env_str("PRODUCT_STORE_SQLITE_PATH", "products.sqlite3")
+PRODUCT_STORE_MAX_ENTRIES = env_int("PRODUCT_STORE_MAX_ENTRIES", 50000)
+PRODUCT_STORE_TTL_SECONDS = env_float("PRODUCT_STORE_TTL_SECONDS", 24 * 3600)
+# TTL'den sonra da koşullu doğrulama için saklama süresi
+PRODUCT_STORE_RETENTION_SECONDS = env_float("PRODUCT_STORE_RETENTION_SECONDS", 30 * 24 * 3600)
+
+# Ürün önerisi önbelleği: memory, sqlite (worker'lar arası) veya redis
+CACHE_BACKEND = env_str("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = env_int("CACHE_MAX_ENTRIES", 1024)
+CACHE_TTL_SECONDS = env_float("CACHE_TTL_SECONDS", 3600)  # Cache süresi: 1 saat
+CACHE_STALE_SECONDS = env_float("CACHE_STALE_SECONDS", 600)
+CACHE_SQLITE_PATH = env_str("CACHE_SQLITE_PATH", "cache.sqlite3")
+CACHE_REDIS_URL = env_str("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# Analiz sonucu önbelleği: yüklenen baytların karmasıyla kırpık olasılıkları saklanır.
+ANALYSIS_CACHE_ENABLED = env_bool("ANALYSIS_CACHE_ENABLED", True)
+ANALYSIS_CACHE_BACKEND = env_str("ANALYSIS_CACHE_BACKEND", "memory")
+ANALYSIS_CACHE_MAX_ENTRIES = env_int("ANALYSIS_CACHE_MAX_ENTRIES", 4096)
+ANALYSIS_CACHE_TTL_SECONDS = env_float("ANALYSIS_CACHE_TTL_SECONDS", 3600)
+# PERCEPTUAL açıkken yüz kırpıklarının dHash'i (kırpık başına en fazla DISTANCE bit
+# fark) yeniden kodlanmış aynı fotoğrafı da eşler; yalnızca thread modunda, süreç içi.
+# DİKKAT: dizin tüm kullanıcılar arasında paylaşılır. 64 bitlik dHash benzer ışıkta
+# benzer yüzlerde çakışabilir ve bir kullanıcıya başka birinin analizi (ve ürün
+# listesi) dönebilir. Bu yüzden varsayılan kapalı; açıkken her aday ayrıca kırpıkların
+# 16x16 gri küçük resimleriyle doğrulanır (ortalama mutlak fark en fazla MAX_DIFF gri düzey).
+ANALYSIS_CACHE_PERCEPTUAL = env_bool("ANALYSIS_CACHE_PERCEPTUAL", False)
+ANALYSIS_CACHE_PERCEPTUAL_DISTANCE = env_int("ANALYSIS_CACHE_PERCEPTUAL_DISTANCE", 4)
+ANALYSIS_CACHE_PERCEPTUAL_MAX_DIFF = env_float("ANALYSIS_CACHE_PERCEPTUAL_MAX_DIFF", 1.0)
+
+# Google Custom Search sonuç önbelleği, hız sınırı ve günlük kota (süreç başına)
+SEARCH_CACHE_BACKEND = env_str("SEARCH_CACHE_BACKEND", CACHE_BACKEND)
+SEARCH_CACHE_MAX_ENTRIES = env_int("SEARCH_CACHE_MAX_ENTRIES", 2048)
+SEARCH_CACHE_TTL_SECONDS = env_float("SEARCH_CACHE_TTL_SECONDS", 6 * 3600)
+# TTL'den sonra kota/hız sınırı dolduğunda ya da API hata verdiğinde sunulabilecek süre
+SEARCH_CACHE_STALE_SECONDS = env_float("SEARCH_CACHE_STALE_SECONDS", 24 * 3600)
+SEARCH_RATE_PER_SECOND = env_float("SEARCH_RATE_PER_SECOND", 2.0)
+SEARCH_RATE_BURST = env_int("SEARCH_RATE_BURST", 5)
+SEARCH_RATE_WAIT_SECONDS = env_float("SEARCH_RATE_WAIT_SECONDS", 2.0)
+SEARCH_DAILY_QUOTA = env_int("SEARCH_DAILY_QUOTA", 100)  # 0: sınırsız
+# Kalan kota bu oranın altındaysa alternatif sorgular yalnızca önbellekten
+SEARCH_QUOTA_RESERVE = env_float("SEARCH_QUOTA_RESERVE", 0.2)
+
+# Arka planda önceden hesaplanan ürün aday havuzu
+CATALOG_ENABLED = env_bool("CATALOG_ENABLED", True)
+CATALOG_REFRESH_SECONDS = env_float("CATALOG_REFRESH_SECONDS", 6 * 3600)
+CATALOG_POOL_SIZE = env_int("CATALOG_POOL_SIZE", 10)
+CATALOG_BACKEND = env_str("CATALOG_BACKEND", "sqlite")
+CATALOG_SQLITE_PATH = env_str("CATALOG_SQLITE_PATH", "catalog.sqlite3")
+
+# Öneri ürün kaynağı: trendyol (Google Custom Search + kazıma) veya local (çevrimdışı katalog)
+PRODUCT_SOURCE = env_str("PRODUCT_SOURCE", "trendyol")
+# Yerel katalog anlık görüntüsü: .sqlite3 (tools/build_local_catalog), .json/.jsonl veya .parquet
+LOCAL_CATALOG_PATH = env_str("LOCAL_CATALOG_PATH", "local_catalog.sqlite3")
+LOCAL_CATALOG_RELOAD_SECONDS = env_float("LOCAL_CATALOG_RELOAD_SECONDS", 30.0)
+
+# Aday ürün sıralaması: marka başına üst sınır, MMR çeşitlilik ağırlığı (0-1) ve seed
+RANK_MAX_PER_BRAND = env_int("RANK_MAX_PER_BRAND", 2)
+RANK_DIVERSITY = env_float("RANK_DIVERSITY", 0.3)
+RANK_SEED = env_int("RANK_SEED", 0)
+# Canlı aramada sıralamaya girecek en fazla aday: count * bu çarpan uygun ürün
+# toplanınca kalan sayfa indirmeleri iptal edilir (0: tüm arama sonuçları indirilir)
+RANK_CANDIDATE_FACTOR = env_int("RANK_CANDIDATE_FACTOR", 3)
+
+# Öneri araması için toplam süre sınırı (sn); 0 sınırsız
+RECOMMEND_DEADLINE_SECONDS = env_float("RECOMMEND_DEADLINE_SECONDS", 8.0)
@@ -15,8 +15,27 @@ class ProductsRequest(BaseModel):
     urls: List[str]
 
 
+class RegionAnalysis(BaseModel):
+    region: str  # "face0", "face1", "face0:left_under_eye", ...
+    probabilities: Dict[str, float]
+
+
 class SkinAnalysisResponse(BaseModel):
     detected_skin_issues: List[str]
+    # Yalnızca çok yüzlü/bölgeli analizde (mode=faces veya regions) doldurulur
+    regions: Optional[List[RegionAnalysis]] = None
+    # İstenirse (probabilities=true) etiket başına ham ve kalibre olasılıklar
+    probabilities: Optional[Dict[str, float]] = None
+    calibrated_probabilities: Optional[Dict[str, float]] = None
+
+
+class BatchAnalysisItem(BaseModel):
+    # /analyze/batch NDJSON satırı; index girdideki (arşiv üyeleri dahil) sırayı verir
+    index: int
+    filename: str
+    status_code: int = 200
+    result: Optional[SkinAnalysisResponse] = None
+    error: Optional[str] = None
 
 
 class RecommendationRequest(BaseModel):
@@ -25,9 +44,23 @@ class RecommendationRequest(BaseModel):
     min_rating: Optional[float] = None
 
 
+class IssueRecommendationTiming(BaseModel):
+    elapsed_ms: float
+    source: str  # "pool" (ön hesaplanmış havuz), "live" (önbellekli canlı arama) veya "local" (yerel katalog)
+    timed_out: bool = False
+
+
+class RecommendationMetadata(BaseModel):
+    partial: bool = False  # Süre sınırına yetişemeyen sorun(lar) boş döndü
+    deadline_ms: Optional[float] = None
+    elapsed_ms: float
+    issues: Dict[str, IssueRecommendationTiming] = {}
+
+
 class AnalysisAndRecommendationResponse(BaseModel):
     detected_skin_issues: List[str]
     recommended_products: Dict[str, List[ProductResponse]]
+    recommendation_meta: Optional[RecommendationMetadata] = None
 
 
 # Skin issue information model
@@ -47,6 +80,7 @@ class SkinIssueWithProductsResponse(BaseModel):
 # Labels and thresholds for the model
 LABELS = ["acne", "pockmark", "stain", "wrinkle", "black_circle","healthy"]
 
+# Varsayılan eşikler; DECISION_CONFIG_PATH dosyası bunları çalışırken geçersiz kılar
 THRESHOLDS = {
     "acne": 0.5,
     "pockmark": 0.5,
@@ -55,6 +89,17 @@ THRESHOLDS = {
     "black_circle": 0.5
 }
 
+# Çok bölgeli analizde her etiketin olasılığı yalnızca bu bölgelerin kırpıklarından
+# toplanır ("face" tüm yüz kırpığıdır); listede olmayan etiketler tüm kırpıklardan
+LABEL_REGIONS = {
+    "acne": ["face", "forehead", "left_cheek", "right_cheek"],
+    "pockmark": ["face", "forehead", "left_cheek", "right_cheek"],
+    "stain": ["face", "forehead", "left_cheek", "right_cheek"],
+    "wrinkle": ["face", "forehead", "left_under_eye", "right_under_eye"],
+    "black_circle": ["face", "left_under_eye", "right_under_eye"],
+    "healthy": ["face"],
+}
+
 # Product recommendation mapping
 PRODUCT_KEYWORDS = {
     "acne": ["acne", "sivilce", "akne", "siyah nokta", "cilt lekesi", "blemish"],
@@ -0,0 +1,94 @@
+#backends.py
+# Model çalışma zamanı seçimi: eager fp32, dinamik int8, TorchScript ve ONNX Runtime.
+# Dışa aktarılmış varyantlar tools/export_model.py ile üretilir.
+import logging
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from inference.model import build_model
+
+BACKENDS = ("eager", "eager_int8", "torchscript", "torchscript_int8", "onnx", "onnx_int8")
+
+# Ağırlık dosyasının yanında aranan varyant uzantıları
+_VARIANT_SUFFIX = {
+    "torchscript": ".ts.pt",
+    "torchscript_int8": ".int8.ts.pt",
+    "onnx": ".onnx",
+    "onnx_int8": ".int8.onnx",
+}
+
+
+def variant_path(model_path: str, backend: str) -> str:
+    # 75epoch-convnextbase-improved.pth -> 75epoch-convnextbase-improved.int8.onnx
+    return os.path.splitext(model_path)[0] + _VARIANT_SUFFIX[backend]
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    # ConvNeXt bloklarındaki noktasal katmanlar nn.Linear olduğundan
+    # hesaplamanın büyük kısmı dinamik int8 nicemlemeden yararlanır
+    return torch.ao.quantization.quantize_dynamic(model.cpu(), {nn.Linear}, dtype=torch.qint8)
+
+
+class TorchBackend:
+    def __init__(self, module, device: torch.device, name: str):
+        self.module = module
+        self.device = device
+        self.name = name
+
+    def predict(self, batch: torch.Tensor) -> np.ndarray:
+        # [N,3,224,224] -> [N,num_labels] sigmoid olasılıkları
+        with torch.inference_mode():
+            logits = self.module(batch.to(self.device, non_blocking=True))
+            return torch.sigmoid(logits.float()).cpu().numpy()
+
+
+class OnnxBackend:
+    def __init__(self, path: str, name: str, num_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.device = torch.device("cpu")
+        self.name = name
+
+    def predict(self, batch: torch.Tensor) -> np.ndarray:
+        logits = self.session.run(None, {self.input_name: batch.cpu().numpy()})[0]
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
+def load_backend(backend: str, model_path: str, device: torch.device, num_labels: int,
+                 variant: str = "", num_threads: int = 0, mmap: bool = False):
+    """
+    backend: BACKENDS içinden biri. variant verilmezse dışa aktarılmış dosya
+    model_path'in yanında (variant_path) aranır. Nicemlenmiş ve ONNX varyantları
+    yalnızca CPU'da çalışır. mmap: eager ağırlıkları dosyadan eşlenir (build_model).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend {backend!r}, expected one of {BACKENDS}")
+    started = time.perf_counter()
+
+    if backend == "eager":
+        runtime = TorchBackend(build_model(model_path, device, num_labels, mmap=mmap), device, backend)
+    elif backend == "eager_int8":
+        cpu = torch.device("cpu")
+        runtime = TorchBackend(quantize_dynamic_int8(build_model(model_path, cpu, num_labels, mmap=mmap)), cpu, backend)
+    elif backend.startswith("torchscript"):
+        path = variant or variant_path(model_path, backend)
+        target = device if backend == "torchscript" else torch.device("cpu")
+        module = torch.jit.load(path, map_location=target)
+        module.eval()
+        runtime = TorchBackend(module, target, backend)
+    else:
+        path = variant or variant_path(model_path, backend)
+        runtime = OnnxBackend(path, backend, num_threads=num_threads)
+
+    logging.info(f"Model backend '{backend}' ready in {time.perf_counter() - started:.2f}s")
+    return runtime
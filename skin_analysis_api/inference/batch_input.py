@@ -0,0 +1,105 @@
+#batch_input.py
+# Toplu analiz girdileri: tekil görsel dosyaları ile zip/tar arşivlerini sırayla,
+# her seferinde tek görsel belleğe alınacak şekilde dolaşır. Dosya nesneleri
+# (UploadFile.file, biriktirilmiş istek gövdesi) diskte olabilir; hepsi okunmaz.
+import logging
+import mimetypes
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+
+class BatchImage(NamedTuple):
+    name: str
+    data: Optional[bytes]  # None: hata (error alanında)
+    error: Optional[str] = None
+
+
+_TAR_MAGIC_OFFSET = 257
+# Sıkıştırılmış tar akışları (tar.gz, tar.bz2, tar.xz)
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+
+def archive_kind(head: bytes) -> Optional[str]:
+    """Başlık baytlarına göre "zip", "tar" veya arşiv değilse None."""
+    if head.startswith(b"PK\x03\x04") or head.startswith(b"PK\x05\x06"):
+        return "zip"
+    if head[_TAR_MAGIC_OFFSET:_TAR_MAGIC_OFFSET + 5] == b"ustar" or head.startswith(_COMPRESSED_MAGIC):
+        return "tar"
+    return None
+
+
+def _skipped(name: str) -> bool:
+    # macOS ve gizli dosyalar arşivlerde sık görülür; sonuç satırı üretmeden atla
+    base = os.path.basename(name.rstrip("/"))
+    return not base or base.startswith(".") or name.startswith("__MACOSX/")
+
+
+def _looks_like_image(name: str) -> bool:
+    kind, _ = mimetypes.guess_type(name)
+    return kind is not None and kind.startswith("image/")
+
+
+def _read_limited(fileobj: BinaryIO, max_bytes: int) -> Optional[bytes]:
+    data = fileobj.read(max_bytes + 1)
+    return data if len(data) <= max_bytes else None
+
+
+def _member(name: str, size: int, max_bytes: int, read) -> Optional[BatchImage]:
+    if _skipped(name):
+        return None
+    if not _looks_like_image(name):
+        return BatchImage(name, None, "Desteklenmeyen dosya türü")
+    if size > max_bytes:
+        return BatchImage(name, None, f"Dosya çok büyük (en fazla {max_bytes} bayt)")
+    data = read()
+    if data is None:
+        return BatchImage(name, None, f"Dosya çok büyük (en fazla {max_bytes} bayt)")
+    return BatchImage(name, data)
+
+
+def iter_archive(fileobj: BinaryIO, kind: str, max_bytes: int) -> Iterator[BatchImage]:
+    if kind == "zip":
+        # Zip merkezi dizini sonda; dosya nesnesi aranabilir olmalı (UploadFile öyle)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                item = _member(info.filename, info.file_size, max_bytes,
+                               lambda: _read_limited(archive.open(info), max_bytes))
+                if item is not None:
+                    yield item
+        return
+    # Akış modu: üyeler sırayla okunur, arşiv hiçbir zaman tamamen açılmaz
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile():
+                continue
+            item = _member(info.name, info.size, max_bytes,
+                           lambda: _read_limited(archive.extractfile(info), max_bytes))
+            if item is not None:
+                yield item
+
+
+def iter_batch_images(sources: Iterable[Tuple[str, BinaryIO]], max_bytes: int) -> Iterator[BatchImage]:
+    """
+    sources: (ad, dosya nesnesi) çiftleri. Arşivler üyelerine açılır, diğerleri
+    tek görsel sayılır. Bozuk arşivler tek hata satırı üretir.
+    """
+    for name, fileobj in sources:
+        head = fileobj.read(_TAR_MAGIC_OFFSET + 8)
+        fileobj.seek(0)
+        kind = archive_kind(head)
+        if kind is None:
+            data = _read_limited(fileobj, max_bytes)
+            if data is None:
+                yield BatchImage(name, None, f"Dosya çok büyük (en fazla {max_bytes} bayt)")
+            else:
+                yield BatchImage(name, data)
+            continue
+        try:
+            yield from iter_archive(fileobj, kind, max_bytes)
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+            logging.warning(f"Unreadable batch archive {name!r}: {e}")
+            yield BatchImage(name, None, f"Arşiv okunamadı: {e}")
@@ -0,0 +1,201 @@
+#batcher.py
+# Eşzamanlı isteklerden gelen yüz tensörlerini tek bir ileri geçişte toplayan
+# dinamik mikro-batch motoru.
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from metrics import histogram, gauge, counter
+from inference.executor import Overloaded
+
+BATCH_SIZE = histogram(
+    "inference_batch_size", "Number of items per model forward pass",
+    labelnames=("model",), buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+QUEUE_DEPTH = histogram(
+    "inference_queue_depth", "Items waiting in the batch queue when a batch is formed",
+    labelnames=("model",), buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128),
+)
+QUEUE_WAIT = histogram(
+    "inference_queue_wait_seconds", "Time an item waits in the queue before its forward pass",
+    labelnames=("model",), buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+FORWARD_LATENCY = histogram(
+    "inference_forward_seconds", "Wall time of one batched forward pass",
+    labelnames=("model",),
+)
+QUEUE_DEPTH_NOW = gauge("inference_queue_items", "Items currently waiting in the batch queue", labelnames=("model",))
+BATCH_ERRORS = counter("inference_batch_errors_total", "Batches whose forward pass raised", labelnames=("model",))
+REJECTED = counter("inference_rejected_total", "Items rejected because the batch queue was full",
+                   labelnames=("model",))
+
+
+class _Item:
+    # Grup girdileri (infer_group) bölünmeden aynı ileri geçişe girer
+    __slots__ = ("payloads", "future", "enqueued_at", "group")
+
+    def __init__(self, payloads, future, enqueued_at, group=False):
+        self.payloads = payloads
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.group = group
+
+
+class InferenceBatcher:
+    """
+    infer() ile gelen tekil girdileri kuyrukta toplar; kuyruk max_batch_size'a
+    ulaştığında ya da ilk girdi max_wait_ms kadar beklediğinde run_batch'i
+    tek seferde çağırır ve her çağırana kendi sonucunu döner.
+
+    run_batch(list_of_payloads) -> sequence of results (aynı sırada) ayrı bir
+    iş parçacığında çalışır, böylece ileri geçiş event loop'u bloklamaz.
+    Kuyrukta max_queue girdi varken gelen istekler Overloaded ile reddedilir.
+
+    infer_group() bir isteğin birden fazla girdisini (ör. yüz bölgeleri) tek
+    girdi gibi kuyruğa koyar: grup bölünmez, diğer isteklerle aynı ileri geçişi
+    paylaşabilir; max_batch_size'tan büyükse tek başına bir geçişte çalışır.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], Sequence[Any]], max_batch_size: int = 8,
+                 max_wait_ms: float = 5.0, max_queue: int = 0, name: str = "convnext_base"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue = max_queue  # 0: sınırsız
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._carry: Optional[_Item] = None  # önceki batch'e sığmayan grup
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        QUEUE_DEPTH_NOW.set_function(self.queue_depth, model=name)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def queue_depth(self) -> int:
+        depth = self._queue.qsize() if self._queue is not None else 0
+        return depth + (1 if self._carry is not None else 0)
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-forward")
+        self._worker = asyncio.create_task(self._run(), name=f"{self.name}-batcher")
+        logging.info(f"Inference batcher started (max_batch_size={self.max_batch_size}, "
+                     f"max_wait_ms={self.max_wait * 1000:.1f})")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            pending = [self._carry] if self._carry is not None else []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for item in pending:
+                if not item.future.done():
+                    item.future.set_exception(RuntimeError("Inference batcher stopped"))
+            self._queue = None
+            self._carry = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _submit(self, payloads: List[Any], group: bool) -> Any:
+        if not self.running:
+            raise RuntimeError("Inference batcher is not running")
+        if self.max_queue and self._queue.qsize() >= self.max_queue:
+            REJECTED.inc(model=self.name)
+            raise Overloaded(f"Inference queue is full ({self._queue.qsize()} waiting)")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Item(payloads, future, time.perf_counter(), group))
+        return await future
+
+    async def infer(self, payload) -> Any:
+        return await self._submit([payload], group=False)
+
+    async def infer_group(self, payloads: Sequence[Any]) -> List[Any]:
+        # Girdilerin sonuçları aynı sırada liste olarak döner
+        if not payloads:
+            return []
+        return await self._submit(list(payloads), group=True)
+
+    async def _collect(self) -> List[_Item]:
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+        batch = [first]
+        size = len(first.payloads)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            # Zaten kuyrukta bekleyenleri beklemeden al
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            else:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if size + len(item.payloads) > self.max_batch_size:
+                # Grup bölünmez; bir sonraki batch'i o başlatır
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item.payloads)
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # İstemcisi vazgeçmiş (iptal edilmiş) girdiler için hesap yapma
+            batch = [item for item in batch if not item.future.cancelled()]
+            if not batch:
+                continue
+
+            payloads = [payload for item in batch for payload in item.payloads]
+            QUEUE_DEPTH.observe(self.queue_depth(), model=self.name)
+            BATCH_SIZE.observe(len(payloads), model=self.name)
+            started = time.perf_counter()
+            for item in batch:
+                QUEUE_WAIT.observe(started - item.enqueued_at, model=self.name)
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.run_batch, payloads
+                )
+            except asyncio.CancelledError:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(RuntimeError("Inference batcher stopped"))
+                raise
+            except Exception as e:
+                BATCH_ERRORS.inc(model=self.name)
+                logging.error(f"Batched inference error: {e}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                continue
+            finally:
+                FORWARD_LATENCY.observe(time.perf_counter() - started, model=self.name)
+
+            offset = 0
+            for item in batch:
+                n = len(item.payloads)
+                if not item.future.done():
+                    item.future.set_result(list(results[offset:offset + n]) if item.group else results[offset])
+                offset += n
@@ -0,0 +1,137 @@
+#decision.py
+# Model olasılıklarından etiket kararına geçen katman: etiket başına kalibrasyon
+# (Platt / sıcaklık) ve eşik vektörü tüm batch'e tek vektörel işlemle uygulanır.
+# Eşikler ve kalibrasyon JSON dosyasından okunur; dosya değişince süreç yeniden
+# başlatılmadan (model yeniden yüklenmeden) yeni değerler devreye girer:
+#
+#   {
+#     "thresholds": {"stain": 0.92, "wrinkle": 0.96},
+#     "calibration": {"stain": {"a": 1.3, "b": -0.4}, "wrinkle": {"temperature": 1.5}}
+#   }
+#
+# Dosyada olmayan etiketler varsayılan eşiği ve kalibrasyonsuz olasılığı kullanır.
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import counter
+
+RELOADS = counter("decision_config_reloads_total", "Decision config reload attempts by result (ok, error)",
+                  labelnames=("result",))
+
+_EPS = 1e-6
+
+
+class DecisionParams(NamedTuple):
+    thresholds: np.ndarray  # [L] float64
+    scale: np.ndarray       # [L] Platt a (sıcaklık için 1/T)
+    bias: np.ndarray        # [L] Platt b
+    calibrated: bool        # en az bir etiket kalibre ediliyor mu
+    source: str             # "defaults" ya da dosya yolu
+
+
+class DecisionLayer:
+    """
+    decide(probs[N, L]) -> (karar maskesi[N, L], kalibre olasılıklar[N, L]).
+    Kalibrasyon logit uzayında: p' = sigmoid(a * logit(p) + b).
+    Parametreler değişmez bir DecisionParams olarak tutulur; yeniden yükleme
+    yalnızca referansı değiştirir, böylece eşzamanlı kararlar kilit almaz.
+    """
+
+    def __init__(self, labels: Sequence[str], default_thresholds: Dict[str, float], path: str = "",
+                 reload_seconds: float = 5.0, default_threshold: float = 0.5):
+        self.labels = list(labels)
+        self.default_thresholds = dict(default_thresholds)
+        self.default_threshold = default_threshold
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime = None
+        self.params = self._build({})
+        self._maybe_reload(force=True)
+
+    def _build(self, data: dict, source: str = "defaults") -> DecisionParams:
+        thresholds = {**self.default_thresholds, **(data.get("thresholds") or {})}
+        calibration = data.get("calibration") or {}
+        unknown = (set(thresholds) | set(calibration)) - set(self.labels)
+        if unknown:
+            raise ValueError(f"unknown labels {sorted(unknown)}")
+        scale, bias = np.ones(len(self.labels)), np.zeros(len(self.labels))
+        for j, label in enumerate(self.labels):
+            params = calibration.get(label)
+            if not params:
+                continue
+            if "temperature" in params:
+                temperature = float(params["temperature"])
+                if temperature <= 0:
+                    raise ValueError(f"temperature for {label} must be > 0")
+                scale[j] = 1.0 / temperature
+            else:
+                scale[j], bias[j] = float(params.get("a", 1.0)), float(params.get("b", 0.0))
+        vector = np.array([float(thresholds.get(label, self.default_threshold)) for label in self.labels])
+        if ((vector < 0) | (vector > 1)).any():
+            raise ValueError("thresholds must be within [0, 1]")
+        return DecisionParams(
+            thresholds=vector,  # float64: eşik karşılaştırması eski Python float davranışıyla aynı
+            scale=scale.astype(np.float32),
+            bias=bias.astype(np.float32),
+            calibrated=bool((scale != 1.0).any() or (bias != 0.0).any()),
+            source=source,
+        )
+
+    def _maybe_reload(self, force: bool = False):
+        if not self.path:
+            return
+        now = time.time()
+        if not force and now - self._checked_at < self.reload_seconds:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                if self._mtime is not None:
+                    # Dosya silindiyse varsayılanlara dön
+                    logging.warning(f"Decision config removed, using default thresholds: {self.path}")
+                    self.params, self._mtime = self._build({}), None
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    params = self._build(json.load(f), source=self.path)
+            except Exception as e:
+                # Hatalı dosya önceki değerleri bozmaz; düzeltilince tekrar denenir
+                RELOADS.inc(result="error")
+                logging.error(f"Decision config load error ({self.path}): {e}")
+                self._mtime = mtime
+                return
+            self.params, self._mtime = params, mtime
+            RELOADS.inc(result="ok")
+            logging.info(f"Decision config loaded from {self.path}: "
+                         f"thresholds={dict(zip(self.labels, params.thresholds.round(4).tolist()))}, "
+                         f"calibrated={params.calibrated}")
+
+    def calibrate(self, probs: np.ndarray, params: Optional[DecisionParams] = None) -> np.ndarray:
+        params = params or self.params
+        if not params.calibrated:
+            return probs
+        p = np.clip(probs, _EPS, 1.0 - _EPS)
+        logits = np.log(p) - np.log1p(-p)
+        return 1.0 / (1.0 + np.exp(-(params.scale * logits + params.bias)))
+
+    def decide(self, probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        self._maybe_reload()
+        params = self.params
+        probs = np.asarray(probs, dtype=np.float32).reshape(-1, len(self.labels))
+        calibrated = self.calibrate(probs, params)
+        return calibrated > params.thresholds, calibrated
+
+    def labels_for(self, mask_row: np.ndarray) -> List[str]:
+        return [self.labels[j] for j in np.flatnonzero(mask_row)]
@@ -0,0 +1,85 @@
+#executor.py
+# CPU-yoğun işleri (OpenCV, torch) event loop dışında çalıştıran sınırlı kuyruklu yürütücü.
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from metrics import gauge, counter
+
+PENDING = gauge("executor_pending_tasks", "Tasks queued or running in the CPU executor", labelnames=("mode",))
+REJECTED = counter("executor_rejected_total", "Tasks rejected because the executor queue was full",
+                   labelnames=("mode",))
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+class Overloaded(Exception):
+    """Kuyruk dolu; istek 503 ile reddedilmeli."""
+
+
+class CpuExecutor:
+    """
+    mode="thread": GIL'i bırakan OpenCV/torch çağrıları için iş parçacığı havuzu.
+    mode="process": her süreçte initializer ile modeli önceden yükleyen süreç havuzu.
+
+    Aynı anda en fazla max_workers iş çalışır ve max_queue iş bekler; fazlası
+    Overloaded ile hemen reddedilir, böylece aşırı yükte gecikme sınırlı kalır.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 4, max_queue: int = 32,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}, expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.initializer = initializer
+        self.initargs = initargs
+        self._pool = None
+        self._pending = 0
+        PENDING.set_function(lambda: self._pending, mode=mode)
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.mode == "process":
+            # Torch iş parçacıkları olan bir süreci fork'lamamak için spawn kullan
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+                initargs=self.initargs,
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="cpu-worker",
+                initializer=self.initializer,
+                initargs=self.initargs,
+            )
+        logging.info(f"CPU executor started (mode={self.mode}, workers={self.max_workers}, "
+                     f"max_queue={self.max_queue})")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable, *args):
+        if self._pool is None:
+            raise RuntimeError("CPU executor is not started")
+        # Sayaç yalnızca event loop üzerinden değiştiği için kilit gerekmez
+        if self._pending >= self.capacity:
+            REJECTED.inc(mode=self.mode)
+            raise Overloaded(f"CPU executor queue is full ({self._pending} pending)")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._pending -= 1
@@ -0,0 +1,93 @@
+#face_detector.py
+# Haar cascade bir kez yüklenir; CascadeClassifier iş parçacıkları arasında
+# güvenle paylaşılamadığı için her iş parçacığına ayrı bir örnek verilir.
+import logging
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+DEFAULT_CASCADE = "haarcascade_frontalface_default.xml"
+
+
+class FaceDetector:
+    def __init__(self, cascade_path: Optional[str] = None, scale_factor: float = 1.1,
+                 min_neighbors: int = 4, min_size: Tuple[int, int] = (60, 60)):
+        self.cascade_path = cascade_path or cv2.data.haarcascades + DEFAULT_CASCADE
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = tuple(min_size)
+        self._xml: Optional[str] = None
+        self._load_lock = threading.Lock()
+        self._local = threading.local()
+        self.instances = 0
+
+    def load(self):
+        # XML dosyasını diskten yalnızca bir kez oku; örnekler bellekten kurulur
+        with self._load_lock:
+            if self._xml is not None:
+                return
+            with open(self.cascade_path, "r", encoding="utf-8") as f:
+                xml = f.read()
+            self._xml = xml
+        # Dosyanın geçerli olduğunu başlangıçta doğrula
+        self._classifier()
+        logging.info(f"Face detector loaded ({self.cascade_path}, scaleFactor={self.scale_factor}, "
+                     f"minNeighbors={self.min_neighbors}, minSize={self.min_size})")
+
+    def _new_classifier(self) -> cv2.CascadeClassifier:
+        classifier = cv2.CascadeClassifier()
+        storage = cv2.FileStorage(self._xml, cv2.FILE_STORAGE_READ | cv2.FILE_STORAGE_MEMORY)
+        try:
+            loaded = classifier.read(storage.getFirstTopLevelNode())
+        finally:
+            storage.release()
+        if not loaded or classifier.empty():
+            # Eski format cascade'ler bellekten okunamaz, dosyadan kur
+            classifier = cv2.CascadeClassifier(self.cascade_path)
+        if classifier.empty():
+            raise RuntimeError(f"Could not load face cascade: {self.cascade_path}")
+        return classifier
+
+    def _classifier(self) -> cv2.CascadeClassifier:
+        classifier = getattr(self._local, "classifier", None)
+        if classifier is None:
+            if self._xml is None:
+                self.load()
+            classifier = self._new_classifier()
+            self._local.classifier = classifier
+            with self._load_lock:
+                self.instances += 1
+        return classifier
+
+    def detect(self, gray: np.ndarray, min_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        # Gri (ve histogramı eşitlenmiş) görüntüde yüz kutularını (x, y, w, h) döndür
+        faces = self._classifier().detectMultiScale(
+            image=gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=tuple(min_size or self.min_size),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        return np.asarray(faces).reshape(-1, 4)
+
+
+_default_detector: Optional[FaceDetector] = None
+_default_lock = threading.Lock()
+
+
+def get_face_detector() -> FaceDetector:
+    global _default_detector
+    if _default_detector is None:
+        with _default_lock:
+            if _default_detector is None:
+                _default_detector = FaceDetector(
+                    cascade_path=config.FACE_CASCADE_PATH or None,
+                    scale_factor=config.FACE_SCALE_FACTOR,
+                    min_neighbors=config.FACE_MIN_NEIGHBORS,
+                    min_size=(config.FACE_MIN_SIZE, config.FACE_MIN_SIZE),
+                )
+    return _default_detector
@@ -0,0 +1,123 @@
+#image_header.py
+# Görseli çözmeden önce başlığından biçim ve boyut bilgisini okur.
+import struct
+from typing import NamedTuple, Optional
+
+
+class ImageInfo(NamedTuple):
+    format: str
+    width: int
+    height: int
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# SOF işaretçileri (DHT=C4, JPG=C8, DAC=CC hariç)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# iPhone fotoğrafları: ISO BMFF "ftyp" kutusundaki HEIF/HEIC markaları
+_HEIF_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1", b"avif"}
+# Boyut bilgisi meta > iprp > ipco > ispe yolunda; meta tam kutu (4 bayt sürüm/bayrak)
+_HEIF_CONTAINERS = {b"meta": 4, b"iprp": 0, b"ipco": 0}
+
+
+def _jpeg_info(data) -> Optional[ImageInfo]:
+    i, n = 2, len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # dolgu baytı
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        (length,) = struct.unpack(">H", data[i + 2:i + 4])
+        if marker in _JPEG_SOF:
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return ImageInfo("jpeg", width, height)
+        if marker == 0xDA:  # tarama verisi başladı, SOF bulunamadı
+            return None
+        i += 2 + length
+    return None
+
+
+def _boxes(data, start: int, end: int):
+    # ISO BMFF kutuları: (tür, içerik başı, kutu sonu); yarım kalan kutuda durur
+    i = start
+    while i + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[i:i + 8])
+        header = 8
+        if size == 1:
+            if i + 16 > end:
+                return
+            (size,) = struct.unpack(">Q", data[i + 8:i + 16])
+            header = 16
+        elif size == 0:
+            size = end - i
+        if size < header:
+            return
+        yield bytes(kind), i + header, min(i + size, end)
+        i += size
+
+
+def _heif_info(data) -> Optional[ImageInfo]:
+    # Birincil görüntünün yanında küçük resim/karo ispe'leri de olabilir; piksel sınırı
+    # için güvenli taraf olan en büyüğü döner
+    best = None
+
+    def walk(start, end):
+        nonlocal best
+        for kind, body, box_end in _boxes(data, start, end):
+            if kind in _HEIF_CONTAINERS:
+                walk(body + _HEIF_CONTAINERS[kind], box_end)
+            elif kind == b"ispe" and body + 12 <= box_end:
+                width, height = struct.unpack(">II", data[body + 4:body + 12])
+                if best is None or width * height > best[0] * best[1]:
+                    best = (width, height)
+
+    walk(0, len(data))
+    return ImageInfo("heic", *best) if best else None
+
+
+def _webp_info(head: bytes) -> Optional[ImageInfo]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return ImageInfo("webp", width, height)
+    return None
+
+
+def read_image_info(data) -> Optional[ImageInfo]:
+    """
+    Desteklenen biçimler (JPEG, PNG, HEIC/HEIF, WebP) için (format, width, height);
+    tanınmazsa ya da boyut bilgisi henüz okunan baytlarda değilse None.
+    """
+    head = bytes(data[:32])
+    if head.startswith(b"\xff\xd8"):
+        return _jpeg_info(memoryview(data))
+    if head.startswith(_PNG_SIGNATURE) and head[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", head[16:24])
+        return ImageInfo("png", width, height)
+    if head[4:8] == b"ftyp" and is_heif(head):
+        return _heif_info(memoryview(data))
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP" and len(head) >= 30:
+        return _webp_info(head)
+    return None
+
+
+def is_heif(head: bytes) -> bool:
+    """ftyp kutusunun ana ya da uyumlu markaları HEIF ailesinden mi."""
+    if head[4:8] != b"ftyp":
+        return False
+    (size,) = struct.unpack(">I", head[:4])
+    brands = [head[8:12]] + [head[i:i + 4] for i in range(16, min(size, len(head)) - 3, 4)]
+    return any(bytes(brand) in _HEIF_BRANDS for brand in brands)
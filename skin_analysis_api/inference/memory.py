@@ -0,0 +1,52 @@
+#memory.py
+# Süreç bellek ölçümleri (Linux /proc). RssFile, mmap ile açılmış ağırlık
+# dosyasının sayfa önbelleğinden paylaşılan kısmıdır; Pss paylaşılan sayfaları
+# süreç sayısına böler, bu yüzden N worker'ın toplam Pss'i gerçek bellek
+# kullanımıdır. /proc olmayan sistemlerde yalnızca ru_maxrss döner.
+import os
+from typing import Dict, Optional
+
+# /proc/self/status ve smaps_rollup alanları -> rapor anahtarları
+_STATUS_FIELDS = {"VmRSS": "rss", "RssAnon": "rss_anon", "RssFile": "rss_file", "RssShmem": "rss_shmem"}
+_ROLLUP_FIELDS = {"Pss": "pss"}
+
+
+def _read_kb_fields(path: str, fields: Dict[str, str]) -> Dict[str, int]:
+    values = {}
+    try:
+        with open(path, encoding="ascii") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                key = fields.get(name)
+                if key is not None:
+                    values[key] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return values
+
+
+def process_memory() -> Dict[str, int]:
+    """Bu sürecin bellek kullanımı (bayt): rss, rss_anon, rss_file, rss_shmem, pss."""
+    values = _read_kb_fields("/proc/self/status", _STATUS_FIELDS)
+    values.update(_read_kb_fields("/proc/self/smaps_rollup", _ROLLUP_FIELDS))
+    if not values:
+        try:
+            import resource
+
+            # Linux dışı: yalnızca tepe değer (macOS bayt, diğerleri KB döndürür)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            values["rss"] = peak if os.uname().sysname == "Darwin" else peak * 1024
+        except (ImportError, AttributeError):
+            pass
+    return values
+
+
+def format_memory(values: Dict[str, int], previous: Optional[Dict[str, int]] = None) -> str:
+    # "rss=812.4MB (+356.1MB) rss_anon=..." biçiminde log satırı
+    parts = []
+    for key, value in values.items():
+        text = f"{key}={value / 2 ** 20:.1f}MB"
+        if previous and key in previous:
+            text += f" ({(value - previous[key]) / 2 ** 20:+.1f}MB)"
+        parts.append(text)
+    return " ".join(parts)
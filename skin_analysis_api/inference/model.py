@@ -0,0 +1,51 @@
+#model.py
+import logging
+import time
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from inference.memory import format_memory, process_memory
+
+
+def _architecture(num_labels: int) -> nn.Module:
+    # Eğitimdeki ConvNeXt-Base mimarisi
+    model = models.convnext_base(weights=None)
+    model.classifier[2] = nn.Linear(model.classifier[2].in_features, num_labels)
+    return model
+
+
+def _build_mmap(model_path: str, num_labels: int) -> nn.Module:
+    # Parametreler kopyalanmaz, salt okunur eşlenen dosyayı gösterir (assign=True):
+    # aynı dosyayı açan tüm worker'lar tek fiziksel kopyayı sayfa önbelleğinden paylaşır.
+    # Mimari meta cihazında kurulur; rastgele başlangıç ağırlıkları hiç ayrılmaz.
+    state = torch.load(model_path, map_location="cpu", mmap=True, weights_only=True)
+    with torch.device("meta"):
+        model = _architecture(num_labels)
+    model.load_state_dict(state, assign=True)
+    return model
+
+
+def build_model(model_path: str, device: torch.device, num_labels: int, mmap: bool = False) -> nn.Module:
+    """
+    mmap=True yalnızca CPU'da anlamlıdır (GPU'ya kopyalanan ağırlıklar paylaşılamaz);
+    eski (zip olmayan) biçimdeki dosyalarda normal yüklemeye düşer.
+    """
+    started = time.perf_counter()
+    before = process_memory()
+    model = None
+    if mmap and device.type == "cpu":
+        try:
+            model = _build_mmap(model_path, num_labels)
+        except RuntimeError as e:
+            logging.warning(f"mmap weight loading unavailable for {model_path}, loading a private copy: {e}")
+    if model is None:
+        model = _architecture(num_labels)
+        model.load_state_dict(torch.load(model_path, map_location=device))
+        model.to(device)
+    model.eval()
+    logging.info(f"Model loaded from {model_path} in {time.perf_counter() - started:.2f}s "
+                 f"(mmap={mmap and device.type == 'cpu'}, {format_memory(process_memory(), before)})")
+    return model
+
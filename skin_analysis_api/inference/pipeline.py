@@ -0,0 +1,185 @@
+#pipeline.py
+# Görüntü çözme, yüz bulma ve model girdisi hazırlama adımları.
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+from inference.face_detector import get_face_detector
+from inference.image_header import read_image_info
+from inference.regions import ANALYSIS_MODES, FACE_REGIONS
+from metrics import histogram, time_stage
+
+DECODE_LATENCY = histogram("image_decode_seconds", "Time spent decoding one uploaded image (all decode passes)",
+                           labelnames=("format",))
+
+# cv2.imdecode'un JPEG için DCT düzeyinde küçülterek çözme bayrakları
+_REDUCED_COLOR = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                  4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+_REDUCED_GRAYSCALE = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+                      4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+
+# Ön işleme kırpığın kısa kenarını 256 piksele indirir; daha fazlasını çözmeye gerek yok
+CROP_MIN_SIDE = 256
+
+
+def _pick_factor(length: float, target: float) -> int:
+    # length / factor >= target olacak en büyük ölçek (8, 4, 2 veya 1)
+    for factor in (8, 4, 2):
+        if length / factor >= target:
+            return factor
+    return 1
+
+
+def _decode_heif(image_bytes) -> Optional[np.ndarray]:
+    # İsteğe bağlı bağımlılık; yoksa yükleme katmanı HEIC'i zaten 415 ile reddeder
+    from pillow_heif import open_heif
+
+    heif = open_heif(bytes(image_bytes), convert_hdr_to_8bit=True)
+    pixels = np.asarray(heif)
+    return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR if heif.mode == "RGBA" else cv2.COLOR_RGB2BGR)
+
+
+def _decode_full(image_bytes, nparr: np.ndarray, info) -> Optional[np.ndarray]:
+    if info is not None and info.format == "heic":
+        return _decode_heif(image_bytes)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+@time_stage("face_detect")
+def _detect_faces(gray: np.ndarray, scale: float, mode: str = "face", max_faces: int = 1) -> np.ndarray:
+    # Küçültülmüş görüntüde minSize'ı da aynı oranda küçült (cascade penceresi 24 px)
+    detector = get_face_detector()
+    min_side = max(24, int(round(detector.min_size[0] / scale)))
+    faces = detector.detect(cv2.equalizeHist(gray), min_size=(min_side, min_side))
+    if mode == "face" or len(faces) <= 1:
+        return faces[:1]
+    # Birden fazla yüzde büyükten küçüğe; en fazla max_faces
+    order = np.argsort(-(faces[:, 2] * faces[:, 3]), kind="stable")
+    return faces[order[:max(1, max_faces)]]
+
+
+def _crop_boxes(faces: np.ndarray, mode: str) -> List[Tuple[str, Tuple[float, float, float, float]]]:
+    # Algılama görüntüsü koordinatlarında adlandırılmış (x0, y0, x1, y1) kutular
+    boxes = []
+    for index, (x, y, w, h) in enumerate(faces):
+        boxes.append((f"face{index}", (x, y, x + w, y + h)))
+        if mode == "regions":
+            for name, (fx0, fy0, fx1, fy1) in FACE_REGIONS.items():
+                boxes.append((f"face{index}:{name}", (x + fx0 * w, y + fy0 * h, x + fx1 * w, y + fy1 * h)))
+    return boxes
+
+
+def _cut(img: np.ndarray, boxes, sx: float, sy: float) -> Optional[List[Tuple[str, np.ndarray]]]:
+    crops = []
+    for name, (x0, y0, x1, y1) in boxes:
+        crop = img[int(round(y0 * sy)):int(round(y1 * sy)), int(round(x0 * sx)):int(round(x1 * sx))]
+        if crop.size:
+            crops.append((name, crop))
+    return crops or None
+
+
+def extract_crops(image_bytes: bytes, mode: str = "face",
+                  max_faces: int = 1) -> Optional[List[Tuple[str, np.ndarray]]]:
+    """
+    Yüzleri küçük çözünürlükte bulup mod'a göre kırpıkları yalnızca ön işlemenin
+    ihtiyaç duyduğu kadar çözünürlükte keser. (ad, BGR kırpık) listesi ya da
+    yüz/görsel yoksa None döner. Adlar: "face0", "face1", "face0:forehead", ...
+    """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode {mode!r}, expected one of {ANALYSIS_MODES}")
+    try:
+        # bytes ya da yükleme tamponu (bytearray): kopyalanmadan çözücüye verilir
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        info = read_image_info(image_bytes)
+        if info is None or info.format != "jpeg":
+            # Küçültülmüş çözme yalnızca JPEG'de hızlı; diğerlerini bir kez çöz
+            started = time.perf_counter()
+            img = _decode_full(image_bytes, nparr, info)
+            DECODE_LATENCY.observe(time.perf_counter() - started, format=info.format if info else "unknown")
+            if img is None:
+                logging.error("Invalid image format")
+                return None
+            height, width = img.shape[:2]
+            scale = max(1.0, max(width, height) / config.FACE_DETECT_MAX_SIDE)
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            if scale > 1.0:
+                gray = cv2.resize(gray, (int(round(width / scale)), int(round(height / scale))),
+                                  interpolation=cv2.INTER_AREA)
+            faces = _detect_faces(gray, scale, mode, max_faces)
+            if len(faces) == 0:
+                logging.warning("No face detected.")
+                return None
+            return _cut(img, _crop_boxes(faces, mode), scale, scale)
+
+        # 1) Algılama için küçük gri görüntü
+        detect_factor = _pick_factor(max(info.width, info.height), config.FACE_DETECT_MAX_SIDE)
+        started = time.perf_counter()
+        gray = cv2.imdecode(nparr, _REDUCED_GRAYSCALE[detect_factor])
+        decode_seconds = time.perf_counter() - started
+        if gray is None:
+            logging.error("Invalid image format")
+            return None
+        faces = _detect_faces(gray, detect_factor, mode, max_faces)
+        if len(faces) == 0:
+            DECODE_LATENCY.observe(decode_seconds, format="jpeg")
+            logging.warning("No face detected.")
+            return None
+
+        # 2) En küçük kırpık için yeterli en küçük çözme ölçeğini seç. EXIF yönü her
+        # iki çözmede de uygulandığından kutular gerçek boyut oranlarıyla taşınır.
+        boxes = _crop_boxes(faces, mode)
+        small_h, small_w = gray.shape[:2]
+        smallest_side = min(min(x1 - x0, y1 - y0) for _, (x0, y0, x1, y1) in boxes) * detect_factor
+        crop_factor = _pick_factor(smallest_side, CROP_MIN_SIDE)
+
+        started = time.perf_counter()
+        img = cv2.imdecode(nparr, _REDUCED_COLOR[crop_factor])
+        DECODE_LATENCY.observe(decode_seconds + time.perf_counter() - started, format="jpeg")
+        if img is None:
+            logging.error("Invalid image format")
+            return None
+        return _cut(img, boxes, img.shape[1] / small_w, img.shape[0] / small_h)
+
+    except Exception as e:
+        logging.error(f"Face extraction error: {str(e)}")
+        return None
+
+
+def extract_face_region(image_bytes: bytes) -> Optional[np.ndarray]:
+    # İlk algılanan yüzün BGR kırpığı; yüz/görsel yoksa None
+    crops = extract_crops(image_bytes, "face")
+    return crops[0][1] if crops else None
+
+
+def dhash(crop: np.ndarray) -> int:
+    # 64 bitlik fark karması: yeniden kodlama/küçük ölçek farkları aynı değeri verir
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+# Algısal önbellek isabetlerini doğrulayan küçük resimlerin kenarı
+THUMBNAIL_SIDE = 16
+
+
+def thumbnail(crop: np.ndarray) -> np.ndarray:
+    # dHash adayını doğrulamak için gri, alan ortalamalı THUMBNAIL_SIDE x THUMBNAIL_SIDE kopya
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return cv2.resize(gray, (THUMBNAIL_SIDE, THUMBNAIL_SIDE), interpolation=cv2.INTER_AREA)
+
+
+def extract_crops_hashed(image_bytes: bytes, mode: str = "face", max_faces: int = 1):
+    """
+    extract_crops + kırpıkların algısal karması ("ad=dhash,...") ve küçük
+    resimleri ([n, 16, 16] uint8); yüz yoksa None.
+    """
+    crops = extract_crops(image_bytes, mode, max_faces)
+    if crops is None:
+        return None
+    signature = ",".join(f"{name}={dhash(crop):016x}" for name, crop in crops)
+    return crops, signature, np.stack([thumbnail(crop) for _, crop in crops])
@@ -0,0 +1,103 @@
+#preprocess.py
+# OpenCV BGR yüz kırpığından doğrudan normalize edilmiş 3x224x224 tensöre
+# PIL'e uğramadan dönüşüm. Eğitim (skin_analysis_model.py) ve servis aynı
+# fonksiyonu kullanır; böylece iki taraftaki ön işleme birbirinden ayrışmaz.
+#
+# Eşdeğeri: Resize(256) -> CenterCrop(224) -> ToTensor() -> Normalize(MEAN, STD)
+from typing import List, Optional
+
+import cv2
+import numpy as np
+import torch
+
+RESIZE_SIDE = 256
+CROP_SIZE = 224
+MEAN = (0.485, 0.456, 0.406)
+STD = (0.229, 0.224, 0.225)
+
+# (x / 255 - mean) / std  ==  x * scale - shift  (RGB sırasıyla)
+_SCALE = torch.tensor([1.0 / (255.0 * s) for s in STD], dtype=torch.float32).view(3, 1, 1)
+_SHIFT = torch.tensor([m / s for m, s in zip(MEAN, STD)], dtype=torch.float32).view(3, 1, 1)
+
+
+def _triangle_kernel(scale: float) -> np.ndarray:
+    # PIL/torchvision antialias'lı bilinear küçültmenin kullandığı üçgen filtre (yarıçap = ölçek)
+    radius = int(np.ceil(scale))
+    taps = np.maximum(0.0, 1.0 - np.abs(np.arange(-radius, radius + 1)) / scale).astype(np.float32)
+    return taps / taps.sum()
+
+
+def _resized_center_crop(img: np.ndarray) -> np.ndarray:
+    """
+    Resize(256) + CenterCrop(224) sonucunu, tüm görüntüyü yeniden boyutlandırmadan
+    yalnızca kırpığa düşen kaynak bölgeden tek bir afin örneklemeyle üretir.
+    """
+    h, w = img.shape[:2]
+    # torchvision Resize(256) ile aynı çıktı boyutu: kısa kenar 256, uzun kenar int(256 * uzun / kısa)
+    if w <= h:
+        new_w, new_h = RESIZE_SIDE, int(RESIZE_SIDE * h / w)
+    else:
+        new_w, new_h = int(RESIZE_SIDE * w / h), RESIZE_SIDE
+    top = int(round((new_h - CROP_SIZE) / 2.0))
+    left = int(round((new_w - CROP_SIZE) / 2.0))
+    sx, sy = w / new_w, h / new_h
+
+    # Kırpığın kaynak koordinatları (piksel merkezleri hizalı, cv2.resize/PIL ile aynı eşleme)
+    x0, y0 = (left + 0.5) * sx - 0.5, (top + 0.5) * sy - 0.5
+    x1, y1 = x0 + (CROP_SIZE - 1) * sx, y0 + (CROP_SIZE - 1) * sy
+    downscale = min(h, w) > RESIZE_SIDE
+    pad_x = int(np.ceil(sx)) + 1 if downscale else 1
+    pad_y = int(np.ceil(sy)) + 1 if downscale else 1
+    rx0, ry0 = max(0, int(np.floor(x0)) - pad_x), max(0, int(np.floor(y0)) - pad_y)
+    rx1, ry1 = min(w, int(np.ceil(x1)) + pad_x + 1), min(h, int(np.ceil(y1)) + pad_y + 1)
+    region = img[ry0:ry1, rx0:rx1]
+
+    if downscale:
+        # Küçültmede önce üçgen filtreyle yumuşat, sonra bilinear örnekle; PIL'in
+        # antialias'lı sonucuna INTER_AREA'dan çok daha yakındır
+        region = cv2.sepFilter2D(region, -1, _triangle_kernel(sx), _triangle_kernel(sy),
+                                 borderType=cv2.BORDER_REPLICATE)
+    matrix = np.array([[sx, 0.0, x0 - rx0], [0.0, sy, y0 - ry0]], dtype=np.float64)
+    return cv2.warpAffine(region, matrix, (CROP_SIZE, CROP_SIZE),
+                          flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+
+
+def preprocess_into(face_bgr: np.ndarray, out: torch.Tensor) -> torch.Tensor:
+    """face_bgr (HxWx3 uint8) kırpığını out'a ([3,224,224] float32) normalize ederek yazar."""
+    patch = torch.from_numpy(_resized_center_crop(face_bgr))
+    # BGR -> RGB ve HWC -> CHW aynı kopyada; ara float görüntü oluşmaz
+    for channel in range(3):
+        out[channel].copy_(patch[:, :, 2 - channel])
+    out.mul_(_SCALE).sub_(_SHIFT)
+    return out
+
+
+def preprocess_face(face_bgr: np.ndarray) -> torch.Tensor:
+    return preprocess_into(face_bgr, torch.empty((3, CROP_SIZE, CROP_SIZE), dtype=torch.float32))
+
+
+class BatchBuffer:
+    """
+    Önceden ayrılmış (CUDA varsa pinned) [N,3,224,224] batch tamponu. Tek bir
+    ileri geçiş iş parçacığından kullanılmalıdır; fill() her çağrıda aynı belleği yazar.
+    """
+
+    def __init__(self, capacity: int, pin_memory: bool = False):
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._buffer: Optional[torch.Tensor] = None
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int):
+        self._buffer = torch.empty((capacity, 3, CROP_SIZE, CROP_SIZE), dtype=torch.float32,
+                                   pin_memory=self.pin_memory)
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.shape[0]
+
+    def fill(self, faces: List[np.ndarray]) -> torch.Tensor:
+        if len(faces) > self.capacity:
+            self._allocate(len(faces))
+        for i, face in enumerate(faces):
+            preprocess_into(face, self._buffer[i])
+        return self._buffer[:len(faces)]
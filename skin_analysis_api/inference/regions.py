@@ -0,0 +1,45 @@
+#regions.py
+# Analiz modları, yüz alt bölgeleri ve kırpık olasılıklarının etiket başına
+# birleştirilmesi. Yalnızca numpy kullanır; API süreci model yüklenmeden de içe aktarabilir.
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Analiz modları: face (ilk yüz), faces (tüm yüzler), regions (her yüz + alt bölgeleri)
+ANALYSIS_MODES = ("face", "faces", "regions")
+
+# Yüz kutusuna göre alt bölgeler (x0, y0, x1, y1 oranları). Haar kutusu alnın alt
+# kısmından çeneye uzanır; göz altı ve gözenek gibi küçük bulgular tüm yüzün
+# 224 piksellik kırpığında kaybolduğu için ayrıca kırpılır.
+FACE_REGIONS = {
+    "forehead": (0.20, 0.00, 0.80, 0.22),
+    "left_under_eye": (0.12, 0.40, 0.46, 0.58),
+    "right_under_eye": (0.54, 0.40, 0.88, 0.58),
+    "left_cheek": (0.08, 0.52, 0.42, 0.85),
+    "right_cheek": (0.58, 0.52, 0.92, 0.85),
+}
+
+
+def region_name(crop_name: str) -> str:
+    # "face0" -> "face", "face1:left_cheek" -> "left_cheek"
+    return crop_name.split(":", 1)[1] if ":" in crop_name else "face"
+
+
+def aggregate_probabilities(names: Sequence[str], probs: np.ndarray, labels: Sequence[str],
+                            label_regions: Dict[str, Sequence[str]], method: str = "max") -> np.ndarray:
+    """
+    Kırpık başına olasılıkları ([n_crops, n_labels]) etiket başına tek değere indirir.
+    Her etiket yalnızca label_regions'ta ilgili olduğu bölgelerden (tanımsızsa
+    hepsinden) max ya da mean ile toplanır.
+    """
+    probs = np.asarray(probs, dtype=np.float32).reshape(len(names), len(labels))
+    if len(names) == 1:
+        return probs[0]
+    regions = np.array([region_name(name) for name in names], dtype=object)
+    result = np.empty(len(labels), dtype=np.float32)
+    for j, label in enumerate(labels):
+        relevant = label_regions.get(label)
+        mask = np.isin(regions, list(relevant)) if relevant else np.ones(len(names), dtype=bool)
+        column = probs[mask, j] if mask.any() else probs[:, j]
+        result[j] = column.mean() if method == "mean" else column.max()
+    return result
@@ -0,0 +1,225 @@
+#runtime.py
+# Model yaşam döngüsü: ağırlıkların arka planda yüklenmesi, ısınma geçişleri ve
+# hazır olma durumu. torch/torchvision/cv2 yalnızca yükleme sırasında (event loop
+# dışında) içe aktarılır; API süreci anında ayağa kalkar ve /healthz, /readyz ile
+# model gerektirmeyen uç noktalar yükleme sürerken de yanıt verir.
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from inference.batcher import InferenceBatcher
+from inference.executor import CpuExecutor
+from inference.memory import format_memory, process_memory
+from metrics import gauge, time_stage
+
+MODEL_READY = gauge("model_ready", "1 when the model is loaded and warmed up, 0 otherwise")
+MODEL_LOAD_SECONDS = gauge("model_load_seconds", "Time spent loading the model weights")
+MODEL_WARMUP_SECONDS = gauge("model_warmup_seconds", "Time spent in warmup forward passes")
+PROCESS_MEMORY = gauge("process_memory_bytes", "Memory of this API process by kind (rss, rss_anon, rss_file, pss)",
+                       labelnames=("kind",))
+for _kind in ("rss", "rss_anon", "rss_file", "pss"):
+    PROCESS_MEMORY.set_function(lambda kind=_kind: process_memory().get(kind, 0), kind=_kind)
+
+# starting -> loading -> warming -> ready; hata olursa failed
+STATES = ("starting", "loading", "warming", "ready", "failed")
+
+# process modunda ısınma raporlarının tüm alt süreçleri beklediği en uzun süre
+WORKER_REPORT_TIMEOUT = 600.0
+
+
+class ModelRuntime:
+    """
+    start() yürütücüyü ve yükleme görevini başlatır, yüklemeyi beklemez.
+    thread modunda model bu süreçte yüklenir ve istekler InferenceBatcher ile
+    toplanır; process modunda her alt süreç modeli kendisi yükler ve ısınır
+    (worker.init_worker), ardından her süreç ısınma süresini ve belleğini bir kez raporlar.
+    """
+
+    def __init__(self, model_path: str, num_labels: int, backend: str = "eager", variant: str = "",
+                 executor_mode: str = "thread", workers: int = 4, max_queue: int = 32, torch_threads: int = 1,
+                 batch_max_size: int = 8, batch_max_wait_ms: float = 5.0, batch_max_queue: int = 64,
+                 warmup_batch_sizes: Sequence[int] = (1,), warmup_iterations: int = 1, mmap_weights: bool = False):
+        self.model_path = model_path
+        self.num_labels = num_labels
+        self.backend = backend
+        self.variant = variant
+        self.executor_mode = executor_mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.torch_threads = torch_threads
+        self.batch_max_size = batch_max_size
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self.batch_max_queue = batch_max_queue
+        self.warmup_batch_sizes = [size for size in warmup_batch_sizes if size > 0]
+        self.warmup_iterations = max(0, warmup_iterations)
+        self.mmap_weights = mmap_weights
+
+        self.state = "starting"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        # Model yüklendikten sonra model tutan her sürecin belleği (pid, rss, rss_anon, rss_file, pss)
+        self.worker_memory: List[Dict[str, int]] = []
+        self.started_at = time.time()
+        self.executor: Optional[CpuExecutor] = None
+        self.batcher: Optional[InferenceBatcher] = None
+        self.model = None
+        self._batch_buffer = None
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        MODEL_READY.set_function(lambda: 1.0 if self.ready else 0.0)
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    # -- yaşam döngüsü --
+    async def start(self):
+        self._ready = asyncio.Event()
+        if self.executor_mode == "process":
+            # Alt süreçlere fonksiyon referansı gider; worker modülü torch'u içe aktarmaz
+            from inference import worker
+
+            self.executor = CpuExecutor(
+                mode="process",
+                max_workers=self.workers,
+                max_queue=self.max_queue,
+                initializer=worker.init_worker,
+                initargs=(self.model_path, self.num_labels, self.torch_threads, self.backend, self.variant,
+                          self.mmap_weights, self.warmup_batch_sizes, self.warmup_iterations,
+                          multiprocessing.get_context("spawn").Barrier(max(1, self.workers))),
+            )
+        else:
+            self.executor = CpuExecutor(mode="thread", max_workers=self.workers, max_queue=self.max_queue)
+        self.executor.start()
+        self._task = asyncio.create_task(self._load(), name="model-load")
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    async def wait_ready(self, timeout: float) -> bool:
+        if self.ready:
+            return True
+        if self._ready is None or self.state == "failed":
+            return False
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return False
+        return self.ready
+
+    # -- yükleme ve ısınma --
+    def _load_model(self):
+        # Ağır içe aktarmalar ve torch.load bu iş parçacığında
+        import torch
+
+        from inference.backends import load_backend
+        from inference.face_detector import get_face_detector
+        from inference.preprocess import BatchBuffer
+
+        # Cascade XML'i istek sırasında değil başlangıçta bir kez oku
+        get_face_detector().load()
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # MODEL_BACKEND: eager, eager_int8, torchscript, torchscript_int8, onnx, onnx_int8
+        self.model = load_backend(self.backend, self.model_path, device, self.num_labels, variant=self.variant,
+                                  mmap=self.mmap_weights)
+        self._batch_buffer = BatchBuffer(self.batch_max_size, pin_memory=self.model.device.type == "cuda")
+
+    def forward_batch(self, faces: List[np.ndarray]) -> List[np.ndarray]:
+        # Yüz kırpıklarını önceden ayrılmış tampona yaz, tek ileri geçişte çalıştır ve
+        # her girdi için sigmoid olasılıklarını döndür
+        with time_stage("preprocess"):
+            batch = self._batch_buffer.fill(faces)
+        return list(self.model.predict(batch))
+
+    def _warmup_local(self):
+        from inference.worker import WARMUP_CROP_SIDE
+
+        crop = np.zeros((WARMUP_CROP_SIDE, WARMUP_CROP_SIDE, 3), dtype=np.uint8)
+        for size in self.warmup_batch_sizes:
+            for _ in range(self.warmup_iterations):
+                self.forward_batch([crop] * size)
+
+    async def _load(self):
+        started = time.perf_counter()
+        try:
+            self.state = "loading"
+            if self.executor_mode == "process":
+                from inference import worker
+
+                # Havuz boyutu kadar rapor görevi: hiçbiri bitmeden yenisi gönderildiği için
+                # her görev yeni bir süreç başlatır; süreçler modeli yükleyip ısındıktan sonra
+                # görevler bir engelde buluşur, böylece her süreç tam bir kez raporlar
+                self.state = "warming"
+                results = await asyncio.gather(*(
+                    self.executor.run(worker.warmup_report, WORKER_REPORT_TIMEOUT)
+                    for _ in range(self.executor.max_workers)
+                ))
+                self.warmup_seconds = max(duration for duration, _ in results)
+                # Engel kırıldıysa aynı süreç iki kez raporlamış olabilir
+                self.worker_memory = list({memory["pid"]: memory for _, memory in results}.values())
+                self.load_seconds = time.perf_counter() - started - self.warmup_seconds
+            else:
+                await asyncio.to_thread(self._load_model)
+                self.load_seconds = time.perf_counter() - started
+                self.worker_memory = [{"pid": os.getpid(), **process_memory()}]
+                self.state = "warming"
+                warmup_started = time.perf_counter()
+                if self.warmup_iterations:
+                    await asyncio.to_thread(self._warmup_local)
+                self.warmup_seconds = time.perf_counter() - warmup_started
+                # Eşzamanlı isteklerin yüzlerini tek batch'te toplayan çıkarım motoru
+                self.batcher = InferenceBatcher(
+                    self.forward_batch,
+                    max_batch_size=self.batch_max_size,
+                    max_wait_ms=self.batch_max_wait_ms,
+                    max_queue=self.batch_max_queue,
+                )
+                await self.batcher.start()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            logging.error(f"Model load failed: {self.error}")
+            self._ready.set()
+            return
+        MODEL_LOAD_SECONDS.set(self.load_seconds)
+        MODEL_WARMUP_SECONDS.set(self.warmup_seconds)
+        self.state = "ready"
+        self._ready.set()
+        logging.info(f"Model ready (backend={self.backend}, executor={self.executor_mode}, "
+                     f"load={self.load_seconds:.2f}s, warmup={self.warmup_seconds:.2f}s, "
+                     f"batch_sizes={self.warmup_batch_sizes}, iterations={self.warmup_iterations})")
+        for memory in self.worker_memory:
+            logging.info(f"Model process {memory['pid']} memory: "
+                         f"{format_memory({k: v for k, v in memory.items() if k != 'pid'})}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "model_backend": self.backend,
+            "executor_mode": self.executor_mode,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "mmap_weights": self.mmap_weights,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "memory": {"pid": os.getpid(), **process_memory()},
+            "workers": self.worker_memory,
+            "error": self.error,
+        }
@@ -0,0 +1,191 @@
+#upload.py
+# Tek görsel yüklemelerinin sınırlı okunması: istemcinin bildirdiği içerik türü
+# yerine baytların başlığı koklanır, bayt ve piksel sınırları görsel tamamen
+# okunmadan/çözülmeden uygulanır. Görsel tek bir bytearray'e yerinde okunur;
+# koklama, karma ve cv2.imdecode aynı tamponu kopyalamadan kullanır.
+import importlib.util
+import json
+import time
+from typing import BinaryIO, Dict, Optional
+
+from inference.image_header import ImageInfo, read_image_info
+from metrics import STAGE_LATENCY, counter, histogram
+
+UPLOAD_BYTES = histogram(
+    "upload_bytes", "Size of accepted image uploads by sniffed format",
+    labelnames=("format",),
+    buckets=(16384, 65536, 262144, 524288, 1048576, 2097152, 4194304, 8388608, 16777216, 33554432),
+)
+UPLOAD_REJECTED = counter("upload_rejected_total", "Rejected image uploads by reason", labelnames=("reason",))
+
+CHUNK_SIZE = 64 * 1024
+# JPEG'de SOF büyük EXIF/XMP segmentlerinden sonra gelebilir; bu kadar bayt okunana
+# kadar başlık her parçada yeniden denenir, sonra görsel sonunda bir kez daha
+SNIFF_LIMIT = 512 * 1024
+# Çok parçalı gövdenin görsel dışındaki kısmı (sınırlar, alan başlıkları) için pay
+MULTIPART_OVERHEAD = 64 * 1024
+
+# cv2 HEIC çözemez; pillow_heif kuruluysa pipeline onu kullanır
+HEIF_DECODER_AVAILABLE = importlib.util.find_spec("pillow_heif") is not None
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str, reason: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.reason = reason
+
+
+def _reject(status_code: int, detail: str, reason: str):
+    UPLOAD_REJECTED.inc(reason=reason)
+    raise UploadRejected(status_code, detail, reason)
+
+
+def _too_large(max_bytes: int):
+    _reject(413, f"Dosya çok büyük (en fazla {max_bytes} bayt)", "too_large")
+
+
+def check_image_info(info: Optional[ImageInfo], max_pixels: int) -> ImageInfo:
+    """Koklanan başlığı doğrular: tanınan biçim, çözülebilirlik ve piksel sınırı."""
+    if info is None:
+        _reject(415, "Desteklenmeyen ya da bozuk görsel (JPEG, PNG, HEIC veya WebP yükleyin).", "format")
+    if info.width <= 0 or info.height <= 0:
+        _reject(400, "Görsel boyutları geçersiz.", "format")
+    if info.width * info.height > max_pixels:
+        _reject(413, f"Görsel çözünürlüğü çok yüksek ({info.width}x{info.height}, "
+                     f"en fazla {max_pixels} piksel)", "too_many_pixels")
+    if info.format == "heic" and not HEIF_DECODER_AVAILABLE:
+        _reject(415, "HEIC görseller bu sunucuda desteklenmiyor; lütfen JPEG yükleyin.", "heic_unsupported")
+    return info
+
+
+def inspect_image(data, max_pixels: int) -> ImageInfo:
+    # Belleğe alınmış görseller için (toplu analiz öğeleri)
+    info = check_image_info(read_image_info(data), max_pixels)
+    UPLOAD_BYTES.observe(len(data), format=info.format)
+    return info
+
+
+def read_upload(fileobj: BinaryIO, size_hint: Optional[int], max_bytes: int, max_pixels: int) -> bytearray:
+    """
+    fileobj'u CHUNK_SIZE parçalarla tek bir bytearray'e yerinde okur (size_hint
+    biliniyorsa tek ayırma). max_bytes aşılınca ya da başlık piksel sınırını
+    aşıyorsa okuma o anda UploadRejected ile kesilir. Senkron; büyük dosyalar
+    için iş parçacığında çağrılmalı.
+    """
+    started = time.perf_counter()
+    if size_hint is not None and size_hint > max_bytes:
+        _too_large(max_bytes)
+    # Bildirilen boyuttan bir bayt fazlası: boyut yanlışsa aşım yine yakalanır
+    capacity = size_hint + 1 if size_hint else 4 * CHUNK_SIZE
+    buffer = bytearray(min(capacity, max_bytes + 1))
+    view = memoryview(buffer)
+    readinto = getattr(fileobj, "readinto", None)
+    length = 0
+    info = None
+    try:
+        while True:
+            if length == len(buffer):
+                if length > max_bytes:
+                    _too_large(max_bytes)
+                # Boyutu bilinmeyen akış: tamponu ikiye katla (en fazla max_bytes + 1)
+                view.release()
+                buffer.extend(bytes(min(length, max_bytes + 1 - length)))
+                view = memoryview(buffer)
+            target = view[length:min(len(buffer), length + CHUNK_SIZE)]
+            if readinto is not None:
+                n = readinto(target)
+            else:
+                chunk = fileobj.read(len(target))
+                n = len(chunk)
+                target[:n] = chunk
+            target.release()
+            if not n:
+                break
+            length += n
+            if info is None and length <= SNIFF_LIMIT:
+                info = read_image_info(view[:length])
+                if info is not None:
+                    check_image_info(info, max_pixels)
+        if length > max_bytes:
+            _too_large(max_bytes)
+        if info is None:
+            info = check_image_info(read_image_info(view[:length]), max_pixels)
+    finally:
+        view.release()
+    del buffer[length:]
+    UPLOAD_BYTES.observe(length, format=info.format)
+    STAGE_LATENCY.observe(time.perf_counter() - started, stage="upload_read")
+    return buffer
+
+
+class UploadLimitMiddleware:
+    """
+    Yol başına gövde sınırı (saf ASGI; diğer yollara ve akış yanıtlarına dokunmaz).
+    Content-Length sınırı aşıyorsa gövde okunmadan 413 döner. Başlık yoksa
+    (chunked) ya da yanlışsa okunan baytlar sayılır; sınır aşıldığında uygulama
+    gövdenin kalanını kopmuş bağlantı olarak görür ve yanıtı yerine 413 gönderilir.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = dict(limits)
+
+    @staticmethod
+    async def _too_large(send, limit: int):
+        UPLOAD_REJECTED.inc(reason="too_large")
+        body = json.dumps({"detail": f"Dosya çok büyük (en fazla {limit} bayt)"}, ensure_ascii=False).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = self.limits.get(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        allowed = limit + MULTIPART_OVERHEAD
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > allowed:
+                    await self._too_large(send, limit)
+                    return
+                break
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def counted_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > allowed:
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded and not started:
+                # Uygulamanın kopmuş gövdeye verdiği hata yanıtı yerine 413 gönderilecek
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, counted_receive, guarded_send)
+        except Exception:
+            if not exceeded or started:
+                raise
+        if exceeded and not started:
+            await self._too_large(send, limit)
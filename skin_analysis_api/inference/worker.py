@@ -0,0 +1,85 @@
+#worker.py
+# Süreç havuzu modunda her alt süreçte çalışan kod: model süreç başına bir kez yüklenir.
+# Ağır modüller (torch, cv2) fonksiyon içinde içe aktarılır; ana süreç bu modülü
+# yalnızca fonksiyon referansları için yükler ve torch'u hiç yüklemez.
+import logging
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_model = None
+# init_worker'da yapılan ısınmanın sonucu: (geçen süre sn, süreç belleği)
+_warmup_report: Optional[Tuple[float, dict]] = None
+_report_barrier = None
+
+# Isınma geçişlerinde kullanılan yapay yüz kırpığı (ön işleme 256 kısa kenara indirir)
+WARMUP_CROP_SIDE = 256
+
+
+def init_worker(model_path: str, num_labels: int, num_threads: int = 1, backend: str = "eager",
+                variant: str = "", mmap: bool = False, warmup_batch_sizes: Sequence[int] = (),
+                warmup_iterations: int = 0, report_barrier=None):
+    # Her alt süreç modeli yükler ve ilk görevinden önce kendini ısıtır; böylece
+    # havuzun hangi süreci hangi görevi alırsa alsın tüm süreçler ısınmış olur
+    global _model, _warmup_report, _report_barrier
+    import torch
+
+    from inference.backends import load_backend
+    from inference.face_detector import get_face_detector
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Süreçler CPU çekirdeklerini paylaştığı için her süreçte az sayıda torch iş parçacığı
+    torch.set_num_threads(max(1, num_threads))
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    _model = load_backend(backend, model_path, device, num_labels, variant=variant, num_threads=num_threads,
+                          mmap=mmap)
+    get_face_detector().load()
+    _report_barrier = report_barrier
+    _warmup_report = warmup(warmup_batch_sizes, warmup_iterations)
+
+
+def warmup_report(timeout: float) -> Tuple[float, dict]:
+    # Başlangıçta havuz boyutu kadar gönderilir. Engel, max_workers görevin aynı
+    # anda farklı süreçlerde çalışmasını bekler; böylece her süreç bir kez raporlar
+    if _report_barrier is not None:
+        try:
+            _report_barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            logging.warning("Worker warmup report barrier broken; some workers may be reported twice")
+    return _warmup_report
+
+
+def warmup(batch_sizes: Sequence[int], iterations: int = 1) -> Tuple[float, dict]:
+    # Beklenen batch boyutlarında ileri geçişler: çekirdek seçimi ve bellek ayırıcı
+    # büyümesi ilk gerçek istekte değil burada olur. (geçen süre sn, süreç belleği) döndürür.
+    import os
+
+    import torch
+
+    from inference.memory import process_memory
+    from inference.preprocess import preprocess_face
+
+    started = time.perf_counter()
+    crop = np.zeros((WARMUP_CROP_SIDE, WARMUP_CROP_SIDE, 3), dtype=np.uint8)
+    for size in batch_sizes:
+        batch = torch.stack([preprocess_face(crop) for _ in range(size)])
+        for _ in range(iterations):
+            _model.predict(batch)
+    return time.perf_counter() - started, {"pid": os.getpid(), **process_memory()}
+
+
+def analyze_image_crops(image_bytes: bytes, mode: str = "face",
+                        max_faces: int = 1) -> Optional[Tuple[List[str], np.ndarray]]:
+    # Tüm kırpıklar tek ileri geçişte: (kırpık adları, [n_crops, num_labels] olasılıklar)
+    import torch
+
+    from inference.pipeline import extract_crops
+    from inference.preprocess import preprocess_face
+
+    crops = extract_crops(image_bytes, mode, max_faces)
+    if crops is None:
+        return None
+    batch = torch.stack([preprocess_face(crop) for _, crop in crops])
+    return [name for name, _ in crops], _model.predict(batch)
@@ -1,40 +1,84 @@
 #main.py
-from fastapi import FastAPI, HTTPException, File, UploadFile, Query, Path
+from fastapi import FastAPI, HTTPException, File, UploadFile, Query, Path, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
 from typing import List, Optional, Dict
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import random
+import time
 from dotenv import load_dotenv
-import torch
-import torch.nn as nn
-from torchvision import transforms, models
-from PIL import Image
 import logging
 import os
+import tempfile
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
 import numpy as np
 
 #uvicorn main:app --host 0.0.0.0 --port 8000 --reload
 
 # Import from our modules
-from scrapers.trendyol import extract_trendyol_data, is_product_page, search_products
+from sources.product_source import create_product_source
+
+from inference.batch_input import BatchImage, iter_batch_images
+from inference.decision import DecisionLayer
+from inference.executor import Overloaded
+from inference.regions import ANALYSIS_MODES, aggregate_probabilities
+from inference.runtime import ModelRuntime
+from inference.upload import UploadLimitMiddleware, UploadRejected, inspect_image, read_upload
+from cache.analysis_cache import PerceptualIndex, content_key, decode_result, encode_result
+from cache.async_cache import AsyncCache
+from cache.backends import create_backend
+from catalog.pool import CatalogPool, CatalogRefresher, SERVED as CATALOG_SERVED, default_lock_path
+from catalog.ranking import query_keywords
+from metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, STAGE_LATENCY, RequestMetricsMiddleware, time_stage
+import config
 
 from data.skin_issues import (
-    LABELS, THRESHOLDS, PRODUCT_KEYWORDS, PRODUCT_TYPES,
-    SKIN_ISSUE_INFO, SkinIssueInfo, ProductResponse, SkinAnalysisResponse,
-    AnalysisAndRecommendationResponse, SkinIssueWithProductsResponse
+    LABELS, THRESHOLDS, LABEL_REGIONS, PRODUCT_KEYWORDS, PRODUCT_TYPES,
+    SKIN_ISSUE_INFO, SkinIssueInfo, ProductResponse, SkinAnalysisResponse, RegionAnalysis, BatchAnalysisItem,
+    AnalysisAndRecommendationResponse, SkinIssueWithProductsResponse,
+    IssueRecommendationTiming, RecommendationMetadata
 )
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Örneklenmiş olasılık kaydı: kendi seviyesi olan ayrı kanal (kök INFO'dayken de yazar)
+probability_log = logging.getLogger("skincare.probabilities")
+if config.PROBABILITY_LOG_SAMPLE_RATE > 0:
+    probability_log.setLevel(logging.DEBUG)
 
 # Load environment variables (.env file)
 load_dotenv("keys.env")
 SEARCH_API_KEY = os.getenv("SEARCH_API_KEY")
 SEARCH_ENGINE_ID = os.getenv("SEARCH_ENGINE_ID")
-if not SEARCH_API_KEY or not SEARCH_ENGINE_ID:
-    raise RuntimeError("❌ API Keys not found.")
+# Yerel katalog ağ ve anahtar gerektirmez
+# Anahtarlar yoksa analiz yine çalışır; Trendyol araması boş sonuç döner
+SEARCH_KEYS_CONFIGURED = bool(SEARCH_API_KEY and SEARCH_ENGINE_ID)
+if config.PRODUCT_SOURCE == "trendyol" and not SEARCH_KEYS_CONFIGURED:
+    logging.warning("❌ API Keys not found, product recommendations are disabled.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Model yüklemesi arka planda; sunucu hemen dinlemeye başlar (/healthz, /readyz)
+    await runtime.start()
+    if use_catalog_pool:
+        catalog_refresher.start()
+    try:
+        yield
+    finally:
+        await catalog_refresher.stop()
+        await runtime.stop()
+
 
 # FastAPI Application
-app = FastAPI(title="Skincare AI API", description="AI-powered skin analysis and product recommendation API")
+app = FastAPI(title="Skincare AI API", description="AI-powered skin analysis and product recommendation API",
+              lifespan=lifespan)
+# Sınırı aşan tek görsel yüklemeleri gövde ayrıştırılmadan reddedilir. CORS'tan önce
+# eklenir ki CORS onu sarsın ve 413 yanıtları da tarayıcıya CORS başlıklarıyla gitsin.
+app.add_middleware(UploadLimitMiddleware, limits={"/analyze": config.UPLOAD_MAX_BYTES,
+                                                  "/analyze-and-recommend": config.UPLOAD_MAX_BYTES,
+                                                  "/analyze/batch": config.BATCH_ANALYZE_MAX_BYTES})
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Mobil cihazdan test için tüm domainlere izin verir
@@ -42,149 +86,501 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# En dışta: reddedilenler dahil her isteğin rota bazında toplam süresi (/metrics)
+app.add_middleware(RequestMetricsMiddleware)
 
 # Model definition
 MODEL_PATH = "75epoch-convnextbase-improved.pth"
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-model = models.convnext_base(weights=None)
-model.classifier[2] = nn.Linear(model.classifier[2].in_features, len(LABELS))
-model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-model.to(device)
-model.eval()
+# Yüz bulma ve ileri geçiş event loop dışında çalışır. thread modunda model bu
+# süreçte, process modunda her alt süreçte yüklenir; ikisi de lifespan'de başlar.
+runtime = ModelRuntime(
+    MODEL_PATH, len(LABELS),
+    backend=config.MODEL_BACKEND,
+    variant=config.MODEL_VARIANT_PATH,
+    executor_mode=config.EXECUTOR_MODE,
+    workers=config.EXECUTOR_WORKERS,
+    max_queue=config.EXECUTOR_MAX_QUEUE,
+    torch_threads=config.EXECUTOR_TORCH_THREADS,
+    batch_max_size=config.BATCH_MAX_SIZE,
+    batch_max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    batch_max_queue=config.BATCH_MAX_QUEUE,
+    warmup_batch_sizes=config.MODEL_WARMUP_BATCH_SIZES,
+    warmup_iterations=config.MODEL_WARMUP_ITERATIONS,
+    mmap_weights=config.MODEL_WEIGHTS_MMAP,
+)
+
 
-# Image transformation
-transform = transforms.Compose([
-    transforms.Resize(256),
-    transforms.CenterCrop(224),  # Eğitimde böyleydi
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406],
-                         [0.229, 0.224, 0.225])
-])
+# Analiz sonucu önbelleği: içerik karması (tüm worker'lar, seçilen arka uç) ve
+# yeniden kodlamalar için süreç içi algısal dizin. Olasılıklar saklanır, kararlar değil.
+MODEL_TAG = f"{config.MODEL_BACKEND}:{os.path.basename(config.MODEL_VARIANT_PATH or MODEL_PATH)}"
+analysis_cache = None
+perceptual_index = None
+if config.ANALYSIS_CACHE_ENABLED:
+    analysis_cache = AsyncCache(
+        create_backend(config.ANALYSIS_CACHE_BACKEND, max_entries=config.ANALYSIS_CACHE_MAX_ENTRIES,
+                       sqlite_path=config.CACHE_SQLITE_PATH, redis_url=config.CACHE_REDIS_URL,
+                       table="analysis", prefix="skincare:analysis:"),
+        ttl=config.ANALYSIS_CACHE_TTL_SECONDS,
+        name="analysis",
+    )
+    if config.ANALYSIS_CACHE_PERCEPTUAL:
+        perceptual_index = PerceptualIndex(
+            capacity=config.ANALYSIS_CACHE_MAX_ENTRIES,
+            ttl=config.ANALYSIS_CACHE_TTL_SECONDS,
+            max_distance=config.ANALYSIS_CACHE_PERCEPTUAL_DISTANCE,
+            max_diff=config.ANALYSIS_CACHE_PERCEPTUAL_MAX_DIFF,
+        )
 
 
-def extract_face_region(image_bytes: bytes) -> Optional[Image.Image]:
-    try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+# Olasılık -> etiket kararı: eşikler ve kalibrasyon DECISION_CONFIG_PATH'ten çalışırken yeniden yüklenir
+decision_layer = DecisionLayer(LABELS, THRESHOLDS, path=config.DECISION_CONFIG_PATH,
+                               reload_seconds=config.DECISION_RELOAD_SECONDS)
 
-        if img is None:
-            logging.error("Invalid image format")
-            return None
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
+# Ürün önerisi önbelleği (CACHE_BACKEND=sqlite/redis ile tüm worker'lar paylaşır)
+recommendation_cache = AsyncCache(
+    create_backend(config.CACHE_BACKEND, max_entries=config.CACHE_MAX_ENTRIES,
+                   sqlite_path=config.CACHE_SQLITE_PATH, redis_url=config.CACHE_REDIS_URL,
+                   table="recommendations", prefix="skincare:recommendations:"),
+    ttl=config.CACHE_TTL_SECONDS,
+    stale_ttl=config.CACHE_STALE_SECONDS,
+    name="recommendations",
+)
 
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
 
-        faces = face_cascade.detectMultiScale(
-            image=gray,
-            scaleFactor=1.1,
-            minNeighbors=4,
-            minSize=(60, 60),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
+# Skin Analysis Function
+def _include_probabilities(requested: Optional[bool]) -> bool:
+    return config.ANALYSIS_RETURN_PROBABILITIES if requested is None else requested
 
-        if len(faces) == 0:
-            logging.warning("No face detected.")
-            return None
 
-        # İlk yüzü kırp
-        x, y, w, h = faces[0]
-        face_crop = img[y:y + h, x:x + w]
-        face_rgb = cv2.cvtColor(face_crop, cv2.COLOR_BGR2RGB)
-        pil_face = Image.fromarray(face_rgb).convert("RGB")
-        return pil_face
+def resolve_analysis_mode(mode: Optional[str]) -> str:
+    mode = mode or config.ANALYSIS_MODE
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"Geçersiz analiz modu. Seçenekler: {list(ANALYSIS_MODES)}")
+    return mode
+
+
+async def _analyze_crops(image_bytes: bytes, mode: str) -> dict:
+    # Önbellek ıskalamasında: kırpık adları ve kırpık başına olasılıklar (encode_result)
+    if not await runtime.wait_ready(config.MODEL_READY_WAIT_SECONDS):
+        raise HTTPException(status_code=503, detail="Model henüz hazır değil, lütfen tekrar deneyin.",
+                            headers={"Retry-After": "5"})
+    from inference import pipeline, worker
+
+    executor = runtime.executor
+    if executor.mode == "process":
+        # Yüz bulma ve ileri geçiş modeli önceden yüklenmiş alt süreçte
+        analyzed = await executor.run(worker.analyze_image_crops, image_bytes, mode, config.ANALYSIS_MAX_FACES)
+        if analyzed is None:
+            raise HTTPException(status_code=400, detail="Fotoğrafta insan yüzü algılanamadı.")
+        return encode_result(*analyzed)
+
+    # Yüz(ler)ü ve bölgeleri kırp (iş parçacığı havuzunda); gerekirse algısal karmayla
+    layout = hashes = thumbnails = None
+    if perceptual_index is not None:
+        extracted = await executor.run(pipeline.extract_crops_hashed, image_bytes, mode, config.ANALYSIS_MAX_FACES)
+        if extracted is None:
+            raise HTTPException(status_code=400, detail="Fotoğrafta insan yüzü algılanamadı.")
+        crops, signature, thumbnails = extracted
+        # Yeniden kodlanmış aynı fotoğraf (karma adayı küçük resimlerle doğrulanır): ileri geçişe gerek yok
+        layout, hashes = PerceptualIndex.parse(signature)
+        cached = perceptual_index.get(layout, hashes, thumbnails)
+        if cached is not None:
+            return cached
+    else:
+        crops = await executor.run(pipeline.extract_crops, image_bytes, mode, config.ANALYSIS_MAX_FACES)
+        if crops is None:
+            raise HTTPException(status_code=400, detail="Fotoğrafta insan yüzü algılanamadı.")
+
+    # Ön işleme ve ileri geçiş diğer eşzamanlı isteklerle aynı batch'te; kırpıklar bölünmez
+    names = [name for name, _ in crops]
+    value = encode_result(names, np.stack(await runtime.batcher.infer_group([crop for _, crop in crops])))
+    if perceptual_index is not None:
+        perceptual_index.put(layout, hashes, thumbnails, value)
+    return value
+
+
+async def analyze_image(image_bytes: bytes, mode: str, include_probabilities: bool = False) -> SkinAnalysisResponse:
+    """
+    Tespit edilen sorunlar; face dışındaki modlarda kırpık başına olasılıklar,
+    include_probabilities ile ham ve kalibre olasılıklar. Bir görselin tüm
+    kırpıkları tek ileri geçişte çalışır. Hatalar HTTPException.
 
+    Aynı baytlar (içerik karması) ya da aynı yüz kırpıkları (algısal karma) için
+    saklanmış olasılıklar kullanılır; eşikler her seferinde güncel değerlerle uygulanır.
+    """
+    started = time.perf_counter()
+    try:
+        loader = functools.partial(_analyze_crops, image_bytes, mode)
+        if analysis_cache is not None:
+            # Büyük görsellerde karma hesabı event loop'u tutmasın (hashlib GIL'i bırakır)
+            if len(image_bytes) > 1 << 20:
+                key = await asyncio.to_thread(content_key, image_bytes, mode, config.ANALYSIS_MAX_FACES, MODEL_TAG)
+            else:
+                key = content_key(image_bytes, mode, config.ANALYSIS_MAX_FACES, MODEL_TAG)
+            # Eşzamanlı tekrarlar (retry fırtınası) tek analizi bekler
+            value = await analysis_cache.get_or_load(key, loader)
+        else:
+            value = await loader()
+        with time_stage("decision"):
+            names, crop_probs = decode_result(value)
+            probs = aggregate_probabilities(names, crop_probs, LABELS, LABEL_REGIONS, config.ANALYSIS_AGGREGATE)
+            # Kalibrasyon ve eşik vektörü tek vektörel işlemde (çalışırken yeniden yüklenebilir)
+            mask, calibrated = decision_layer.decide(probs)
+            detected = decision_layer.labels_for(mask[0])
+        if probability_log.isEnabledFor(logging.DEBUG) and random.random() < config.PROBABILITY_LOG_SAMPLE_RATE:
+            probability_log.debug(f"mode={mode} detected={detected} "
+                                  f"raw={dict(zip(LABELS, probs.astype(float).round(4).tolist()))} "
+                                  f"calibrated={dict(zip(LABELS, calibrated[0].astype(float).round(4).tolist()))}")
+
+        response = SkinAnalysisResponse(detected_skin_issues=detected or ["no_skin_issue_detected"])
+        if mode != "face":
+            response.regions = [
+                RegionAnalysis(region=name, probabilities={label: round(float(p), 4) for label, p in zip(LABELS, row)})
+                for name, row in zip(names, crop_probs)
+            ]
+        if include_probabilities:
+            response.probabilities = {label: round(float(p), 4) for label, p in zip(LABELS, probs)}
+            response.calibrated_probabilities = {label: round(float(p), 4) for label, p in zip(LABELS, calibrated[0])}
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage="analysis")
+        return response
+
+    except Overloaded as e:
+        logging.warning(f"Rejecting analysis request: {e}")
+        raise HTTPException(status_code=503, detail="Sunucu şu anda yoğun, lütfen tekrar deneyin.",
+                            headers={"Retry-After": "1"})
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Face extraction error: {str(e)}")
-        return None
+        logging.error(f"Model error: {e}")
+        raise HTTPException(status_code=500, detail=f"Model hatası: {e}")
 
 
-# Skin Analysis Function
-async def analyze_skin(file: UploadFile) -> List[str]:
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Lütfen bir resim dosyası yükleyin.")
+async def analyze_upload(file: UploadFile, mode: Optional[str] = None,
+                         include_probabilities: bool = False) -> SkinAnalysisResponse:
+    mode = resolve_analysis_mode(mode)
+    image_bytes = await read_image_upload(file)
+    return await analyze_image(image_bytes, mode, include_probabilities)
+
 
+async def read_image_upload(file: UploadFile) -> bytearray:
+    # İçerik türü istemciden gelir; biçim ve boyut baytların başlığından doğrulanır
+    size = getattr(file, "size", None)
+    read = functools.partial(read_upload, file.file, size, config.UPLOAD_MAX_BYTES, config.UPLOAD_MAX_PIXELS)
     try:
-        # Görseli oku
-        image_bytes = await file.read()
+        if size is not None and size <= 1 << 20:
+            # Bellekteki küçük dosya: iş parçacığına geçiş okumadan pahalı
+            return read()
+        return await asyncio.to_thread(read)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-        # Yüzü kırp
-        face_image = extract_face_region(image_bytes)
 
-        if face_image is None:
-            raise HTTPException(status_code=400, detail="Fotoğrafta insan yüzü algılanamadı.")
+async def analyze_skin(file: UploadFile, mode: Optional[str] = None) -> List[str]:
+    return (await analyze_upload(file, mode)).detected_skin_issues
+
+
+async def _analyze_batch_item(index: int, image: BatchImage, mode: str,
+                              include_probabilities: bool) -> BatchAnalysisItem:
+    if image.data is None:
+        return BatchAnalysisItem(index=index, filename=image.name, status_code=400, error=image.error)
+    try:
+        inspect_image(image.data, config.UPLOAD_MAX_PIXELS)
+    except UploadRejected as e:
+        return BatchAnalysisItem(index=index, filename=image.name, status_code=e.status_code, error=e.detail)
+    try:
+        result = await analyze_image(image.data, mode, include_probabilities)
+    except HTTPException as e:
+        return BatchAnalysisItem(index=index, filename=image.name, status_code=e.status_code, error=e.detail)
+    return BatchAnalysisItem(index=index, filename=image.name, result=result)
+
+
+# Toplu girdi okuma (arşiv açma, diske biriktirilmiş parçalar); event loop dışında
+batch_read_pool = ThreadPoolExecutor(max_workers=config.BATCH_ANALYZE_CONCURRENCY,
+                                     thread_name_prefix="batch-read")
+
+
+def _close_batch_inputs(images, spools):
+    try:
+        images.close()
+    finally:
+        for spool in spools:
+            spool.close()
+
+
+async def analyze_batch_stream(sources, mode: str, include_probabilities: bool = False, spools=()):
+    """
+    Görselleri sırayla okuyup en fazla BATCH_ANALYZE_CONCURRENCY tanesini aynı anda
+    analiz eder ve her biri bittikçe NDJSON satırı üretir (sıra: bitiş sırası,
+    index alanı girdi sırası). Bellekte yalnızca uçuştaki görseller bulunur;
+    kırpıklar eşzamanlı görsellerle aynı ileri geçişlerde toplanır.
+    """
+    images = iter_batch_images(sources, config.BATCH_ANALYZE_MAX_IMAGE_BYTES)
+    window = max(1, config.BATCH_ANALYZE_CONCURRENCY)
+    pending = set()
+    index = 0
+    exhausted = False
+    reading = None
+    try:
+        while True:
+            while not exhausted and len(pending) < window:
+                # Arşiv okuma/açma disk ve CPU işi; event loop dışında. Gelecek nesnesi
+                # tutulur: akış iptal edilse de okuma iş parçacığında sürüyor olabilir
+                reading = batch_read_pool.submit(next, images, None)
+                image = await asyncio.wrap_future(reading)
+                if image is None:
+                    exhausted = True
+                elif index >= config.BATCH_ANALYZE_MAX_IMAGES:
+                    exhausted = True
+                    yield BatchAnalysisItem(
+                        index=index, filename=image.name, status_code=413,
+                        error=f"Bir istekte en fazla {config.BATCH_ANALYZE_MAX_IMAGES} görsel işlenir",
+                    ).model_dump_json(exclude_none=True) + "\n"
+                else:
+                    pending.add(asyncio.create_task(_analyze_batch_item(index, image, mode, include_probabilities)))
+                    index += 1
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: t.result().index):
+                yield task.result().model_dump_json(exclude_none=True) + "\n"
+    finally:
+        # İstemci bağlantıyı kestiyse kalan işleri bırak
+        for task in pending:
+            task.cancel()
+        if reading is not None and not reading.done():
+            # Üreteç hâlâ çalışıyor; kapatma okuma bitince aynı iş parçacığında yapılır
+            reading.add_done_callback(lambda _: _close_batch_inputs(images, spools))
+        else:
+            _close_batch_inputs(images, spools)
+
 
-        # Kırpılmış yüzü modele uygun hale getir
-        image_tensor = transform(face_image).unsqueeze(0).to(device)
+def build_search_query(issue):
+    # Get product types for this skin issue
+    product_types = PRODUCT_TYPES.get(issue, [])
 
-        with torch.no_grad():
-            outputs = model(image_tensor)
-            probs = torch.sigmoid(outputs).squeeze().cpu().numpy()
-            logging.info(f"Tüm olasılıklar (sigmoid sonrası): {probs}")
-            for i, p in enumerate(probs):
-                logging.info(f"{LABELS[i]} olasılığı: {p:.4f}")
+    # Get search keywords for this skin issue
+    keywords = PRODUCT_KEYWORDS.get(issue, [])
 
-        # Eşiklere göre etiket belirleme
-        detected = []
-        for i, p in enumerate(probs):
-            label = LABELS[i]
-            threshold = THRESHOLDS.get(label, 0.5)
-            if p > threshold:
-                detected.append(label)
+    # Combine issue with product types for better search results
+    if product_types:
+        search_queries = [f"{keyword} {product_type}" for keyword in keywords[:2] for product_type in
+                          product_types[:2]]
+        # Use the first few queries
+        return " OR ".join(search_queries[:6])  # veya [:8]
 
-        return detected if detected else ["no_skin_issue_detected"]
+    # Just use keywords if no product types
+    return " OR ".join(keywords[:6])  # veya [:8]
 
+
+def recommendation_cache_key(issue, product_count, min_rating):
+    rating_key = str(min_rating) if min_rating is not None else "default"
+    return f"recommendations:{issue}:{product_count}:{rating_key}"
+
+
+async def _recommend_issue(issue, product_count, min_rating):
+    # Yerel katalog zaten bellekte ve dizinli; havuz/önbellek katmanlarına gerek yok
+    if not product_source.blocking:
+        return await product_source.search_async(issue, product_count, min_rating), product_source.name
+
+    # Önce arka planda hazırlanmış aday havuzundan dilimle; havuz product_count kadar
+    # ürün veremiyorsa (küçük havuz, yüksek min_rating) canlı aramaya düş
+    pooled = []
+    if use_catalog_pool:
+        pooled = await catalog_pool.slice(issue, product_count, min_rating)
+        if len(pooled) >= product_count:
+            CATALOG_SERVED.inc(source="pool")
+            return pooled, "pool"
+
+    # Search for products (önbellekten; eşzamanlı aynı istekler tek kazıma tetikler)
+    # partial: arka plan yenilemesi çağıranın değişkenlerine değil bu sorguya bağlı kalsın
+    loader = functools.partial(product_source.search_async, issue, product_count, min_rating)
+    try:
+        products = await recommendation_cache.get_or_load(
+            recommendation_cache_key(issue, product_count, min_rating), loader
+        )
     except Exception as e:
-        logging.error(f"Model error: {e}")
-        raise HTTPException(status_code=500, detail=f"Model hatası: {e}")
+        if not pooled:
+            raise
+        logging.error(f"Live search failed for {issue}, serving partial pool: {e}")
+        products = []
+    # Canlı arama havuz diliminden azını bulduysa eksik de olsa havuz dilimi daha iyi
+    if len(products) < len(pooled):
+        CATALOG_SERVED.inc(source="pool")
+        return pooled, "pool"
+    CATALOG_SERVED.inc(source="live")
+    return products, "live"
+
+
+async def _timed_issue(issue, product_count, min_rating, timings):
+    started = time.perf_counter()
+    source = "live"
+    try:
+        products, source = await _recommend_issue(issue, product_count, min_rating)
+        return products
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage="recommend_issue")
+        timings[issue] = IssueRecommendationTiming(elapsed_ms=round(elapsed * 1000, 1), source=source)
+
+
+async def recommend_with_metadata(skin_issues, product_count=3, min_rating=None, deadline=None):
+    """
+    Sorunları eşzamanlı arar; toplam süre en yavaş sorunla sınırlıdır. deadline
+    (sn) dolduğunda bitmeyen sorunlar boş liste ve partial=True ile döner. Arka
+    plandaki kazıma iptal edilmez, sonucu bir sonraki istek için önbelleğe yazılır.
+    """
+    deadline = config.RECOMMEND_DEADLINE_SECONDS if deadline is None else deadline
+    started = time.perf_counter()
+    issues = [issue for issue in dict.fromkeys(skin_issues) if issue in PRODUCT_KEYWORDS]
+    timings = {}
+    tasks = {
+        issue: asyncio.create_task(_timed_issue(issue, product_count, min_rating, timings))
+        for issue in issues
+    }
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=deadline if deadline > 0 else None)
+
+    recommendations = {}
+    partial = False
+    for issue, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            partial = True
+            timings[issue] = IssueRecommendationTiming(
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 1), source="live", timed_out=True
+            )
+            logging.warning(f"Recommendation for {issue} missed the {deadline}s deadline")
+            recommendations[issue] = []
+        elif task.exception() is not None:
+            logging.error(f"Recommendation error for {issue}: {task.exception()}")
+            recommendations[issue] = []
+        else:
+            recommendations[issue] = task.result()
+
+    metadata = RecommendationMetadata(
+        partial=partial,
+        deadline_ms=deadline * 1000 if deadline > 0 else None,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        issues={issue: timings[issue] for issue in issues if issue in timings},
+    )
+    return recommendations, metadata
 
 
 # Get product recommendations based on skin issues
 async def get_recommendations(skin_issues, product_count=3, min_rating=None):
-    recommendations = {}
+    recommendations, _ = await recommend_with_metadata(skin_issues, product_count, min_rating)
+    return recommendations
 
-    for issue in skin_issues:
-        if issue in PRODUCT_KEYWORDS:
-            # Get product types for this skin issue
-            product_types = PRODUCT_TYPES.get(issue, [])
 
-            # Get search keywords for this skin issue
-            keywords = PRODUCT_KEYWORDS.get(issue, [])
+def set_timing_headers(response: Response, metadata: RecommendationMetadata):
+    # Ürün listesi döndüren uç noktalarda üst veri gövdeye değil başlıklara yazılır
+    response.headers["Server-Timing"] = ", ".join(
+        f'{issue};dur={timing.elapsed_ms};desc="{timing.source}"' for issue, timing in metadata.issues.items()
+    )
+    response.headers["X-Recommendations-Partial"] = "true" if metadata.partial else "false"
 
-            # Combine issue with product types for better search results
-            if product_types:
-                search_queries = [f"{keyword} {product_type}" for keyword in keywords[:2] for product_type in
-                                  product_types[:2]]
-                # Use the first few queries
-                query = " OR ".join(search_queries[:6])  # veya [:8]
 
-            else:
-                # Just use keywords if no product types
-                query = " OR ".join(keywords[:6])  # veya [:8]
+async def crawl_issue(issue):
+    # Katalog yenileyicisi için: sorun başına geniş bir aday havuzu tara
+    return await product_source.search_async(issue, config.CATALOG_POOL_SIZE, None)
 
-            # Search for products
-            products = search_products(query, count=product_count, min_rating=min_rating,
-                                       search_api_key=SEARCH_API_KEY, search_engine_id=SEARCH_ENGINE_ID)
-            recommendations[issue] = products
 
-    return recommendations
+# Öneri ürünlerinin kaynağı: trendyol (Google + kazıma) veya local (çevrimdışı katalog)
+product_source = create_product_source(
+    config.PRODUCT_SOURCE,
+    api_key=SEARCH_API_KEY, engine_id=SEARCH_ENGINE_ID, build_query=build_search_query,
+    path=config.LOCAL_CATALOG_PATH,
+    issue_terms={issue: PRODUCT_KEYWORDS.get(issue, []) + PRODUCT_TYPES.get(issue, [])
+                 for issue in PRODUCT_KEYWORDS},
+    reload_seconds=config.LOCAL_CATALOG_RELOAD_SECONDS,
+    max_per_brand=config.RANK_MAX_PER_BRAND,
+)
+use_catalog_pool = config.CATALOG_ENABLED and product_source.blocking
+
+
+# Her sorun için periyodik olarak yenilenen sıralı aday havuzu
+catalog_pool = CatalogPool(
+    create_backend(config.CATALOG_BACKEND, max_entries=len(PRODUCT_KEYWORDS) * 4,
+                   sqlite_path=config.CATALOG_SQLITE_PATH, redis_url=config.CACHE_REDIS_URL,
+                   table="catalog", prefix="skincare:"),
+    retention=config.CATALOG_REFRESH_SECONDS * 4,
+)
+catalog_refresher = CatalogRefresher(
+    catalog_pool, PRODUCT_KEYWORDS.keys(), crawl_issue,
+    interval=config.CATALOG_REFRESH_SECONDS,
+    lock_path=default_lock_path(config.CATALOG_SQLITE_PATH),
+    # Canlı aramayla aynı anahtar kelime özelliği için sorun başına arama sorgusunun parçaları
+    keywords={issue: query_keywords(build_search_query(issue)) for issue in PRODUCT_KEYWORDS},
+)
 
 # Endpoints
 @app.get("/")
 def read_root():
     return {"message": "Welcome! Visit /docs for API documentation."}
 
-@app.post("/analyze", response_model=SkinAnalysisResponse)
-async def analyze_endpoint(file: UploadFile = File(...)):
-    detected = await analyze_skin(file)
-    return SkinAnalysisResponse(detected_skin_issues=detected)
+@app.get("/healthz")
+def healthz():
+    # Canlılık: süreç yanıt veriyor (model yüklenirken de 200)
+    return {"status": "ok", "uptime_seconds": runtime.status()["uptime_seconds"]}
+
+@app.get("/readyz")
+def readyz():
+    # Hazırlık: model yüklendi ve ısındı; değilse 503 (yük dengeleyici trafik göndermesin)
+    status = runtime.status()
+    status["product_source"] = product_source.name
+    status["search_keys_configured"] = SEARCH_KEYS_CONFIGURED
+    return JSONResponse(status, status_code=200 if runtime.ready else 503)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+ANALYSIS_MODE_QUERY = "Analysis mode: face (first face), faces (every face) or regions (faces + sub-regions)"
+PROBABILITIES_QUERY = "Include raw and calibrated per-label probabilities"
+
+
+@app.post("/analyze", response_model=SkinAnalysisResponse, response_model_exclude_none=True)
+async def analyze_endpoint(file: UploadFile = File(...),
+                           mode: Optional[str] = Query(None, description=ANALYSIS_MODE_QUERY),
+                           probabilities: Optional[bool] = Query(None, description=PROBABILITIES_QUERY)):
+    return await analyze_upload(file, mode, _include_probabilities(probabilities))
+
+@app.post("/analyze/batch", response_class=StreamingResponse)
+async def analyze_batch_endpoint(request: Request,
+                                 files: Optional[List[UploadFile]] = File(None),
+                                 mode: Optional[str] = Query(None, description=ANALYSIS_MODE_QUERY),
+                                 probabilities: Optional[bool] = Query(None, description=PROBABILITIES_QUERY)):
+    """
+    Çok sayıda görseli tek istekte analiz eder. Girdi: multipart "files" alanları
+    (görsel ya da zip/tar arşivi) veya gövdesi doğrudan zip/tar olan istek.
+    Yanıt application/x-ndjson; her görsel için bittiği anda bir satır:
+    {"index", "filename", "status_code", "result": SkinAnalysisResponse | "error"}.
+    """
+    mode = resolve_analysis_mode(mode)
+    spools = []
+    if files:
+        # Multipart parçaları Starlette tarafından büyükse diske biriktirilmiş durumda
+        sources = [(upload.filename or f"file{i}", upload.file) for i, upload in enumerate(files)]
+    else:
+        # Ham arşiv gövdesini belleğe değil geçici dosyaya akıt; toplam boyutu
+        # UploadLimitMiddleware BATCH_ANALYZE_MAX_BYTES ile sınırlar
+        spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        spools.append(spool)
+        async for chunk in request.stream():
+            spool.write(chunk)
+        if not spool.tell():
+            spool.close()
+            raise HTTPException(status_code=400, detail="Görsel ya da arşiv gönderilmedi.")
+        spool.seek(0)
+        sources = [("body", spool)]
+    return StreamingResponse(analyze_batch_stream(sources, mode, _include_probabilities(probabilities), spools),
+                             media_type="application/x-ndjson")
 
 @app.get("/recommend", response_model=Dict[str, List[ProductResponse]])
 async def recommend_products(
+        response: Response,
         skin_issue: str = Query(..., description="Skin issue type (acne, stain, wrinkle, black_circle, pockmark)"),
         product_count: int = Query(3, description="Number of products to recommend"),
         min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)")
@@ -201,11 +597,12 @@ async def recommend_products(
         )
 
     # Get recommendations for the specific issue
-    recommendations = await get_recommendations(
+    recommendations, metadata = await recommend_with_metadata(
         [skin_issue],
         product_count=product_count,
         min_rating=min_rating
     )
+    set_timing_headers(response, metadata)
 
     return recommendations
 
@@ -213,13 +610,14 @@ async def recommend_products(
 async def analyze_and_recommend(
         file: UploadFile = File(...),
         product_count: int = Query(3, description="Number of products to recommend per skin issue"),
-        min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)")
+        min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)"),
+        mode: Optional[str] = Query(None, description=ANALYSIS_MODE_QUERY)
 ):
     # Analyze skin
-    detected_issues = await analyze_skin(file)
+    detected_issues = await analyze_skin(file, mode)
 
-    # Get product recommendations
-    recommendations = await get_recommendations(
+    # Get product recommendations (sorunlar eşzamanlı, toplam süre sınırlı)
+    recommendations, metadata = await recommend_with_metadata(
         detected_issues,
         product_count=product_count,
         min_rating=min_rating
@@ -227,19 +625,12 @@ async def analyze_and_recommend(
 
     return AnalysisAndRecommendationResponse(
         detected_skin_issues=detected_issues,
-        recommended_products=recommendations
+        recommended_products=recommendations,
+        recommendation_meta=metadata
     )
-from fastapi.responses import JSONResponse
-import time
-
-CACHE = {}
-TTL_SECONDS = 3600  # Cache süresi: 1 saat
-
-def is_cache_valid(timestamp):
-    return (time.time() - timestamp) < TTL_SECONDS
-
 @app.get("/skin-issue/products/{issue_type}", response_model=List[ProductResponse])
 async def get_skin_issue_products_only(
+    response: Response,
     issue_type: str = Path(..., description="Cilt sorunu tipi"),
     product_count: int = Query(3, description="Önerilecek ürün sayısı"),
     min_rating: Optional[float] = Query(None, description="Minimum ürün puanı (0-5)")
@@ -247,29 +638,15 @@ async def get_skin_issue_products_only(
     if issue_type not in LABELS:
         raise HTTPException(status_code=400, detail=f"Geçersiz cilt sorunu. Seçenekler: {LABELS}")
 
-    rating_key = str(min_rating) if min_rating is not None else "default"
-    cache_key = f"{issue_type}_{product_count}_{rating_key}"
-
-    if cache_key in CACHE:
-        products, timestamp = CACHE[cache_key]
-        if is_cache_valid(timestamp):
-            logging.info(f"[CACHE HIT] {cache_key}")
-            return products
-        else:
-            logging.info(f"[CACHE EXPIRED] {cache_key}")
-
-    # Yeni veri çek
-    logging.info(f"[CACHE MISS] {cache_key} — Yeni veri çekiliyor...")
-    recommendations = await get_recommendations(
+    # Önbellek get_recommendations katmanında (TTL, LRU, stale-while-revalidate)
+    recommendations, metadata = await recommend_with_metadata(
         [issue_type],
         product_count=product_count,
         min_rating=min_rating
     )
+    set_timing_headers(response, metadata)
 
-    products = recommendations.get(issue_type, [])
-    CACHE[cache_key] = (products, time.time())
-
-    return products
+    return recommendations.get(issue_type, [])
 
 
 @app.get("/skin-issue/info/{issue_type}", response_model=SkinIssueInfo)
@@ -0,0 +1,291 @@
+#metrics.py
+# Prometheus metin formatında dışa aktarılabilen hafif metrik kayıt defteri.
+import bisect
+import functools
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Milisaniye altı aşamalar (karar, ön işleme) ile ağ aşamaları (ürün sayfası) aynı histogramda
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._children.items())
+        for key, child in sorted(items):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _Value()
+            child.value += amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            child = self._children.get(self._key(labels))
+            return child.value if child else 0.0
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _Value()
+            child.value = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _Value()
+            child.value += amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Değeri her okumada fn() çağrılarak hesaplanan gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+            self._children.setdefault(key, _Value())
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            fn = self._functions.get(key)
+            child = self._children.get(key)
+        if fn is not None:
+            return float(fn())
+        return child.value if child else 0.0
+
+    def _render_child(self, key, child):
+        fn = self._functions.get(key)
+        value = float(fn()) if fn is not None else child.value
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class _HistogramValue:
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * n_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _HistogramValue(len(self.buckets))
+            child.counts[bisect.bisect_left(self.buckets, value)] += 1
+            child.sum += value
+            child.count += 1
+
+    def time(self, **labels) -> "_Timer":
+        """with HISTOGRAM.time(...): blok süresini (sn) gözlemler; istisnada da."""
+        return _Timer(self, labels)
+
+    def snapshot(self, **labels) -> Dict[str, object]:
+        with self._lock:
+            child = self._children.get(self._key(labels))
+            if child is None:
+                return {"count": 0, "sum": 0.0, "buckets": {}}
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets, child.counts):
+                running += count
+                cumulative[bound] = running
+            return {"count": child.count, "sum": child.sum, "buckets": cumulative}
+
+    def _render_child(self, key, child):
+        lines, running = [], 0
+        for bound, count in zip(self.buckets, child.counts):
+            running += count
+            le = 'le="' + ("+Inf" if math.isinf(bound) else repr(float(bound))) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {running}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        # Dekoratör olarak: her çağrı kendi zamanlayıcısını kullanır (iş parçacığı güvenli)
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.histogram, self.labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name, documentation, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, cls):
+                    raise ValueError(f"Metric {name} already registered as {existing.kind}")
+                return existing
+            metric = cls(name, documentation, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames=labelnames)
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames=labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames=labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# İstek içi aşamaların ortak süre histogramı; kendi histogramı olan aşamalar
+# (image_decode_seconds, inference_forward_seconds, inference_queue_wait_seconds,
+# cache_load_seconds) burada tekrarlanmaz
+STAGE_LATENCY = histogram("request_stage_seconds", "Wall time of one processing stage",
+                          labelnames=("stage",), buckets=STAGE_BUCKETS)
+
+
+HTTP_LATENCY = histogram("http_request_duration_seconds", "End-to-end request latency by route template",
+                         labelnames=("method", "route", "status"), buckets=STAGE_BUCKETS)
+
+
+def time_stage(stage: str) -> _Timer:
+    """with time_stage("decision"): ... ya da @time_stage("product_fetch") ile fonksiyon."""
+    return STAGE_LATENCY.time(stage=stage)
+
+
+class RequestMetricsMiddleware:
+    """
+    Saf ASGI ara katmanı: her HTTP isteğinin toplam süresini (akış yanıtlarında
+    gövde bitene kadar) eşleşen yol şablonu ve durum koduyla kaydeder. Yol
+    parametreleri etikete girmez; eşleşmeyen yollar "unmatched" sayılır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=scope["method"], route=route,
+                                 status=str(status))
@@ -0,0 +1,134 @@
+#http_client.py
+# Arama ve ürün sayfası istekleri için uzun ömürlü, havuzlanmış HTTP bağlantıları.
+# Her istek için yeni TCP/TLS el sıkışması yapmak yerine keep-alive bağlantılar
+# yeniden kullanılır; 429/5xx yanıtlarında geri çekilmeli yeniden deneme yapılır.
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import config
+from metrics import counter, gauge
+
+REQUESTS = counter("scraper_http_requests_total", "HTTP requests issued by the scraper", labelnames=("host",))
+CONNECTIONS = counter("scraper_http_connections_opened_total",
+                      "New TCP/TLS connections opened by the scraper", labelnames=("host",))
+REUSE_RATIO = gauge("scraper_http_connection_reuse_ratio",
+                    "Share of scraper requests served over an already open connection", labelnames=("host",))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        CONNECTIONS.inc(host=self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        CONNECTIONS.inc(host=self.host)
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class HTTPClient:
+    """
+    Tüm iş parçacıkları tek bir bağlantı havuzunu (adapter) paylaşır; Session
+    nesnesi çerez kabı iş parçacığı güvenli olmadığından iş parçacığı başına tutulur.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 8, retries: int = 2,
+                 backoff_factor: float = 0.3, connect_timeout: float = 3.05, read_timeout: float = 10.0):
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_connections: tutulan host havuzu sayısı, pool_maxsize: host başına açık bağlantı
+        self.adapter = _CountingAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                        max_retries=retry, pool_block=False)
+        self._local = threading.local()
+        self._hosts = set()
+        self._hosts_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            self._local.session = session
+        return session
+
+    def _track(self, url):
+        host = urlparse(url).hostname or ""
+        REQUESTS.inc(host=host)
+        if host not in self._hosts:
+            with self._hosts_lock:
+                if host not in self._hosts:
+                    self._hosts.add(host)
+                    REUSE_RATIO.set_function(lambda h=host: self.reuse_ratio(h), host=host)
+
+    def get(self, url, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        self._track(url)
+        return self._session().get(url, **kwargs)
+
+    @staticmethod
+    def reuse_ratio(host: str) -> float:
+        requests_made = REQUESTS.value(host=host)
+        if not requests_made:
+            return 0.0
+        return max(0.0, 1.0 - CONNECTIONS.value(host=host) / requests_made)
+
+    def stats(self):
+        # Host başına istek, açılan bağlantı ve yeniden kullanım oranı
+        with self._hosts_lock:
+            hosts = sorted(self._hosts)
+        return {
+            host: {
+                "requests": int(REQUESTS.value(host=host)),
+                "connections_opened": int(CONNECTIONS.value(host=host)),
+                "reuse_ratio": round(self.reuse_ratio(host), 3),
+            }
+            for host in hosts
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient(
+                    pool_connections=config.SCRAPER_POOL_CONNECTIONS,
+                    pool_maxsize=config.SCRAPER_POOL_MAXSIZE,
+                    retries=config.SCRAPER_RETRIES,
+                    backoff_factor=config.SCRAPER_BACKOFF,
+                    connect_timeout=config.SCRAPER_CONNECT_TIMEOUT,
+                    read_timeout=config.SCRAPER_READ_TIMEOUT,
+                )
+    return _client
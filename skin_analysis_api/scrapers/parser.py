@@ -0,0 +1,859 @@
+#parser.py
+# Trendyol ürün sayfasından ad, fiyat, puan, görsel ve marka çıkaran ayrıştırıcılar.
+#
+# Hızlı yol önce gömülü yapısal veriye (JSON-LD, ürün state JSON'u) bakar; tüm alanlar
+# bulunursa HTML ağacı hiç kurulmaz. Eksik kalırsa tüm CSS seçicileri belgenin tek
+# bir taramasında değerlendirilir (lxml varsa libxml2, yoksa standart html.parser).
+import codecs
+import json
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from lxml import etree
+except ImportError:  # lxml yoksa standart kütüphane ayrıştırıcısı kullanılır
+    etree = None
+
+# Alan başına seçiciler; sıra önceliktir (eski BeautifulSoup sürümüyle aynı)
+NAME_SELECTORS = [
+    ".pr-new-br", ".prdct-desc-cntnr-name", "h1.pr-new-br",
+    ".product-name", ".product-detail-name"
+]
+PRICE_SELECTORS = [
+    ".prc-dsc", ".product-price", ".price-container",
+    ".pr-bx-w .prc-dsc", ".pr-bx-nm .prc-dsc",
+    ".pr-bx-w .prc-org", "[data-testid='price-current-price']",
+    ".product-price-container .prc-dsc"
+]
+RATING_SELECTORS = [
+    ".tltp-avg", ".rating-score", ".star-w .rt",
+    "[data-testid='rating-score']"
+]
+IMAGE_SELECTORS = [
+    ".product-slide img", ".gallery-modal-content img",
+    ".base-product-image", ".product-img",
+    "[data-testid='product-image']", ".ph-gl-img"
+]
+BRAND_SELECTORS = [
+    ".pr-new-br", ".prdct-desc-cntnr-ttl",
+    ".product-brand", ".brand-name"
+]
+
+FIELDS = ("name", "price", "rating", "image_url", "brand")
+IMAGE_CDN = "https://cdn.dsmcdn.com"
+
+_PRICE_CHARS = re.compile(r'[^\d,.]')
+_RATING_NUMBER = re.compile(r'\d+\.\d+|\d+')
+_JSON_LD = re.compile(
+    r'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script\s*>', re.I | re.S
+)
+_INITIAL_STATE_NAME = "__PRODUCT_DETAIL_APP_INITIAL_STATE__"
+_INITIAL_STATE = re.compile(re.escape(_INITIAL_STATE_NAME) + r'\s*=\s*')
+_RAW_TEXT_TAGS = frozenset(("script", "style", "template"))
+_VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+))
+
+
+def empty_product(url: str) -> Dict:
+    return {
+        "name": None,
+        "purchase_link": url,
+        "price": None,
+        "rating": None,
+        "image_url": None,
+        "brand": None,  # Marka bilgisini ekliyoruz
+        "review_count": None  # Sıralama için; yalnızca yapısal veriden okunur
+    }
+
+
+def _missing(product: Dict) -> bool:
+    return any(not product[field] for field in FIELDS)
+
+
+def clean_price(text: str) -> str:
+    return _PRICE_CHARS.sub('', text)
+
+
+def parse_rating(text: str) -> Optional[float]:
+    match = _RATING_NUMBER.search(text.replace(',', '.'))
+    return float(match.group()) if match else None
+
+
+def absolute_image_url(url: str) -> str:
+    if url.startswith("//"):
+        return "https:" + url
+    if url.startswith("/"):
+        return IMAGE_CDN + url
+    return url
+
+
+def format_price(value) -> Optional[str]:
+    """Sayısal fiyatı sayfadaki gösterimle aynı biçime getirir: 1299.9 -> "1.299,90"."""
+    try:
+        amount = float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    if amount <= 0:
+        return None
+    if amount.is_integer():
+        text = f"{int(amount):,}"
+    else:
+        text = f"{amount:,.2f}"
+    return text.replace(",", "\x00").replace(".", ",").replace("\x00", ".")
+
+
+# --- Yapısal veri (JSON-LD ve ürün state JSON'u) ---
+
+def _iter_json_ld(html: str):
+    for match in _JSON_LD.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop(0)
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                if "@graph" in item:
+                    stack.extend(item["@graph"] if isinstance(item["@graph"], list) else [item["@graph"]])
+                yield item
+
+
+def _is_product(item: Dict) -> bool:
+    kind = item.get("@type")
+    return kind == "Product" or (isinstance(kind, list) and "Product" in kind)
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _review_count(value) -> Optional[int]:
+    try:
+        return int(str(value).replace(".", "")) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _fill_from_json_ld(product: Dict, data: Dict):
+    if not product["name"] and isinstance(data.get("name"), str):
+        product["name"] = data["name"].strip()
+    if not product["price"]:
+        offers = _first(data.get("offers"))
+        if isinstance(offers, dict):
+            product["price"] = format_price(offers.get("price", offers.get("lowPrice")))
+    if not product["rating"]:
+        aggregate = data.get("aggregateRating")
+        if isinstance(aggregate, dict) and aggregate.get("ratingValue") is not None:
+            try:
+                product["rating"] = float(str(aggregate["ratingValue"]).replace(",", "."))
+            except ValueError:
+                pass
+    if product.get("review_count") is None:
+        aggregate = data.get("aggregateRating")
+        if isinstance(aggregate, dict):
+            product["review_count"] = _review_count(aggregate.get("ratingCount", aggregate.get("reviewCount")))
+    if not product["image_url"]:
+        image = _first(data.get("image"))
+        if isinstance(image, dict):
+            image = image.get("url") or image.get("contentUrl")
+        if isinstance(image, str) and image:
+            product["image_url"] = absolute_image_url(image)
+    if not product["brand"]:
+        brand = data.get("brand")
+        if isinstance(brand, dict):
+            brand = brand.get("name")
+        if isinstance(brand, str) and brand.strip():
+            product["brand"] = brand.strip()
+
+
+def _initial_state_product(html: str, pos: int = 0) -> Optional[Dict]:
+    match = _INITIAL_STATE.search(html, pos)
+    if not match:
+        return None
+    try:
+        state, _ = json.JSONDecoder().raw_decode(html, match.end())
+    except ValueError:
+        return None
+    if not isinstance(state, dict):
+        return None
+    data = state.get("product", state)
+    return data if isinstance(data, dict) else None
+
+
+def _fill_from_state(product: Dict, data: Dict):
+    if not product["name"] and isinstance(data.get("name"), str):
+        product["name"] = data["name"].strip()
+    if not product["price"]:
+        price = data.get("price")
+        if isinstance(price, dict):
+            selling = price.get("sellingPrice") or price.get("discountedPrice") or {}
+            value = selling.get("value") if isinstance(selling, dict) else selling
+            product["price"] = format_price(value)
+    if not product["rating"]:
+        score = data.get("ratingScore")
+        if isinstance(score, dict) and score.get("averageRating"):
+            try:
+                product["rating"] = float(score["averageRating"])
+            except (TypeError, ValueError):
+                pass
+    if product.get("review_count") is None:
+        score = data.get("ratingScore")
+        if isinstance(score, dict):
+            product["review_count"] = _review_count(score.get("totalCount", score.get("totalRatingCount")))
+    if not product["image_url"]:
+        image = _first(data.get("images"))
+        if isinstance(image, str) and image:
+            product["image_url"] = absolute_image_url(image)
+    if not product["brand"]:
+        brand = data.get("brand")
+        if isinstance(brand, dict):
+            brand = brand.get("name")
+        if isinstance(brand, str) and brand.strip():
+            product["brand"] = brand.strip()
+
+
+def fill_from_structured(product: Dict, html: str) -> bool:
+    """
+    Eksik alanları JSON-LD Product nesnesinden, hâlâ eksik varsa ürün state JSON'undan
+    doldurur. Tüm alanlar dolduysa True döner (HTML taramasına gerek kalmaz).
+    """
+    for item in _iter_json_ld(html):
+        if _is_product(item):
+            _fill_from_json_ld(product, item)
+            if not _missing(product):
+                return True
+    state = _initial_state_product(html)
+    if state is not None:
+        _fill_from_state(product, state)
+    return not _missing(product)
+
+
+# --- Derlenmiş seçiciler ve tek geçişli ağaç taraması ---
+
+class _Compound:
+    """tag.sinif1.sinif2[attr='v'] biçimindeki basit seçici."""
+    __slots__ = ("tag", "classes", "attrs")
+
+    def __init__(self, text: str):
+        self.tag = None
+        self.classes = []
+        self.attrs = []
+        for tag, cls, attr, value in re.findall(
+                r"^([a-zA-Z][\w-]*)|\.([\w-]+)|\[([\w-]+)=['\"]?([^'\"\]]*)['\"]?\]", text):
+            if tag:
+                self.tag = tag.lower()
+            elif cls:
+                self.classes.append(cls)
+            else:
+                self.attrs.append((attr.lower(), value))
+
+    def matches(self, tag: str, classes, attrs: Dict) -> bool:
+        if self.tag and self.tag != tag:
+            return False
+        for cls in self.classes:
+            if cls not in classes:
+                return False
+        for name, value in self.attrs:
+            if attrs.get(name) != value:
+                return False
+        return True
+
+    def index_key(self) -> Tuple[str, str]:
+        if self.classes:
+            return ("class", self.classes[0])
+        if self.attrs:
+            return ("attr", self.attrs[0][0])
+        return ("tag", self.tag or "*")
+
+
+class CompiledSelector:
+    """Yalnızca alt-öğe (boşluk) birleştiricisi içeren CSS seçicisi."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [_Compound(part) for part in text.split()]
+
+    def matches(self, element, ancestors) -> bool:
+        *prefix, last = self.parts
+        if not last.matches(*element):
+            return False
+        # Sağdan sola: her önceki parça için en yakın uyan ataya açgözlü eşleme
+        i = len(ancestors) - 1
+        for part in reversed(prefix):
+            while i >= 0 and not part.matches(*ancestors[i]):
+                i -= 1
+            if i < 0:
+                return False
+            i -= 1
+        return True
+
+
+class _Rule:
+    """Bir alanın öncelik sıralı seçicileri ve bulunan değerin nasıl işleneceği."""
+
+    def __init__(self, field: str, selectors: List[str], attribute: Optional[str] = None,
+                 convert=None, fall_through: bool = False):
+        self.field = field
+        self.selectors = selectors
+        self.attribute = attribute
+        self.convert = convert
+        # True: ilk eşleşme kullanılamazsa sonraki seçiciye geç (puan, görsel)
+        self.fall_through = fall_through
+
+
+def _convert_rating(text):
+    try:
+        return parse_rating(text)
+    except ValueError:
+        return None
+
+
+def _convert_image(src):
+    if src is None:
+        return None
+    return "https:" + src if src.startswith("//") else src
+
+
+RULES = [
+    _Rule("name", NAME_SELECTORS),
+    _Rule("price", PRICE_SELECTORS, convert=clean_price),
+    _Rule("rating", RATING_SELECTORS, convert=_convert_rating, fall_through=True),
+    _Rule("image_url", IMAGE_SELECTORS, attribute="src", convert=_convert_image, fall_through=True),
+    _Rule("brand", BRAND_SELECTORS),
+]
+
+_UNSEEN = object()
+
+
+class _SelectorPlan:
+    """Tüm alanların seçicilerini tekilleştirir ve son parçalarına göre indeksler."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.selectors: Dict[str, CompiledSelector] = {}
+        for rule in rules:
+            for text in rule.selectors:
+                self.selectors.setdefault(text, CompiledSelector(text))
+        self.index: Dict[Tuple[str, str], List[CompiledSelector]] = {}
+        for selector in self.selectors.values():
+            self.index.setdefault(selector.parts[-1].index_key(), []).append(selector)
+        self.attribute_of = {}
+        for rule in rules:
+            for text in rule.selectors:
+                if rule.attribute:
+                    self.attribute_of[text] = rule.attribute
+
+
+PLAN = _SelectorPlan(RULES)
+
+
+class ProductFieldExtractor:
+    """
+    lxml parser target arayüzü (start/end/data/comment/close). Belge bir kez taranırken
+    her seçicinin belge sırasındaki ilk eşleşmesi kaydedilir; close() alanları eski
+    BeautifulSoup seçim kurallarıyla (öncelik sırası, get_text(strip=True), JSON-LD ile
+    eksik tamamlama) birleştirir. Tüm alanlar kesinleştiğinde `done` True olur; çağıran
+    taramayı orada kesebilir.
+    """
+
+    def __init__(self, url: str = "", plan: _SelectorPlan = PLAN):
+        self.url = url
+        self.plan = plan
+        self.first_match: Dict[str, object] = {}
+        self.done = False
+        self._stack: List[Tuple[str, frozenset, Dict]] = []
+        self._captures: List[list] = []  # [derinlik, seçici, metin parçaları]
+        self._text: List[str] = []
+        self._raw_depth = 0
+        self._json_ld: Optional[str] = None
+        self._json_ld_parts: Optional[List[str]] = None
+
+    # -- parser target arayüzü --
+    def start(self, tag, attrib):
+        self._flush()
+        tag = tag.lower()
+        attrs = dict(attrib)
+        classes = frozenset(attrs.get("class", "").split())
+        element = (tag, classes, attrs)
+        candidates = self._candidates(tag, classes, attrs)
+        if candidates:
+            for selector in candidates:
+                if selector.text in self.first_match or not selector.matches(element, self._stack):
+                    continue
+                attribute = self.plan.attribute_of.get(selector.text)
+                if attribute:
+                    self.first_match[selector.text] = attrs.get(attribute)
+                else:
+                    self.first_match[selector.text] = _UNSEEN
+                    self._captures.append([len(self._stack), selector, []])
+            self._update_done()
+        if tag in _RAW_TEXT_TAGS:
+            self._raw_depth += 1
+            if (tag == "script" and self._json_ld is None and self._json_ld_parts is None
+                    and attrs.get("type", "").lower() == "application/ld+json"):
+                self._json_ld_parts = []
+        self._stack.append(element)
+        if tag in _VOID_TAGS:
+            self.end(tag)
+
+    def end(self, tag):
+        self._flush()
+        tag = tag.lower()
+        # Eşleşmeyen kapanış etiketlerini yok say; eşleşene kadar açık öğeleri kapat
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > i:
+            closed = self._stack.pop()
+            self._close_element(closed[0], len(self._stack))
+
+    def data(self, data):
+        self._text.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        while self._stack:
+            closed = self._stack.pop()
+            self._close_element(closed[0], len(self._stack))
+        return self.result()
+
+    # -- iç işleyiş --
+    def _candidates(self, tag, classes, attrs):
+        index = self.plan.index
+        found = []
+        for cls in classes:
+            found.extend(index.get(("class", cls), ()))
+        for name in attrs:
+            found.extend(index.get(("attr", name), ()))
+        found.extend(index.get(("tag", tag), ()))
+        found.extend(index.get(("tag", "*"), ()))
+        return found
+
+    def _flush(self):
+        if not self._text:
+            return
+        text = "".join(self._text)
+        self._text.clear()
+        if self._raw_depth:
+            if self._json_ld_parts is not None:
+                self._json_ld_parts.append(text)
+            return
+        stripped = text.strip()
+        if stripped:
+            for capture in self._captures:
+                capture[2].append(stripped)
+
+    def _close_element(self, tag, depth):
+        if tag in _RAW_TEXT_TAGS:
+            self._raw_depth = max(0, self._raw_depth - 1)
+            if tag == "script" and self._json_ld_parts is not None:
+                self._json_ld = "".join(self._json_ld_parts)
+                self._json_ld_parts = None
+        if self._captures and self._captures[-1][0] >= depth:
+            remaining = []
+            for capture in self._captures:
+                if capture[0] == depth:
+                    self.first_match[capture[1].text] = "".join(capture[2])
+                else:
+                    remaining.append(capture)
+            self._captures = remaining
+            self._update_done()
+
+    def _resolve(self, rule: _Rule, final: bool):
+        """(karar_verildi, değer) — öncelikli seçicilere bakarak alanın değerini seçer."""
+        for text in rule.selectors:
+            raw = self.first_match.get(text, None if final else _UNSEEN)
+            if raw is _UNSEEN:
+                return False, None
+            if text not in self.first_match:
+                continue  # belgede hiç eşleşmedi
+            if rule.attribute and raw is None:
+                continue  # img var ama src yok
+            value = rule.convert(raw) if rule.convert else raw
+            if value is None and rule.fall_through:
+                continue
+            return True, value
+        return True, None
+
+    def decided_fields(self) -> Dict:
+        """Şimdiden kesinleşmiş ve boş olmayan alanlar (belgenin geri kalanı değiştiremez)."""
+        fields = {}
+        for rule in self.plan.rules:
+            decided, value = self._resolve(rule, final=False)
+            if decided and value:
+                fields[rule.field] = value
+        return fields
+
+    def _update_done(self):
+        self.done = len(self.decided_fields()) == len(self.plan.rules)
+
+    def result(self) -> Dict:
+        product = empty_product(self.url)
+        for rule in self.plan.rules:
+            _, value = self._resolve(rule, final=True)
+            product[rule.field] = value
+
+        # Marka bilgisini ürün adından çıkarmayı dene
+        if not product["brand"] and product["name"]:
+            first_word = product["name"].split()[0]
+            # Genellikle ilk kelime markadır
+            if len(first_word) > 2:  # Çok kısa değilse
+                product["brand"] = first_word
+
+        # Belgedeki ilk JSON-LD ile eksikleri tamamla (eski sürümle aynı kurallar)
+        if self._json_ld and _missing(product):
+            try:
+                data = json.loads(self._json_ld)
+                if isinstance(data, dict):
+                    if not product["name"] and "name" in data:
+                        product["name"] = data["name"]
+                    if not product["price"] and "price" in (data.get("offers") or {}):
+                        product["price"] = str(data["offers"]["price"])
+                    if not product["rating"] and "ratingValue" in (data.get("aggregateRating") or {}):
+                        product["rating"] = float(data["aggregateRating"]["ratingValue"])
+                    if not product["image_url"] and data.get("image"):
+                        product["image_url"] = _first(data["image"])
+                    if not product["brand"] and "name" in (data.get("brand") or {}):
+                        product["brand"] = data["brand"]["name"]
+            except Exception as e:
+                logging.error(f"JSON-LD parsing error: {e}")
+        return product
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _EarlyExitTarget:
+    """Tüm alanlar kesinleşince lxml taramasını keser."""
+
+    def __init__(self, extractor: ProductFieldExtractor):
+        self.extractor = extractor
+
+    def start(self, tag, attrib):
+        self.extractor.start(tag, attrib)
+        if self.extractor.done:
+            raise _StopParsing()
+
+    def end(self, tag):
+        self.extractor.end(tag)
+        if self.extractor.done:
+            raise _StopParsing()
+
+    def data(self, data):
+        self.extractor.data(data)
+
+    def comment(self, text):
+        self.extractor.comment(text)
+
+    def close(self):
+        return None
+
+
+class _StdlibFeeder(HTMLParser):
+    """lxml yokken aynı target arayüzünü html.parser olaylarıyla besler."""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag.lower() not in _VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+
+def new_feeder(target, encoding: str = "utf-8"):
+    """
+    target'ı besleyen artımlı ayrıştırıcı; feed() ve close() destekler. lxml
+    ayrıştırıcısı bayt, html.parser yedeği metin bekler.
+    """
+    if etree is not None:
+        return etree.HTMLParser(target=target, encoding=encoding)
+    return _StdlibFeeder(target)
+
+
+def scan_html(html: str, url: str = "") -> Dict:
+    """Tüm seçicileri tek taramada değerlendirir; sonuç eski ayrıştırıcınınkiyle aynıdır."""
+    extractor = ProductFieldExtractor(url)
+    if etree is not None:
+        parser = etree.HTMLParser(target=_EarlyExitTarget(extractor), encoding="utf-8")
+        try:
+            parser.feed(html.encode("utf-8"))
+            parser.close()
+        except _StopParsing:
+            pass
+        except etree.LxmlError as e:
+            logging.warning(f"HTML scan stopped early for {url}: {e}")
+    else:
+        feeder = _StdlibFeeder(extractor)
+        feeder.feed(html)
+        feeder.close()
+    return extractor.close()
+
+
+class _StructuredStream:
+    """
+    Gelen metinde tamamlanan JSON-LD bloklarını ve state JSON'unu sırayla işler.
+    Her parça yalnızca bir kez taranır (bölünmüş etiket/ad için kısa bir örtüşmeyle);
+    tampon en eski kapanmamış <script> ya da bekleyen state bloğundan öncesini tutmaz.
+    """
+
+    def __init__(self, product: Dict):
+        self.product = product
+        self.buffer = ""
+        self._pos = 0            # <script / </script aramasının devam edeceği yer
+        self._open = None        # kapanmamış <script başlangıcı
+        self._state_pos = 0      # state adı aramasının devam edeceği yer
+        self._state_at = None    # bulunan state adının başlangıcı (bloğun kapanması bekleniyor)
+        self._state_done = False
+
+    def _scan_scripts(self):
+        buffer = self.buffer
+        while True:
+            if self._open is None:
+                at = buffer.find("<script", self._pos)
+                if at == -1:
+                    # Bölünmüş etiket payı: sondaki eksik "<scrip" bir sonraki parçada tamamlanır
+                    self._pos = max(self._pos, len(buffer) - len("<script") + 1)
+                    return
+                self._open, self._pos = at, at + len("<script")
+            close = buffer.find("</script", self._pos)
+            end = buffer.find(">", close) if close != -1 else -1
+            if end == -1:
+                self._pos = max(self._pos, len(buffer) - len("</script") + 1 if close == -1 else close)
+                return
+            match = _JSON_LD.match(buffer, self._open)
+            if match:
+                for item in _iter_json_ld(match.group(0)):
+                    if _is_product(item):
+                        _fill_from_json_ld(self.product, item)
+            self._open, self._pos = None, end + 1
+
+    def _scan_state(self):
+        buffer = self.buffer
+        if self._state_at is None:
+            at = buffer.find(_INITIAL_STATE_NAME, self._state_pos)
+            if at == -1:
+                self._state_pos = max(self._state_pos, len(buffer) - len(_INITIAL_STATE_NAME) + 1)
+                return
+            self._state_at, self._state_pos = at, at + len(_INITIAL_STATE_NAME)
+        close = buffer.find("</script", self._state_pos)
+        if close == -1:
+            self._state_pos = max(self._state_pos, len(buffer) - len("</script") + 1)
+            return
+        self._state_done = True
+        state = _initial_state_product(buffer, self._state_at)
+        if state is not None:
+            _fill_from_state(self.product, state)
+
+    def _trim(self):
+        # Gerekmeyen öneki at; tüm konumlar yeni tampona göre kaydırılır
+        keep = self._open if self._open is not None else self._pos
+        if not self._state_done:
+            keep = min(keep, self._state_at if self._state_at is not None else self._state_pos)
+        if keep <= 0:
+            return
+        self.buffer = self.buffer[keep:]
+        self._pos -= keep
+        if self._open is not None:
+            self._open -= keep
+        self._state_pos = max(0, self._state_pos - keep)
+        if self._state_at is not None:
+            self._state_at -= keep
+
+    def feed(self, text: str) -> bool:
+        self.buffer += text
+        self._scan_scripts()
+        if not self._state_done and _missing(self.product):
+            self._scan_state()
+        self._trim()
+        return not _missing(self.product)
+
+
+class StreamingProductParser:
+    """
+    Yanıt gövdesini parça parça alır; fast modunda yapısal veri ve HTML taraması
+    birlikte beslenir. Tüm alanlar bulunduğunda `done` True olur ve çağıran
+    bağlantıyı gövdenin kalanını indirmeden kapatabilir.
+
+    Not: fast modunda erken kesilen bir sayfada, kesme noktasından sonra gelen
+    JSON-LD artık okunmaz; alan değerleri o durumda HTML seçicilerinden gelir.
+    """
+
+    def __init__(self, url: str = "", mode: str = "fast", encoding: Optional[str] = None):
+        if mode not in ("fast", "tree"):
+            raise ValueError(f"Streaming is not supported for parser mode {mode!r}")
+        self.url = url
+        self.mode = mode
+        encoding = encoding or "utf-8"
+        self.extractor = ProductFieldExtractor(url)
+        self._feeder = new_feeder(self.extractor, encoding)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._structured = _StructuredStream(empty_product(url)) if mode == "fast" else None
+        self.bytes_fed = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done or not chunk:
+            return self.done
+        self.bytes_fed += len(chunk)
+        text = self._decoder.decode(chunk)
+        if etree is not None:
+            self._feeder.feed(chunk)
+        else:
+            self._feeder.feed(text)
+
+        if self._structured is not None:
+            if self._structured.feed(text):
+                self.done = True
+                return True
+            # Yapısal veriden eksik kalanlar kesinleşmiş HTML alanlarıyla tamamlanıyor mu?
+            decided = self.extractor.decided_fields()
+            self.done = all(self._structured.product[field] or decided.get(field) for field in FIELDS)
+        else:
+            self.done = self.extractor.done
+        return self.done
+
+    def close(self) -> Dict:
+        if not self.done:
+            # Gövde sonuna kadar okundu: ayrıştırıcıdaki artık veriyi de işle
+            try:
+                self._feeder.close()
+            except Exception as e:
+                logging.warning(f"HTML scan stopped early for {self.url}: {e}")
+        scanned = self.extractor.close()
+        if self._structured is None:
+            return scanned
+        product = self._structured.product
+        for field in FIELDS:
+            if not product[field] and scanned[field]:
+                product[field] = scanned[field]
+        return product
+
+
+def parse_product_html(html: str, url: str = "", mode: str = "fast") -> Dict:
+    """
+    mode:
+      fast   - önce JSON-LD / state JSON, eksik kalırsa tek geçişli HTML taraması
+      tree   - yalnızca tek geçişli tarama (eski sürümle birebir aynı sonuç)
+      legacy - eski BeautifulSoup sürümü (karşılaştırma için)
+    """
+    if mode == "legacy":
+        return parse_product_html_legacy(html, url)
+    if mode == "tree":
+        return scan_html(html, url)
+
+    product = empty_product(url)
+    if fill_from_structured(product, html):
+        return product
+    scanned = scan_html(html, url)
+    for field in FIELDS:
+        if not product[field] and scanned[field]:
+            product[field] = scanned[field]
+    return product
+
+
+def parse_product_html_legacy(html: str, url: str = "") -> Dict:
+    from bs4 import BeautifulSoup
+
+    product = empty_product(url)
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Product name
+    for selector in NAME_SELECTORS:
+        name_elem = soup.select_one(selector)
+        if name_elem:
+            product["name"] = name_elem.get_text(strip=True)
+            break
+
+    # Price
+    for selector in PRICE_SELECTORS:
+        price_elem = soup.select_one(selector)
+        if price_elem:
+            price_text = re.sub(r'[^\d,.]', '', price_elem.get_text(strip=True))
+            product["price"] = price_text
+            break
+
+    # Rating
+    for selector in RATING_SELECTORS:
+        rating_elem = soup.select_one(selector)
+        if rating_elem:
+            try:
+                rating_text = rating_elem.get_text(strip=True).replace(',', '.')
+                match = re.search(r'\d+\.\d+|\d+', rating_text)
+                if match:
+                    product["rating"] = float(match.group())
+                    break
+            except:
+                pass
+
+    # Image
+    for selector in IMAGE_SELECTORS:
+        img_elem = soup.select_one(selector)
+        if img_elem and img_elem.has_attr("src"):
+            img_url = img_elem["src"]
+            if img_url.startswith("//"):
+                img_url = "https:" + img_url
+            product["image_url"] = img_url
+            break
+
+    # Brand - Marka bilgisini çıkarmak için eklendi
+    for selector in BRAND_SELECTORS:
+        brand_elem = soup.select_one(selector)
+        if brand_elem:
+            product["brand"] = brand_elem.get_text(strip=True)
+            break
+
+    # Marka bilgisini ürün adından çıkarmayı dene
+    if not product["brand"] and product["name"]:
+        first_word = product["name"].split()[0]
+        # Genellikle ilk kelime markadır
+        if len(first_word) > 2:  # Çok kısa değilse
+            product["brand"] = first_word
+
+    # JSON-LD
+    json_ld = soup.find("script", {"type": "application/ld+json"})
+    if json_ld:
+        try:
+            data = json.loads(json_ld.string)
+            if not product["name"] and "name" in data:
+                product["name"] = data["name"]
+            if not product["price"] and "offers" in data and "price" in data["offers"]:
+                product["price"] = str(data["offers"]["price"])
+            if not product["rating"] and "aggregateRating" in data and "ratingValue" in data["aggregateRating"]:
+                product["rating"] = float(data["aggregateRating"]["ratingValue"])
+            if not product["image_url"] and "image" in data:
+                product["image_url"] = data["image"]
+            if not product["brand"] and "brand" in data and "name" in data["brand"]:
+                product["brand"] = data["brand"]["name"]
+        except Exception as e:
+            logging.error(f"JSON-LD parsing error: {e}")
+
+    return product
@@ -0,0 +1,129 @@
+#product_store.py
+# Kanonik ürün URL'si ile anahtarlanan kalıcı ürün detay deposu. Ayrıştırılmış
+# alanlar ETag/Last-Modified ile birlikte saklanır; TTL dolunca sayfa koşullu GET
+# ile doğrulanır ve 304 gelirse indirme/ayrıştırma yapılmadan kayıt tazelenir.
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Callable, NamedTuple, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from metrics import counter
+
+LOOKUPS = counter("product_store_lookups_total",
+                  "Product detail lookups by result (hit, not_modified, refreshed, miss, stale_error)",
+                  labelnames=("result",))
+
+TRENDYOL_HOSTS = ("trendyol.com", "www.trendyol.com", "m.trendyol.com")
+
+
+class PageFetch(NamedTuple):
+    status: Optional[int]  # None: ağ/ayrıştırma hatası
+    product: dict
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def canonical_product_url(url: str) -> str:
+    """
+    Aynı ürünün farklı arama sonuçlarındaki yazımlarını tek anahtara indirger:
+    küçük harfli host, sorgu/parça ve sondaki eğik çizgi olmadan; Trendyol için
+    her zaman https://www.trendyol.com.
+    """
+    parts = urlsplit(url.strip())
+    scheme, host = parts.scheme.lower() or "https", parts.netloc.lower()
+    if host in TRENDYOL_HOSTS:
+        scheme, host = "https", "www.trendyol.com"
+    path = re.sub(r"/+$", "", parts.path) or "/"
+    return urlunsplit((scheme, host, path, "", ""))
+
+
+class ProductStore:
+    """
+    resolve(url) sırası:
+      taze kayıt (ttl içinde)      -> indirme yok
+      eski kayıt + doğrulayıcılar  -> koşullu GET; 304 ise kayıt yeniden tarihlenir
+      kayıt yok / 200              -> sayfa indirilip ayrıştırılır ve saklanır
+    Doğrulama başarısız olursa eski kayıt döner. Kayıtlar retention süresince
+    tutulur ki TTL'den sonra da koşullu doğrulamaya aday kalsınlar.
+
+    fetch(url, etag, last_modified) -> PageFetch
+    Dönen ürünlerde fetched_at (kaydın son doğrulanma zamanı) bulunur; sıralama
+    tazelik özelliği için kullanır.
+    """
+
+    def __init__(self, backend, fetch: Callable[..., PageFetch], ttl: float, retention: float,
+                 lock_stripes: int = 64):
+        self.backend = backend
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retention = max(retention, ttl)
+        # Aynı URL'ye eşzamanlı iki çözümleme tek indirme yapsın diye şeritli kilitler
+        self._locks = [threading.Lock() for _ in range(max(1, lock_stripes))]
+
+    @staticmethod
+    def _key(canonical_url: str) -> str:
+        return f"product:{canonical_url}"
+
+    def _lock(self, key: str) -> threading.Lock:
+        return self._locks[zlib.crc32(key.encode("utf-8")) % len(self._locks)]
+
+    def _read(self, key: str):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logging.error(f"Product store read error for {key}: {e}")
+            return None
+
+    def _write(self, key: str, record: dict):
+        try:
+            self.backend.set(key, record, self.retention)
+        except Exception as e:
+            logging.error(f"Product store write error for {key}: {e}")
+
+    @staticmethod
+    def _product(record: dict, fetched_at: float) -> dict:
+        product = dict(record["product"])
+        product["fetched_at"] = fetched_at
+        return product
+
+    def resolve(self, url: str) -> dict:
+        canonical = canonical_product_url(url)
+        key = self._key(canonical)
+        entry = self._read(key)
+        if entry is not None and time.time() - entry.stored_at < self.ttl:
+            LOOKUPS.inc(result="hit")
+            return self._product(entry.value, entry.stored_at)
+
+        with self._lock(key):
+            # Kilidi beklerken başka bir iş parçacığı tazelemiş olabilir
+            entry = self._read(key)
+            if entry is not None and time.time() - entry.stored_at < self.ttl:
+                LOOKUPS.inc(result="hit")
+                return self._product(entry.value, entry.stored_at)
+
+            record = entry.value if entry is not None else None
+            page = self.fetch(
+                canonical,
+                etag=record.get("etag") if record else None,
+                last_modified=record.get("last_modified") if record else None,
+            )
+            if page.status == 304 and record is not None:
+                LOOKUPS.inc(result="not_modified")
+                self._write(key, record)
+                return self._product(record, time.time())
+            if page.status == 200 and page.product.get("name"):
+                LOOKUPS.inc(result="refreshed" if record is not None else "miss")
+                self._write(key, {
+                    "product": page.product,
+                    "etag": page.etag,
+                    "last_modified": page.last_modified,
+                })
+                return self._product({"product": page.product}, time.time())
+            if record is not None:
+                LOOKUPS.inc(result="stale_error")
+                return self._product(record, entry.stored_at)
+            LOOKUPS.inc(result="miss")
+            return page.product
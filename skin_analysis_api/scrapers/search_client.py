@@ -0,0 +1,230 @@
+#search_client.py
+# Google Custom Search çağrıları için sonuç önbelleği, eşzamanlı aynı sorguların
+# birleştirilmesi, süreç başına hız sınırı ve günlük kota muhasebesi.
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import config
+from cache.backends import create_backend
+from metrics import counter, gauge, time_stage
+from scrapers.http_client import get_http_client
+
+SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
+LOOKUPS = counter("search_lookups_total",
+                  "Custom Search lookups by result (hit, miss, coalesced, stale, skipped, rejected, error)",
+                  labelnames=("result",))
+QUOTA_USED = gauge("search_quota_used", "Custom Search requests spent in the current quota day")
+QUOTA_REMAINING = gauge("search_quota_remaining", "Custom Search requests left in the current quota day")
+
+try:
+    from zoneinfo import ZoneInfo
+    # Google kotası Pasifik saatiyle gece yarısı sıfırlanır
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:
+    _QUOTA_TZ = timezone.utc
+
+
+def normalize_query(query: str) -> str:
+    # Büyük/küçük harf ve boşluk farkları aynı sonucu döndürür ("İ".lower() "i̇" olur)
+    return re.sub(r"\s+", " ", query.replace("İ", "i")).strip().lower()
+
+
+class RateLimiter:
+    """Token bucket: saniyede rate istek, en fazla burst kadar birikir."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        if self.rate <= 0:
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class QuotaAccountant:
+    """
+    Günlük kotadan harcanan istekleri sayar (0: sınırsız). Kalan kota
+    reserve oranının altına düşünce low() True olur; o durumda alternatif
+    sorgular yalnızca önbellekten karşılanır.
+    """
+
+    def __init__(self, daily_quota: int, reserve: float = 0.2):
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self._day = None
+        self._used = 0
+        self._lock = threading.Lock()
+        QUOTA_USED.set_function(lambda: self.used)
+        QUOTA_REMAINING.set_function(lambda: self.remaining() if self.daily_quota else -1)
+
+    def _roll(self):
+        day = datetime.now(_QUOTA_TZ).date()
+        if day != self._day:
+            self._day, self._used = day, 0
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            self._roll()
+            return self._used
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll()
+            return max(0, self.daily_quota - self._used)
+
+    def low(self) -> bool:
+        return bool(self.daily_quota) and self.remaining() <= self.daily_quota * self.reserve
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            self._roll()
+            if self.daily_quota and self._used >= self.daily_quota:
+                return False
+            self._used += 1
+            return True
+
+
+class SearchClient:
+    """
+    search() sırası: taze önbellek -> (aynı sorgu uçuştaysa onu bekle) -> hız
+    sınırı ve kota izin verirse API -> izin vermezse veya hata olursa bayat sonuç.
+    Dönen değer Custom Search yanıtının {"items": [{"link": ...}, ...]} alt kümesidir;
+    sonuç alınamazsa None.
+    """
+
+    def __init__(self, backend, ttl: float, stale_ttl: float, rate_limiter: RateLimiter,
+                 quota: QuotaAccountant, rate_wait: float = 2.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.rate_limiter = rate_limiter
+        self.quota = quota
+        self.rate_wait = rate_wait
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(engine_id: str, query: str, num: int) -> str:
+        return f"search:{engine_id}:{num}:{normalize_query(query)}"
+
+    def _read(self, key: str):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logging.error(f"Search cache read error: {e}")
+            return None
+
+    def _fresh(self, entry) -> bool:
+        return entry is not None and time.time() - entry.stored_at < self.ttl
+
+    def is_cached(self, engine_id: str, query: str, num: int) -> bool:
+        return self._fresh(self._read(self.cache_key(engine_id, query, num)))
+
+    def budget_low(self) -> bool:
+        return self.quota.low()
+
+    def search(self, api_key: str, engine_id: str, query: str, num: int,
+               cache_only: bool = False) -> Optional[dict]:
+        key = self.cache_key(engine_id, query, num)
+        entry = self._read(key)
+        if self._fresh(entry):
+            LOOKUPS.inc(result="hit")
+            return entry.value
+        if cache_only:
+            LOOKUPS.inc(result="stale" if entry is not None else "skipped")
+            return entry.value if entry is not None else None
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            LOOKUPS.inc(result="coalesced")
+            return future.result()
+
+        try:
+            result = self._fetch(key, api_key, engine_id, query, num, entry)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, key, api_key, engine_id, query, num, entry) -> Optional[dict]:
+        if not self.rate_limiter.acquire(self.rate_wait) or not self.quota.try_consume():
+            LOOKUPS.inc(result="stale" if entry is not None else "rejected")
+            logging.warning(f"Search budget exhausted, {'serving stale result' if entry else 'skipping'}: {query}")
+            return entry.value if entry is not None else None
+
+        params = {"key": api_key, "cx": engine_id, "q": query, "num": num}
+        try:
+            with time_stage("search_api"):
+                response = get_http_client().get(SEARCH_URL, params=params)
+            if response.status_code != 200:
+                logging.error(f"Search API error: {response.status_code}")
+                raise ValueError(f"status {response.status_code}")
+            data = response.json()
+        except Exception as e:
+            LOOKUPS.inc(result="stale" if entry is not None else "error")
+            logging.error(f"Search request failed for {query!r}: {e}")
+            return entry.value if entry is not None else None
+
+        # Yalnızca kullanılan alanı sakla; sonuçsuz yanıtlar da önbelleğe girer
+        result = {"items": [{"link": item["link"]} for item in data["items"] if "link" in item]} \
+            if "items" in data else {}
+        try:
+            self.backend.set(key, result, self.ttl + self.stale_ttl)
+        except Exception as e:
+            logging.error(f"Search cache write error: {e}")
+        LOOKUPS.inc(result="miss")
+        return result
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_search_client() -> SearchClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                backend = create_backend(config.SEARCH_CACHE_BACKEND, max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+                                         sqlite_path=config.CACHE_SQLITE_PATH, redis_url=config.CACHE_REDIS_URL,
+                                         table="search", prefix="skincare:search:")
+                _client = SearchClient(
+                    backend,
+                    ttl=config.SEARCH_CACHE_TTL_SECONDS,
+                    stale_ttl=config.SEARCH_CACHE_STALE_SECONDS,
+                    rate_limiter=RateLimiter(config.SEARCH_RATE_PER_SECOND, config.SEARCH_RATE_BURST),
+                    quota=QuotaAccountant(config.SEARCH_DAILY_QUOTA, config.SEARCH_QUOTA_RESERVE),
+                    rate_wait=config.SEARCH_RATE_WAIT_SECONDS,
+                )
+    return _client
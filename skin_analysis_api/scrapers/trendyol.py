@@ -1,125 +1,174 @@
 #trendyol.py
-import requests
-from bs4 import BeautifulSoup
-import re
-import json
 import logging
 import random
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import config
+from cache.backends import create_backend
+from catalog.ranking import query_keywords, rank_products
+from metrics import counter, histogram, time_stage
+from scrapers.http_client import get_http_client
+from scrapers.parser import empty_product, parse_product_html, StreamingProductParser
+from scrapers.product_store import PageFetch, ProductStore, canonical_product_url
+from scrapers.search_client import get_search_client
+
+_BYTE_BUCKETS = (0, 4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304)
+PAGE_BYTES_READ = histogram("scraper_page_bytes_read", "Body bytes read from the wire per product page",
+                            buckets=_BYTE_BUCKETS)
+PAGE_BYTES_SAVED = histogram("scraper_page_bytes_saved",
+                             "Body bytes left unread per product page after early close", buckets=_BYTE_BUCKETS)
+PAGE_EARLY_CLOSE = counter("scraper_page_early_close_total",
+                           "Product pages closed before the end of the body", labelnames=("drained",))
+
+# Ürün sayfaları için paylaşılan, sınırlı iş parçacığı havuzu
+_FETCH_POOL = ThreadPoolExecutor(max_workers=config.SCRAPER_FETCH_WORKERS, thread_name_prefix="product-fetch")
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def _host_semaphore(url):
+    # Aynı siteye aynı anda en fazla SCRAPER_PER_HOST_LIMIT istek
+    host = urlparse(url).netloc.lower()
+    with _host_limits_lock:
+        semaphore = _host_limits.get(host)
+        if semaphore is None:
+            semaphore = _host_limits[host] = threading.BoundedSemaphore(config.SCRAPER_PER_HOST_LIMIT)
+        return semaphore
+
+
+_product_store = None
+_product_store_lock = threading.Lock()
+
+
+def get_product_store() -> ProductStore:
+    global _product_store
+    if _product_store is None:
+        with _product_store_lock:
+            if _product_store is None:
+                backend = create_backend(config.PRODUCT_STORE_BACKEND,
+                                         max_entries=config.PRODUCT_STORE_MAX_ENTRIES,
+                                         sqlite_path=config.PRODUCT_STORE_SQLITE_PATH,
+                                         redis_url=config.CACHE_REDIS_URL,
+                                         table="products", prefix="skincare:products:")
+                _product_store = ProductStore(backend, fetch_product_page,
+                                              ttl=config.PRODUCT_STORE_TTL_SECONDS,
+                                              retention=config.PRODUCT_STORE_RETENTION_SECONDS)
+    return _product_store
+
+
+def _fetch_product(url):
+    with _host_semaphore(url):
+        if config.PRODUCT_STORE_ENABLED:
+            return get_product_store().resolve(url)
+        return extract_trendyol_data(url)
+
+
+def fetch_products_in_order(urls):
+    """
+    Sayfaları eşzamanlı indirir ama sonuçları urls sırasıyla verir; böylece seçim
+    kuralları sıralı sürümle aynı sonucu üretir. Tüketici erken çıkarsa henüz
+    başlamamış indirmeler iptal edilir.
+    """
+    futures = [_FETCH_POOL.submit(_fetch_product, url) for url in urls]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _wire_bytes(response) -> int:
+    try:
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def _content_length(response):
+    try:
+        return int(response.headers.get("Content-Length", ""))
+    except ValueError:
+        return None
+
+
+def read_product_page(response, url):
+    """
+    Akışlı yanıtı parça parça ayrıştırıcıya verir; tüm alanlar bulununca okumayı
+    keser. Kalan gövde küçükse bağlantı havuza dönebilsin diye boşaltılır, değilse
+    bağlantı kapatılır. Okunan ve okunmadan bırakılan bayt sayıları raporlanır.
+    """
+    # Charset belirtilmemişse requests'in ISO-8859-1 varsayımı yerine UTF-8 kullan
+    charset_given = "charset" in response.headers.get("Content-Type", "").lower()
+    parser = StreamingProductParser(url, mode=config.SCRAPER_PARSER,
+                                    encoding=response.encoding if charset_given else None)
+    total = _content_length(response)
+    stopped_early = drained = False
+    try:
+        for chunk in response.iter_content(chunk_size=config.SCRAPER_STREAM_CHUNK):
+            if parser.feed(chunk):
+                stopped_early = True
+                break
+        if stopped_early and total is not None and total - _wire_bytes(response) <= config.SCRAPER_STREAM_DRAIN_BYTES:
+            for _ in response.iter_content(chunk_size=config.SCRAPER_STREAM_CHUNK):
+                pass
+            drained = True
+    finally:
+        read = _wire_bytes(response) or parser.bytes_fed
+        response.close()
+
+    PAGE_BYTES_READ.observe(read)
+    if stopped_early:
+        PAGE_EARLY_CLOSE.inc(drained=str(drained).lower())
+    if total is not None:
+        saved = max(0, total - read)
+        PAGE_BYTES_SAVED.observe(saved)
+        logging.debug(f"Read {read} of {total} bytes from {url} ({saved} saved)")
+    return parser.close()
 
 
 # Trendyol Scraper
-def extract_trendyol_data(url):
-    product = {
-        "name": None,
-        "purchase_link": url,
-        "price": None,
-        "rating": None,
-        "image_url": None,
-        "brand": None  # Marka bilgisini ekliyoruz
-    }
+@time_stage("product_fetch")
+def fetch_product_page(url, etag=None, last_modified=None) -> PageFetch:
+    """
+    Ürün sayfasını indirip ayrıştırır. etag/last_modified verilirse istek koşullu
+    yapılır; sayfa değişmemişse status 304 ve boş ürün döner.
+    """
+    product = empty_product(url)
     try:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(url, headers=headers, timeout=10)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        streaming = config.SCRAPER_STREAMING and config.SCRAPER_PARSER != "legacy"
+        response = get_http_client().get(url, headers=headers, stream=streaming)
+        validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if response.status_code == 304:
+            response.close()
+            return PageFetch(304, product, *validators)
         if response.status_code != 200:
             logging.error(f"Could not access URL: {url}, Status code: {response.status_code}")
-            return product
-
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Product name
-        for selector in [
-            ".pr-new-br", ".prdct-desc-cntnr-name", "h1.pr-new-br",
-            ".product-name", ".product-detail-name"
-        ]:
-            name_elem = soup.select_one(selector)
-            if name_elem:
-                product["name"] = name_elem.get_text(strip=True)
-                break
-
-        # Price
-        for selector in [
-            ".prc-dsc", ".product-price", ".price-container",
-            ".pr-bx-w .prc-dsc", ".pr-bx-nm .prc-dsc",
-            ".pr-bx-w .prc-org", "[data-testid='price-current-price']",
-            ".product-price-container .prc-dsc"
-        ]:
-            price_elem = soup.select_one(selector)
-            if price_elem:
-                price_text = re.sub(r'[^\d,.]', '', price_elem.get_text(strip=True))
-                product["price"] = price_text
-                break
-
-        # Rating
-        for selector in [
-            ".tltp-avg", ".rating-score", ".star-w .rt",
-            "[data-testid='rating-score']"
-        ]:
-            rating_elem = soup.select_one(selector)
-            if rating_elem:
-                try:
-                    rating_text = rating_elem.get_text(strip=True).replace(',', '.')
-                    match = re.search(r'\d+\.\d+|\d+', rating_text)
-                    if match:
-                        product["rating"] = float(match.group())
-                        break
-                except:
-                    pass
-
-        # Image
-        for selector in [
-            ".product-slide img", ".gallery-modal-content img",
-            ".base-product-image", ".product-img",
-            "[data-testid='product-image']", ".ph-gl-img"
-        ]:
-            img_elem = soup.select_one(selector)
-            if img_elem and img_elem.has_attr("src"):
-                img_url = img_elem["src"]
-                if img_url.startswith("//"):
-                    img_url = "https:" + img_url
-                product["image_url"] = img_url
-                break
-
-        # Brand - Marka bilgisini çıkarmak için eklendi
-        for selector in [
-            ".pr-new-br", ".prdct-desc-cntnr-ttl",
-            ".product-brand", ".brand-name"
-        ]:
-            brand_elem = soup.select_one(selector)
-            if brand_elem:
-                product["brand"] = brand_elem.get_text(strip=True)
-                break
-
-        # Marka bilgisini ürün adından çıkarmayı dene
-        if not product["brand"] and product["name"]:
-            first_word = product["name"].split()[0]
-            # Genellikle ilk kelime markadır
-            if len(first_word) > 2:  # Çok kısa değilse
-                product["brand"] = first_word
-
-        # JSON-LD
-        json_ld = soup.find("script", {"type": "application/ld+json"})
-        if json_ld:
-            try:
-                data = json.loads(json_ld.string)
-                if not product["name"] and "name" in data:
-                    product["name"] = data["name"]
-                if not product["price"] and "offers" in data and "price" in data["offers"]:
-                    product["price"] = str(data["offers"]["price"])
-                if not product["rating"] and "aggregateRating" in data and "ratingValue" in data["aggregateRating"]:
-                    product["rating"] = float(data["aggregateRating"]["ratingValue"])
-                if not product["image_url"] and "image" in data:
-                    product["image_url"] = data["image"]
-                if not product["brand"] and "brand" in data and "name" in data["brand"]:
-                    product["brand"] = data["brand"]["name"]
-            except Exception as e:
-                logging.error(f"JSON-LD parsing error: {e}")
-
-        return product
+            response.close()
+            return PageFetch(response.status_code, product)
+
+        if streaming:
+            product = read_product_page(response, url)
+        else:
+            product = parse_product_html(response.text, url, mode=config.SCRAPER_PARSER)
+        return PageFetch(200, product, *validators)
     except Exception as e:
         logging.error(f"Trendyol data extraction error: {e}")
-        return product
+        return PageFetch(None, product)
+
+
+def extract_trendyol_data(url):
+    return fetch_product_page(url).product
 
 
 def is_product_page(url: str) -> bool:
@@ -127,24 +176,48 @@ def is_product_page(url: str) -> bool:
     return any(part in url for part in ["/p-", "-p-", "/urun/", "/product/"])
 
 
-def search_products(query, count=3, min_rating=None, search_api_key=None, search_engine_id=None):
+def _prefer_cached(search, engine_id, queries, num):
+    # Önbellekte sonucu olan sorgular kota harcamaz; onları öne al (sıralama kararlı)
+    return sorted(queries, key=lambda q: not search.is_cached(engine_id, q, num))
+
+
+def _collect_candidates(urls, limit, min_rating):
+    # Arama sırasıyla adayları topla; limit uygun aday (adı olan, min_rating'i geçen)
+    # bulununca dur, böylece fetch_products_in_order başlamamış indirmeleri iptal eder
+    candidates, eligible = [], 0
+    for product in fetch_products_in_order(urls):
+        if not product["name"]:
+            continue
+        candidates.append(product)
+        rating = product.get("rating")
+        if min_rating is None or (rating is not None and rating >= min_rating):
+            eligible += 1
+            if limit and eligible >= limit:
+                break
+    return candidates
+
+
+def _select(candidates, count, min_rating, keywords, seed):
+    return rank_products(candidates, count=count, min_rating=min_rating, keywords=keywords, seed=seed,
+                         max_per_brand=config.RANK_MAX_PER_BRAND, diversity=config.RANK_DIVERSITY)
+
+
+@time_stage("search_products")
+def search_products(query, count=3, min_rating=None, search_api_key=None, search_engine_id=None, seed=None):
     try:
+        # Aynı sorgu ve seed her zaman aynı ürünleri seçer (sonuç önbelleğe alınabilir)
+        if seed is None:
+            seed = config.RANK_SEED ^ zlib.crc32(query.encode("utf-8"))
+        rng = random.Random(seed)
         # Add 'trendyol' to search query to limit results to Trendyol
         search_query = f"{query} site:trendyol.com"
-        url = f"https://www.googleapis.com/customsearch/v1"
-        params = {
-            "key": search_api_key,
-            "cx": search_engine_id,
-            "q": search_query,
-            "num": min(count * 5, 10)  # Daha fazla sonuç alacağız
-        }
+        num = min(count * 5, 10)  # Daha fazla sonuç alacağız
+        search = get_search_client()
 
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            logging.error(f"Search API error: {response.status_code}")
+        results = search.search(search_api_key, search_engine_id, search_query, num)
+        if results is None:
             return []
 
-        results = response.json()
         if "items" not in results:
             logging.warning("No search results found")
             # Black-circle için özel sorgular ekleyelim
@@ -155,14 +228,14 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
                     "dark circle eye cream site:trendyol.com",
                     "göz çevresi bakım kremi site:trendyol.com"
                 ]
-                # Rastgele bir alternatif sorgu seç
-                alt_query = random.choice(alt_queries)
-                alt_params = params.copy()
-                alt_params["q"] = alt_query
-
-                alt_response = requests.get(url, params=alt_params)
-                if alt_response.status_code == 200 and "items" in alt_response.json():
-                    results = alt_response.json()
+                # Seed'e bağlı bir alternatif sorgu seç; önbellekte olan varsa onu
+                rng.shuffle(alt_queries)
+                alt_query = _prefer_cached(search, search_engine_id, alt_queries, num)[0]
+
+                alt_results = search.search(search_api_key, search_engine_id, alt_query, num,
+                                            cache_only=search.budget_low())
+                if alt_results and "items" in alt_results:
+                    results = alt_results
                 else:
                     return []
             else:
@@ -170,38 +243,20 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
 
         # Extract only valid product detail URLs
         product_urls = [
-            item["link"]
+            canonical_product_url(item["link"])
             for item in results["items"]
             if "trendyol.com" in item["link"] and is_product_page(item["link"])
         ]
 
-        # Benzersiz ürün URL'lerini topla
-        unique_urls = list(set(product_urls))
-
-        # URL'leri karıştıralım - böylece farklı sıralamalarda ürünler görebiliriz
-        random.shuffle(unique_urls)
-
-        # Get product details
-        products = []
-        seen_names = set()  # Aynı isimli ürünleri engellemek için
-        seen_brands = set()  # Farklı markalardan ürün toplamak için
-
-        for url in unique_urls:
-            product = extract_trendyol_data(url)
-            # Sadece ismi olan ve daha önce aynı isimde ürün eklenmemiş olanları dahil et
-            if product["name"] and product["name"] not in seen_names:
-                # Eğer bu markanın 2 ürününü zaten eklemişsek, bu markayı atla
-                if product["brand"] and product["brand"] in seen_brands and list(seen_brands).count(
-                        product["brand"]) >= 2:
-                    continue
-
-                if min_rating is None or (product["rating"] is not None and product["rating"] >= min_rating):
-                    products.append(product)
-                    seen_names.add(product["name"])
-                    if product["brand"]:
-                        seen_brands.add(product["brand"])
-                    if len(products) >= count:
-                        break
+        # Benzersiz ürün URL'lerini topla (arama sırası korunur)
+        unique_urls = list(dict.fromkeys(product_urls))
+
+        # Yeterli aday toplanana kadar al (çoğu ürün deposundan gelir), sonra tek seferde
+        # puanla ve marka/benzerlik çeşitliliğiyle seç; aynı seed aynı sonucu verir
+        keywords = query_keywords(query)
+        candidate_limit = count * config.RANK_CANDIDATE_FACTOR
+        candidates = _collect_candidates(unique_urls, candidate_limit, min_rating)
+        products = _select(candidates, count, min_rating, keywords, seed)
 
         # Yeterince ürün bulunamadıysa, alternatif arama sorguları deneyelim
         if len(products) < count:
@@ -251,45 +306,29 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
                     f"{query.split()[0]} dermokozmeti̇k trendyol"
                 ]
 
-            # Rastgele bir alternatif sorgu seç
-            random.shuffle(alt_queries)
+            # Seed'e bağlı sırala; önbellekte sonucu olanlar önce, kota azsa yalnızca onlar
+            rng.shuffle(alt_queries)
+            alt_queries = _prefer_cached(search, search_engine_id, alt_queries, num)
+            cache_only = search.budget_low()
 
             for alt_query in alt_queries:
                 if len(products) >= count:
                     break
 
-                alt_params = params.copy()
-                alt_params["q"] = alt_query
-
-                alt_response = requests.get(url, params=alt_params)
-                if alt_response.status_code == 200 and "items" in alt_response.json():
+                alt_results = search.search(search_api_key, search_engine_id, alt_query, num,
+                                            cache_only=cache_only)
+                if alt_results and "items" in alt_results:
                     alt_urls = [
-                        item["link"]
-                        for item in alt_response.json()["items"]
+                        canonical_product_url(item["link"])
+                        for item in alt_results["items"]
                         if "trendyol.com" in item["link"] and is_product_page(item["link"])
-                           and item["link"] not in unique_urls  # Daha önce bakılmamış URL'ler
+                           and canonical_product_url(item["link"]) not in unique_urls  # Daha önce bakılmamış URL'ler
                     ]
+                    alt_urls = list(dict.fromkeys(alt_urls))
+                    unique_urls.extend(alt_urls)
 
-                    # URL'leri karıştıralım
-                    random.shuffle(alt_urls)
-
-                    for alt_url in alt_urls:
-                        if len(products) >= count:
-                            break
-
-                        product = extract_trendyol_data(alt_url)
-                        if product["name"] and product["name"] not in seen_names:
-                            # Eğer bu markanın 2 ürününü zaten eklemişsek, bu markayı atla
-                            if product["brand"] and product["brand"] in seen_brands and list(seen_brands).count(
-                                    product["brand"]) >= 2:
-                                continue
-
-                            if min_rating is None or (
-                                    product["rating"] is not None and product["rating"] >= min_rating):
-                                products.append(product)
-                                seen_names.add(product["name"])
-                                if product["brand"]:
-                                    seen_brands.add(product["brand"])
+                    candidates.extend(_collect_candidates(alt_urls, candidate_limit, min_rating))
+                    products = _select(candidates, count, min_rating, keywords, seed)
 
         return products[:count]  # Return requested number of products
     except Exception as e:
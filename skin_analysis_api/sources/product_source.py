@@ -0,0 +1,253 @@
+#product_source.py
+# Öneri uç noktalarının ürün aldığı kaynaklar:
+#   trendyol: Google Custom Search + Trendyol sayfa kazıma (ağ ve API anahtarı gerekir)
+#   local   : gecelik anlık görüntüden yüklenen, dizinlenmiş yerel katalog (ağ yok)
+import asyncio
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from catalog.ranking import brand_key, tokenize
+from metrics import counter, gauge
+
+SOURCE_LOOKUPS = counter("product_source_lookups_total", "Product source searches", labelnames=("source",))
+CATALOG_PRODUCTS = gauge("local_catalog_products", "Products loaded from the local catalog snapshot")
+
+PRODUCT_FIELDS = ("name", "purchase_link", "price", "rating", "image_url", "brand")
+
+
+class ProductSource:
+    """
+    search(issue, count, min_rating) -> ürün sözlükleri (ProductResponse alanları).
+    blocking=True olan kaynaklar event loop dışında (to_thread) çalıştırılır.
+    """
+    name = "base"
+    blocking = True
+
+    def search(self, issue: str, count: int, min_rating: Optional[float] = None) -> List[dict]:
+        raise NotImplementedError
+
+    async def search_async(self, issue: str, count: int, min_rating: Optional[float] = None) -> List[dict]:
+        SOURCE_LOOKUPS.inc(source=self.name)
+        if self.blocking:
+            return await asyncio.to_thread(self.search, issue, count, min_rating)
+        return self.search(issue, count, min_rating)
+
+
+class TrendyolSearchSource(ProductSource):
+    """Mevcut Google Custom Search + Trendyol kazıyıcısı."""
+    name = "trendyol"
+    blocking = True
+
+    def __init__(self, api_key: str, engine_id: str, build_query: Callable[[str], str]):
+        self.api_key = api_key
+        self.engine_id = engine_id
+        self.build_query = build_query
+
+    def search(self, issue, count, min_rating=None):
+        from scrapers.trendyol import search_products
+
+        if not self.api_key or not self.engine_id:
+            # Anahtarsız başlatılabilir (analiz çalışır); yalnızca öneriler boş döner
+            logging.error("SEARCH_API_KEY / SEARCH_ENGINE_ID not configured, skipping product search")
+            return []
+        return search_products(self.build_query(issue), count=count, min_rating=min_rating,
+                               search_api_key=self.api_key, search_engine_id=self.engine_id)
+
+
+class CatalogIndex(NamedTuple):
+    products: List[dict]
+    keyword_index: Dict[str, List[int]]   # anahtar kelime/marka parçası -> ürünler
+    brand_index: Dict[str, List[int]]     # brand_key -> ürünler
+    issue_index: Dict[str, List[int]]     # sorun -> etiketli ürünler
+    by_rating: List[int]                  # puana göre artan ürün kimlikleri
+    ratings: List[float]                  # by_rating ile aynı sırada puanlar
+    ranked: Dict[str, List[int]]          # sorun -> sıralama önbelleği (bu dizine ait)
+
+
+class LocalCatalogSource(ProductSource):
+    """
+    Anlık görüntü dosyasını (SQLite, JSON/JSONL veya Parquet) belleğe yükler ve üç
+    ters dizin kurar: anahtar kelime/marka parçası -> ürünler, marka -> ürünler ve
+    puana göre sıralı ürün listesi. Sorun başına sıralama ilk istekte hesaplanıp
+    saklanır; sonraki aramalar yalnızca puan süzgeciyle dilimlemedir.
+
+    Dosya değişirse (mtime) en fazla reload_seconds'ta bir, arka plan iş
+    parçacığında yeniden yüklenir; search event loop'u hiç bekletmez. Dizinler
+    değişmez bir CatalogIndex olarak tutulur ve yeniden yükleme yalnızca
+    referansı değiştirir; aramalar eski ya da yeni dizini bütünüyle görür.
+    """
+    name = "local"
+    blocking = False
+
+    def __init__(self, path: str, issue_terms: Dict[str, Iterable[str]], reload_seconds: float = 30.0,
+                 max_per_brand: int = 2):
+        self.path = path
+        self.max_per_brand = max_per_brand
+        self.issue_terms = {issue: list(terms) for issue, terms in issue_terms.items()}
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime = None
+        self.index = self._build([])
+        # İlk yükleme başlangıçta, eşzamanlı
+        self._reload(force=True)
+
+    @property
+    def products(self) -> List[dict]:
+        return self.index.products
+
+    # -- yükleme ve dizinleme --
+    def _read_rows(self) -> List[dict]:
+        ext = os.path.splitext(self.path)[1].lower()
+        if ext in (".json", ".jsonl", ".ndjson"):
+            with open(self.path, encoding="utf-8") as f:
+                if ext == ".json":
+                    data = json.load(f)
+                    return data["products"] if isinstance(data, dict) else data
+                return [json.loads(line) for line in f if line.strip()]
+        if ext == ".parquet":
+            import pyarrow.parquet as pq
+
+            return pq.read_table(self.path).to_pylist()
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute("SELECT * FROM products")]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        if not value:
+            return []
+        if isinstance(value, str):
+            return [part.strip() for part in value.split(",") if part.strip()]
+        return [str(part) for part in value]
+
+    def _build(self, rows: List[dict]) -> CatalogIndex:
+        products, keyword_index, brand_index, issue_index = [], {}, {}, {}
+        for row in rows:
+            if not row.get("name") or not row.get("purchase_link"):
+                continue
+            product = {field: row.get(field) for field in PRODUCT_FIELDS}
+            if product["rating"] is not None:
+                product["rating"] = float(product["rating"])
+            pid = len(products)
+            products.append(product)
+            terms = [product["name"], product["brand"] or ""] + self._as_list(row.get("keywords"))
+            for token in set(tokenize(" ".join(terms))):
+                keyword_index.setdefault(token, []).append(pid)
+            brand = brand_key(product)
+            if brand:
+                brand_index.setdefault(brand, []).append(pid)
+            for issue in self._as_list(row.get("issues")):
+                issue_index.setdefault(issue, []).append(pid)
+
+        rated = sorted((p["rating"], pid) for pid, p in enumerate(products) if p["rating"] is not None)
+        return CatalogIndex(
+            products=products,
+            keyword_index=keyword_index,
+            brand_index=brand_index,
+            issue_index=issue_index,
+            by_rating=[pid for _, pid in rated],
+            ratings=[rating for rating, _ in rated],
+            ranked={},
+        )
+
+    def _maybe_reload(self):
+        # Olay döngüsünde çağrılır: yalnızca süre dolduysa ve başka yükleme sürmüyorsa
+        # dosya kontrolünü/yüklemeyi bir iş parçacığına bırakır
+        now = time.time()
+        if now - self._checked_at < self.reload_seconds or self._lock.locked():
+            return
+        self._checked_at = now
+        threading.Thread(target=self._reload, name="local-catalog-reload", daemon=True).start()
+
+    def _reload(self, force: bool = False):
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._checked_at = time.time()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                if force:
+                    logging.warning(f"Local catalog not found: {self.path}")
+                return
+            if mtime == self._mtime:
+                return
+            started = time.perf_counter()
+            try:
+                index = self._build(self._read_rows())
+            except Exception as e:
+                logging.error(f"Local catalog load error ({self.path}): {e}")
+                return
+            self.index, self._mtime = index, mtime
+            CATALOG_PRODUCTS.set(len(index.products))
+            logging.info(f"Local catalog loaded: {len(index.products)} products from {self.path} "
+                         f"in {time.perf_counter() - started:.2f}s")
+        finally:
+            self._lock.release()
+
+    # -- sorgulama --
+    def _rank(self, index: CatalogIndex, issue: str) -> List[int]:
+        """Sorunla etiketli ürünler önce; sonra eşleşen terim sayısı, sonra puan."""
+        ranked = index.ranked.get(issue)
+        if ranked is not None:
+            return ranked
+        scores: Dict[int, float] = {}
+        for pid in index.issue_index.get(issue, ()):
+            scores[pid] = scores.get(pid, 0.0) + 100.0
+        for term in self.issue_terms.get(issue, ()):
+            # Terim bir marka adıysa o markanın ürünleri de aday
+            for pid in index.brand_index.get(brand_key({"brand": term}), ()):
+                scores[pid] = scores.get(pid, 0.0) + 1.0
+            for token in tokenize(term):
+                for pid in index.keyword_index.get(token, ()):
+                    scores[pid] = scores.get(pid, 0.0) + 1.0
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], -(index.products[pid]["rating"] or 0.0), pid))
+        index.ranked[issue] = ranked
+        return ranked
+
+    @staticmethod
+    def _top_rated(index: CatalogIndex, min_rating: Optional[float]) -> List[int]:
+        # Puan dizini: eşiğin üstündeki ürünler, yüksekten düşüğe
+        start = bisect.bisect_left(index.ratings, min_rating) if min_rating is not None else 0
+        return index.by_rating[start:][::-1]
+
+    def search(self, issue, count, min_rating=None):
+        self._maybe_reload()
+        # Arama boyunca tek bir dizin anlık görüntüsü kullanılır
+        index = self.index
+        # Sorunla eşleşen ürün yoksa genel en yüksek puanlılara düş
+        ranked = self._rank(index, issue) or self._top_rated(index, min_rating)
+        selected, brands = [], {}
+        for pid in ranked:
+            rating = index.products[pid]["rating"]
+            if min_rating is not None and (rating is None or rating < min_rating):
+                continue
+            brand = brand_key(index.products[pid])
+            if brand and self.max_per_brand and brands.get(brand, 0) >= self.max_per_brand:
+                continue
+            selected.append(pid)
+            if brand:
+                brands[brand] = brands.get(brand, 0) + 1
+            if len(selected) >= count:
+                break
+        return [dict(index.products[pid]) for pid in selected]
+
+
+def create_product_source(kind: str, **kwargs) -> ProductSource:
+    if kind == "trendyol":
+        return TrendyolSearchSource(kwargs["api_key"], kwargs["engine_id"], kwargs["build_query"])
+    if kind == "local":
+        return LocalCatalogSource(kwargs["path"], kwargs["issue_terms"],
+                                  reload_seconds=kwargs.get("reload_seconds", 30.0),
+                                  max_per_brand=kwargs.get("max_per_brand", 2))
+    raise ValueError(f"Unknown product source {kind!r}, expected trendyol or local")
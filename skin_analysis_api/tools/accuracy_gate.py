@@ -0,0 +1,125 @@
+#accuracy_gate.py
+# Her model varyantının etiket başına olasılıklarını ve THRESHOLDS kararlarını
+# fp32 eager modele karşı ayrılmış bir veri kümesinde karşılaştırır; CPU'da
+# görsel başına gecikmeyi de raporlar. Kapı geçilmezse sıfırdan farklı kodla çıkar.
+#
+#   cd skin_analysis_api
+#   python -m tools.accuracy_gate --images heldout/ --cropped --backends eager_int8 onnx onnx_int8
+import argparse
+import logging
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from data.skin_issues import LABELS, THRESHOLDS
+from inference.backends import BACKENDS, load_backend
+from inference.pipeline import extract_face_region
+from inference.preprocess import preprocess_face
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def prepare_face_tensor(image_bytes):
+    # API'deki yüz bulma + ön işleme: [3,224,224] tensör, yüz yoksa None
+    face_crop = extract_face_region(image_bytes)
+    if face_crop is None:
+        return None
+    return preprocess_face(face_crop)
+
+
+def load_inputs(directory, cropped, limit):
+    # cropped: eğitim verisi gibi zaten kırpılmış yüzler; değilse API'deki yüz bulma uygulanır
+    names, tensors = [], []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(directory, name)
+        if cropped:
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+            tensor = preprocess_face(img) if img is not None else None
+        else:
+            with open(path, "rb") as f:
+                tensor = prepare_face_tensor(f.read())
+        if tensor is None:
+            logging.warning(f"Skipping {name}: no face / unreadable")
+            continue
+        names.append(name)
+        tensors.append(tensor)
+        if limit and len(names) >= limit:
+            break
+    if not tensors:
+        raise SystemExit(f"No usable images in {directory}")
+    return names, torch.stack(tensors)
+
+
+def predict_all(backend, inputs, batch_size):
+    return np.concatenate([backend.predict(inputs[i:i + batch_size]) for i in range(0, len(inputs), batch_size)])
+
+
+def latency_per_image(backend, inputs, runs):
+    backend.predict(inputs[:1])  # ısınma
+    started = time.perf_counter()
+    for i in range(runs):
+        backend.predict(inputs[i % len(inputs):i % len(inputs) + 1])
+    return (time.perf_counter() - started) / runs * 1000
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Accuracy gate for exported/quantized model variants")
+    parser.add_argument("--model", default="75epoch-convnextbase-improved.pth")
+    parser.add_argument("--images", required=True, help="Ayrılmış (held-out) görsel klasörü")
+    parser.add_argument("--cropped", action="store_true", help="Görseller zaten yüz kırpığı")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS[1:], default=list(BACKENDS[1:]))
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--latency-runs", type=int, default=20)
+    parser.add_argument("--max-prob-diff", type=float, default=0.05,
+                        help="Herhangi bir etikette izin verilen en büyük mutlak olasılık farkı")
+    parser.add_argument("--max-flip-rate", type=float, default=0.0,
+                        help="Tespit edilen sorun kümesi değişen görsellerin izin verilen oranı")
+    args = parser.parse_args()
+
+    cpu = torch.device("cpu")
+    names, inputs = load_inputs(args.images, args.cropped, args.limit)
+    # analyze_skin ile aynı kural: listede olmayan etiketler için 0.5
+    thresholds = np.array([THRESHOLDS.get(label, 0.5) for label in LABELS], dtype=np.float32)
+
+    reference = load_backend("eager", args.model, cpu, len(LABELS))
+    ref_probs = predict_all(reference, inputs, args.batch_size)
+    ref_decisions = ref_probs > thresholds
+    ref_latency = latency_per_image(reference, inputs, args.latency_runs)
+    print(f"{len(names)} images, fp32 eager latency {ref_latency:.1f} ms/image")
+
+    failed = False
+    header = "  ".join(f"{label[:8]:>8}" for label in LABELS)
+    print(f"{'backend':<18} {header}  {'flips':>6} {'ms/img':>7} {'speedup':>7}")
+    for name in args.backends:
+        try:
+            backend = load_backend(name, args.model, cpu, len(LABELS))
+        except Exception as e:
+            print(f"{name:<18} unavailable: {e}")
+            failed = True
+            continue
+        probs = predict_all(backend, inputs, args.batch_size)
+        max_diff = np.abs(probs - ref_probs).max(axis=0)
+        flipped = ((probs > thresholds) != ref_decisions).any(axis=1)
+        flip_rate = float(flipped.mean())
+        latency = latency_per_image(backend, inputs, args.latency_runs)
+        ok = max_diff.max() <= args.max_prob_diff and flip_rate <= args.max_flip_rate
+        failed |= not ok
+        diffs = "  ".join(f"{d:>8.4f}" for d in max_diff)
+        print(f"{name:<18} {diffs}  {flip_rate:>6.1%} {latency:>7.1f} {ref_latency / latency:>6.1f}x"
+              f"{'' if ok else '  FAIL'}")
+        for i in np.flatnonzero(flipped)[:5]:
+            print(f"    decision changed: {names[i]}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#build_local_catalog.py
+# Yerel katalog anlık görüntüsünü (SQLite) üretir. Kaynaklar birleştirilir:
+#   --catalog-pool : arka plan yenileyicisinin sorun başına aday havuzu (sorun etiketleri buradan)
+#   --product-store: URL başına ürün detay deposu
+#   --json         : elle hazırlanmış ürün listesi (.json / .jsonl; "issues", "keywords" alanları isteğe bağlı)
+# Çıktı önce geçici dosyaya yazılır ve atomik olarak yerine konur; çalışan API
+# dosya değişimini fark edip yeniden yükler. Gecelik cron için uygundur:
+#
+#   cd skin_analysis_api
+#   python -m tools.build_local_catalog --catalog-pool catalog.sqlite3 --product-store products.sqlite3 \
+#       --out local_catalog.sqlite3
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+
+from sources.product_source import PRODUCT_FIELDS
+
+
+def _rows(path, table):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute(f"SELECT key, value FROM {table}").fetchall()
+    finally:
+        conn.close()
+
+
+def _merge(catalog, product, issues=(), keywords=()):
+    link = product.get("purchase_link")
+    if not link or not product.get("name"):
+        return
+    entry = catalog.setdefault(link, {"issues": set(), "keywords": set()})
+    for field in PRODUCT_FIELDS:
+        if product.get(field) is not None:
+            entry[field] = product[field]
+    entry["issues"].update(issues)
+    entry["keywords"].update(keywords)
+
+
+def load_catalog_pool(catalog, path):
+    for key, value in _rows(path, "catalog"):
+        issue = key.split(":", 1)[1]
+        for product in json.loads(value).get("products", []):
+            _merge(catalog, product, issues=[issue])
+
+
+def load_product_store(catalog, path):
+    for _, value in _rows(path, "products"):
+        _merge(catalog, json.loads(value)["product"])
+
+
+def load_json(catalog, path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+            items = data["products"] if isinstance(data, dict) else data
+        else:
+            items = [json.loads(line) for line in f if line.strip()]
+    for item in items:
+        _merge(catalog, item, issues=item.get("issues") or [], keywords=item.get("keywords") or [])
+
+
+def write_snapshot(catalog, out):
+    tmp = out + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    with conn:
+        conn.execute(
+            "CREATE TABLE products (purchase_link TEXT PRIMARY KEY, name TEXT NOT NULL, brand TEXT, "
+            "price TEXT, rating REAL, image_url TEXT, issues TEXT, keywords TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (link, p["name"], p.get("brand"), p.get("price"), p.get("rating"), p.get("image_url"),
+                 ",".join(sorted(p["issues"])), ",".join(sorted(p["keywords"])))
+                for link, p in catalog.items()
+            ],
+        )
+    conn.close()
+    os.replace(tmp, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local product catalog snapshot")
+    parser.add_argument("--catalog-pool", help="Candidate pool SQLite file (CATALOG_SQLITE_PATH)")
+    parser.add_argument("--product-store", help="Product detail store SQLite file (PRODUCT_STORE_SQLITE_PATH)")
+    parser.add_argument("--json", action="append", default=[], help="Product list (.json or .jsonl), repeatable")
+    parser.add_argument("--out", default="local_catalog.sqlite3")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    catalog = {}
+    if args.product_store:
+        load_product_store(catalog, args.product_store)
+    if args.catalog_pool:
+        load_catalog_pool(catalog, args.catalog_pool)
+    for path in args.json:
+        load_json(catalog, path)
+    if not catalog:
+        logging.error("No products found in the given sources")
+        sys.exit(1)
+
+    write_snapshot(catalog, args.out)
+    tagged = sum(1 for p in catalog.values() if p["issues"])
+    logging.info(f"Wrote {len(catalog)} products ({tagged} tagged with a skin issue) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#export_model.py
+# Eğitilmiş ConvNeXt ağırlıklarından TorchScript / ONNX grafikleri ve dinamik
+# int8 nicemlenmiş varyantları üretir. Dosyalar ağırlık dosyasının yanına,
+# inference.backends.variant_path ile bulunacak adlarla yazılır.
+#
+#   cd skin_analysis_api
+#   python -m tools.export_model --model 75epoch-convnextbase-improved.pth
+#   python -m tools.accuracy_gate --images heldout/ --cropped
+import argparse
+import logging
+
+import torch
+
+from data.skin_issues import LABELS
+from inference.backends import quantize_dynamic_int8, variant_path
+from inference.model import build_model
+from inference.preprocess import CROP_SIZE
+
+
+def export_torchscript(model, path, example):
+    with torch.inference_mode():
+        traced = torch.jit.trace(model, example)
+    try:
+        # Sabit ağırlıkları grafiğe göm, eval'e özel optimizasyonları uygula
+        traced = torch.jit.freeze(traced)
+    except Exception as e:
+        logging.warning(f"torch.jit.freeze skipped for {path}: {e}")
+    traced.save(path)
+    logging.info(f"TorchScript written: {path}")
+
+
+def export_onnx(model, path, example, opset):
+    torch.onnx.export(
+        model, example, path,
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset,
+    )
+    logging.info(f"ONNX written: {path}")
+
+
+def quantize_onnx(src, dst):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    logging.info(f"ONNX int8 written: {dst}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Export TorchScript/ONNX and int8 variants of the skin model")
+    parser.add_argument("--model", default="75epoch-convnextbase-improved.pth")
+    parser.add_argument("--formats", nargs="+", choices=("torchscript", "onnx"), default=["torchscript", "onnx"])
+    parser.add_argument("--no-int8", action="store_true", help="Nicemlenmiş varyantları üretme")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    cpu = torch.device("cpu")
+    model = build_model(args.model, cpu, len(LABELS))
+    example = torch.randn(1, 3, CROP_SIZE, CROP_SIZE)
+
+    if "torchscript" in args.formats:
+        export_torchscript(model, variant_path(args.model, "torchscript"), example)
+        if not args.no_int8:
+            quantized = quantize_dynamic_int8(build_model(args.model, cpu, len(LABELS)))
+            export_torchscript(quantized, variant_path(args.model, "torchscript_int8"), example)
+
+    if "onnx" in args.formats:
+        onnx_path = variant_path(args.model, "onnx")
+        export_onnx(model, onnx_path, example, args.opset)
+        if not args.no_int8:
+            quantize_onnx(onnx_path, variant_path(args.model, "onnx_int8"))
+
+
+if __name__ == "__main__":
+    main()
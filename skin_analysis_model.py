@@ -1,17 +1,21 @@
 import os
+import sys
 import random
 import numpy as np
-from PIL import Image
+import cv2
 from collections import defaultdict
 from sklearn.model_selection import train_test_split
 import torch
 import torch.nn as nn
 import torch.optim as optim
-import torchvision.transforms as transforms
 from torch.utils.data import Dataset, DataLoader, ConcatDataset
 
 from torchvision.models import convnext_base, ConvNeXt_Base_Weights
 
+# Servisle aynı ön işleme fonksiyonu (skin_analysis_api/inference/preprocess.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "skin_analysis_api"))
+from inference.preprocess import preprocess_face
+
 # ----------------------------------------------------------------------------
 # SEED & DEVICE
 # ----------------------------------------------------------------------------
@@ -87,13 +91,8 @@ print(f"\n[CLASS-WISE POS WEIGHTS] {pos_weights}")
 # ----------------------------------------------------------------------------
 # TRANSFORM & DATASET
 # ----------------------------------------------------------------------------
-base_transform = transforms.Compose([
-    transforms.Resize(256),
-    transforms.CenterCrop(224),
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406],
-                         [0.229, 0.224, 0.225])
-])
+# Resize(256) -> CenterCrop(224) -> ToTensor -> Normalize, API ile birebir aynı kod yolu
+base_transform = preprocess_face
 
 
 class SkinDataset(Dataset):
@@ -106,7 +105,10 @@ class SkinDataset(Dataset):
         return len(self.image_paths)
 
     def __getitem__(self, idx):
-        img = Image.open(self.image_paths[idx]).convert('RGB')
+        # API gibi OpenCV ile BGR oku; transform BGR kırpıktan tensöre dönüştürür
+        img = cv2.imread(self.image_paths[idx], cv2.IMREAD_COLOR)
+        if img is None:
+            raise RuntimeError(f"Could not read image: {self.image_paths[idx]}")
         if self.transform:
             img = self.transform(img)
         label = torch.FloatTensor(self.labels[idx])